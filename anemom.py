@@ -6,72 +6,408 @@
 
 import time
 
-# import asyncio
+import array
+import asyncio
 import board
-# import digitalio
+import digitalio
 import keypad
 import neopixel
+import supervisor
 
+try:
+    import countio
+except ImportError:
+    countio = None
 
-# Correction factor for count to MPH.
-# MPH =  COUNT_TO_MPH * counts_per_sample_time / sample_time
-# Gotta figure this out!
-COUNT_TO_MPH = 2.0
+
+# Counts to MPH isn't done here; see calibration.py.
 
 LED_OFF = 0x00_00_00
 
+# supervisor.ticks_ms() wraps around at this.
+TICKS_PERIOD = 1 << 29
+
+# Which pulse counter to use: "countio" (the hardware counts edges; falls back to keypad
+# if there's no countio or it can't count on our pin) or "keypad".
+COUNTER_BACKEND = "countio"
+
+# keypad scans the pin in the background and timestamps each event, but we only see the event
+# when we next look at the queue; so don't close a window until this long after it ends,
+# in case a pulse from just before the end is still on its way.
+WINDOW_SETTLE_MS = 50
+
+# How often count_windows() looks at the counter. keypad keeps up to KEYPAD_MAX_EVENTS for us in between -
+# a press and a release per pulse, so that's 64 pulses; at 400 Hz, 160 ms.
+POLL_SECONDS = 0.01
+KEYPAD_MAX_EVENTS = 128
+
+# Pulses are counted in buckets this long (ms); a counting window is a whole number of them.
+# Gusts are the most pulses in any GUST_SECONDS' worth of buckets - 3 s is the usual definition.
+GUST_BUCKET_MS = 250
+GUST_SECONDS = 3
+
+# In light wind a count per window is too coarse - at 1 Hz a 1 s window counts 0, 1 or 2 -
+# so below this many pulses a second, work the rate out from the times between pulses instead:
+# the last PERIOD_EDGES of them, going back up to PERIOD_SPAN_MS.
+PERIOD_MODE_BELOW_HZ = 20
+PERIOD_EDGES = 16
+PERIOD_SPAN_MS = 5000
+
+# keypad has to see the pin low on one scan and high on another to count a pulse,
+# so this limits how fast it can count: at 1 ms, a few hundred Hz. (keypad's default is 20 ms!)
+KEYPAD_SCAN_INTERVAL = 0.001
+
+
+def ticks_diff(a, b):
+    """a - b, for supervisor.ticks_ms() values, allowing for the wrap-around."""
+    return ((a - b + TICKS_PERIOD // 2) % TICKS_PERIOD) - TICKS_PERIOD // 2
+
+
+class PulseWindows():
+    """A small fixed-size queue of finished counting windows, from the counting task to whoever wants them.
+    If nobody takes them, the oldest get dropped (and counted in 'dropped')."""
+
+    def __init__(self, size=16):
+        self._size = size
+        self._end_ticks = [0] * size
+        self._counts = [0] * size
+        self._rates = array.array('f', [0] * size)
+        self._head = 0
+        self._length = 0
+        self._ready = asyncio.Event()
+        self.last_end_ticks = 0
+        self.put_total = 0   # pulses in all the windows ever put
+        self.taken_total = 0 # pulses in all the windows ever taken
+        self.dropped = 0     # windows
+
+    def __len__(self):
+        return self._length
+
+    def put(self, end_ticks, count, rate):
+        """A window that ended at end_ticks, with count pulses; rate is our best guess at pulses per second."""
+        if self._length == self._size:
+            self._head = (self._head + 1) % self._size
+            self._length -= 1
+            self.dropped += 1
+        i = (self._head + self._length) % self._size
+        self._end_ticks[i] = end_ticks
+        self._counts[i] = count
+        self._rates[i] = rate
+        self._length += 1
+        self.last_end_ticks = end_ticks
+        self.put_total += count
+        self._ready.set()
+
+    async def get(self):
+        """Wait for the oldest window and return its (end ticks_ms, count, pulses per second)."""
+        while self._length == 0:
+            self._ready.clear()
+            await self._ready.wait()
+        i = self._head
+        self._head = (self._head + 1) % self._size
+        self._length -= 1
+        self.taken_total += self._counts[i]
+        return self._end_ticks[i], self._counts[i], self._rates[i]
+
+
+class PeriodEstimator():
+    """Pulse rate from the times between pulses. Keeps the time of each of the last 'size' edges -
+    or batches of edges, from a counter that only knows how many came since it last looked -
+    with a running total, so the rate is just (edges between the oldest and newest) / (time between)."""
+
+    def __init__(self, size=PERIOD_EDGES):
+        self._size = size
+        self._ticks = array.array('L', [0] * size)
+        self._totals = array.array('L', [0] * size)
+        self._next = 0
+        self._length = 0
+        self._total = 0
+
+    def add(self, ticks, n=1):
+        """n edges, the last of them at ticks (ticks_ms)."""
+        self._total = (self._total + n) & 0xFFFFFFFF
+        i = self._next
+        self._ticks[i] = ticks
+        self._totals[i] = self._total
+        self._next = (i + 1) % self._size
+        if self._length < self._size:
+            self._length += 1
+
+    def clear(self):
+        self._length = 0
+
+    def rate(self, now_ticks, span_ms=PERIOD_SPAN_MS):
+        """Pulses per second, from the edges in the span_ms up to now_ticks; 0 if there aren't two."""
+        newest = oldest = -1
+        newest_age = 0
+        for k in range(self._length):
+            i = (self._next - 1 - k) % self._size
+            age = ticks_diff(now_ticks, self._ticks[i])
+            if age < 0:
+                continue
+            if age > span_ms:
+                break
+            if newest < 0:
+                newest = i
+                newest_age = age
+            oldest = i
+        if newest == oldest:
+            return 0.0
+        period_ms = ticks_diff(self._ticks[newest], self._ticks[oldest])
+        if period_ms <= 0:
+            return 0.0
+        rate = ((self._totals[newest] - self._totals[oldest]) & 0xFFFFFFFF) * 1000 / period_ms
+
+        # If the wind's dropped, the next pulse is later than that rate says - at least as late as now.
+        if newest_age * rate > 1000:
+            rate = 1000 / newest_age
+        return rate
+
+
+class GustTracker():
+    """Peak gust - the most pulses in any span_buckets in a row - since the last reset().
+    Keeps the last span_buckets counts in a ring and a running sum of them, so each new bucket
+    is O(1): add the new count, subtract the one falling out of the span, compare."""
+
+    def __init__(self, bucket_ms=GUST_BUCKET_MS, gust_seconds=GUST_SECONDS):
+        self.span_buckets = max(1, int(gust_seconds * 1000) // bucket_ms)
+        self.seconds = self.span_buckets * bucket_ms / 1000 # the gust span we actually have
+        self._counts = array.array('H', [0] * self.span_buckets)
+        self._next = 0
+        self._sum = 0
+        self._filled = 0
+        self.peak = -1 # pulses in the span; -1 till we've had a whole span since starting
+
+    def add(self, count):
+        """One more bucket's count."""
+        i = self._next
+        self._sum += count - self._counts[i]
+        self._counts[i] = count
+        self._next = (i + 1) % self.span_buckets
+        if self._filled < self.span_buckets:
+            self._filled += 1
+            if self._filled < self.span_buckets:
+                return
+        if self._sum > self.peak:
+            self.peak = self._sum
+
+    def reset(self):
+        """Start a new reporting interval. The ring carries on, so the first span of the next
+        interval can include buckets from the end of this one - a gust isn't cut in half."""
+        self.peak = -1
+
+
+class KeypadCounter():
+    """Counts pulses with keypad, which scans the pin in the background and queues a timestamped
+    event for each edge. poll() sorts the pulses into buckets by their timestamps, so every pulse
+    lands in the bucket it happened in, however late we look - as long as we look before keypad's
+    queue fills up."""
+
+    SETTLE_MS = WINDOW_SETTLE_MS
+    N_BUCKETS = 8 # buckets we can hold pulses for, counting the one we're in
+
+    def __init__(self, input_pin, neopixel=None, color=LED_OFF):
+        self._keys = keypad.Keys((input_pin,), value_when_pressed=False,
+                                 interval=KEYPAD_SCAN_INTERVAL, max_events=KEYPAD_MAX_EVENTS)
+        self._event = keypad.Event()
+        self._neopixel = neopixel
+        self._color = color
+        self._buckets = array.array('L', [0] * self.N_BUCKETS)
+        self._bucket_ms = 1000
+        self._origin = 0 # ticks_ms when the next bucket to take starts
+        self._first = 0  # its index in _buckets
+        self.edges = PeriodEstimator()
+        self.late = 0      # pulses that came after their bucket was taken; counted in the next one
+        self.overflows = 0 # times keypad's queue filled up, and we lost pulses
+
+    def start(self, bucket_ms, origin_ticks):
+        """Throw away what's been counted; buckets are bucket_ms long, starting at origin_ticks."""
+        self._keys.events.clear()
+        for i in range(self.N_BUCKETS):
+            self._buckets[i] = 0
+        self._bucket_ms = bucket_ms
+        self._origin = origin_ticks
+        self._first = 0
+
+    def poll(self):
+        """Empty keypad's queue into the buckets."""
+        events = self._keys.events
+        event = self._event
+        while events.get_into(event):
+            if event.pressed:
+                index = ticks_diff(event.timestamp, self._origin) // self._bucket_ms
+                if index < 0:
+                    self.late += 1
+                    index = 0
+                elif index >= self.N_BUCKETS:
+                    index = self.N_BUCKETS - 1
+                self._buckets[(self._first + index) % self.N_BUCKETS] += 1
+                self.edges.add(event.timestamp)
+                if self._neopixel is not None:
+                    self._neopixel.fill(self._color)
+            elif self._neopixel is not None:
+                self._neopixel.fill(LED_OFF)
+
+        if events.overflowed:
+            print("*** KeypadCounter: keypad event queue overflowed; pulses lost!")
+            self.overflows += 1
+            events.overflowed = False
+
+    def take(self):
+        """The pulses in the next bucket, which should have ended at least SETTLE_MS ago."""
+        self.poll()
+        count = self._buckets[self._first]
+        self._buckets[self._first] = 0
+        self._first = (self._first + 1) % self.N_BUCKETS
+        self._origin = (self._origin + self._bucket_ms) % TICKS_PERIOD
+        return count
+
+    def deinit(self):
+        self._keys.deinit()
+
+
+class CountioCounter():
+    """Counts pulses with countio: the hardware counts falling edges all the time, whatever the code's
+    doing, and reading it is one attribute. There are no timestamps, so a pulse goes in whichever
+    bucket's being counted when we read - a late take() moves a few pulses to the next bucket,
+    but never loses any. We never reset the count, so there's no gap between reading and resetting.
+    For the edge times, poll() notes the time whenever the count's gone up, so they're only as good
+    as how often we poll."""
+
+    SETTLE_MS = 0
+
+    def __init__(self, input_pin):
+        self._counter = countio.Counter(input_pin, edge=countio.Edge.FALL, pull=digitalio.Pull.UP)
+        self._polled = self._counter.count
+        self._last = self._polled
+        self.edges = PeriodEstimator()
+
+    def start(self, bucket_ms, origin_ticks):
+        self.poll()
+        self._last = self._polled
+
+    def poll(self):
+        count = self._counter.count
+        if count != self._polled:
+            self.edges.add(supervisor.ticks_ms(), count - self._polled)
+            self._polled = count
+
+    def take(self):
+        self.poll()
+        pulses = self._polled - self._last
+        self._last = self._polled
+        return pulses
+
+    def deinit(self):
+        self._counter.deinit()
+
+
+def make_counter(input_pin, neopixel=None, color=LED_OFF, backend=None):
+    """The best pulse counter we can have on this pin; see COUNTER_BACKEND."""
+
+    backend = backend or COUNTER_BACKEND
+    if backend == "countio":
+        if countio is None:
+            print("make_counter: no countio; using keypad")
+        else:
+            try:
+                return CountioCounter(input_pin)
+            except (ValueError, RuntimeError) as e:
+                # On the RP2040, countio needs a pin on a PWM 'B' channel.
+                print(f"make_counter: countio can't count on {input_pin} ({e}); using keypad")
+    return KeypadCounter(input_pin, neopixel, color)
+
 
 class Anemom:
-    """Run the anemometer. Get 1-second sample count. Flash LED while collecting."""
+    """Run the anemometer. Pulses are counted all the time, by a counter from make_counter() - countio
+    if the pin can, otherwise keypad, which also blips the LED on each pulse - so none are missed.
+    count_windows() is an asyncio task that takes the count every GUST_BUCKET_MS, feeding the buckets
+    to self.gusts and putting each finished window's count and rate into a PulseWindows queue,
+    self.windows, for the packet task to take. get_raw() is the blocking way: one window, counted there and then."""
 
-    def __init__(self, input_pin, send_color, debug=False, neopixel=None):
-        """Debug flag will emit a bit of verbiage. Neopixel will blip on every count."""
+    def __init__(self, input_pin, send_color, debug=False, neopixel=None, counter=None):
+        """Debug flag will emit a bit of verbiage. Neopixel will blip on every count (with keypad counting).
+        'counter' is a pulse counter to use instead of make_counter()'s."""
 
         self._input_pin = input_pin
         self._send_color = send_color
         self._debug = debug
         self._neopixel = neopixel
-        self._count = 0
+        self.counter = counter if counter is not None else make_counter(input_pin, neopixel, send_color)
+        self.windows = None # made by start_windows()
+        self.gusts = GustTracker()
+        self._buckets_per_window = 1
+        self._bucket_end = 0
+        self._window_count = 0
+        self._n_buckets = 0
 
-        print(f"Creating anemom class. {COUNT_TO_MPH=}") if self._debug else True
-
-        # we don't need to - and can't - do this, because keypad.Keys does it for us.
-        #
-        # input = digitalio.DigitalInOut(input_pin)
-        # input.direction = digitalio.Direction.INPUT
+        print(f"Creating anemom class. {type(self.counter).__name__}") if self._debug else True
 
 
     def get_raw(self, sample_time_seconds):
-        """Let's try this the naive way - why not? Return raw count of anemomter."""
+        """Count for sample_time_seconds, and return the raw count. The counter runs all the time,
+        so this just reads it at the start and the end."""
 
-        end_ticks = time.monotonic_ns() + sample_time_seconds * 1000000000
         print(f" get_raw: {sample_time_seconds=}") if self._debug else True
-        # print(f" start: {time.monotonic_ns()=}, end: {end_ticks=}") if self._debug else True
-
-        # Doens't need to be a class/instance var
-        count = 0
-
-        with keypad.Keys((self._input_pin,), value_when_pressed=False) as keys:
-            while True:
-                event = keys.events.get()
-                if event:
-                    if event.pressed:
-                        count += 1
-                        # print(f" pin went low: {count=}") if self._debug else True
-                        if self._neopixel is not None:
-                            self._neopixel.fill(self._send_color)
-
-                    elif event.released:
-                        # print(" pin went high") if self._debug else True
-                        if self._neopixel is not None:
-                            self._neopixel.fill(LED_OFF)
-
-                if time.monotonic_ns() > end_ticks:
-                    # print(" catch_pin_transitions done!")
-                    print(f" catch_pin_transitions: {count=}") if self._debug else True
-                    return count
-    
-                time.sleep(0.01) # for why? lessen CPU usage?
+
+        sample_ms = int(sample_time_seconds * 1000)
+        counter = self.counter
+        start = supervisor.ticks_ms()
+        counter.start(sample_ms, start)
+        while ticks_diff(supervisor.ticks_ms(), start) < sample_ms + counter.SETTLE_MS:
+            counter.poll()
+            time.sleep(POLL_SECONDS)
+        count = counter.take()
+
+        print(f" get_raw: {count=}") if self._debug else True
+        return count
+
+
+    def start_windows(self, window_seconds, windows=None):
+        """Start counting into window_seconds-long windows, from now. Each is a whole number of
+        GUST_BUCKET_MS buckets, which also go into self.gusts."""
+        window_ms = int(window_seconds * 1000)
+        if window_ms % GUST_BUCKET_MS:
+            raise ValueError(f"counting window {window_ms} ms isn't a multiple of {GUST_BUCKET_MS} ms")
+        self.windows = windows if windows is not None else PulseWindows()
+        self._buckets_per_window = window_ms // GUST_BUCKET_MS
+        self._window_count = 0
+        self._n_buckets = 0
+        now = supervisor.ticks_ms()
+        self._bucket_end = (now + GUST_BUCKET_MS) % TICKS_PERIOD
+        self.counter.start(GUST_BUCKET_MS, now)
+
+    def poll_windows(self, now_ticks):
+        """Keep up with the counter, and take every bucket that's over; put each window that's done into self.windows."""
+        counter = self.counter
+        counter.poll()
+        while ticks_diff(now_ticks, self._bucket_end) >= counter.SETTLE_MS:
+            count = counter.take()
+            self.gusts.add(count)
+            self._window_count += count
+            self._n_buckets += 1
+            if self._n_buckets == self._buckets_per_window:
+                self.windows.put(self._bucket_end, self._window_count, self._window_rate(now_ticks))
+                self._window_count = 0
+                self._n_buckets = 0
+            self._bucket_end = (self._bucket_end + GUST_BUCKET_MS) % TICKS_PERIOD
+
+    def _window_rate(self, now_ticks):
+        """Pulses per second over the window just done: from the count, unless that's too few
+        to mean much, then from the times between the last few pulses."""
+        window_seconds = self._buckets_per_window * GUST_BUCKET_MS / 1000
+        if self._window_count >= PERIOD_MODE_BELOW_HZ * window_seconds:
+            return self._window_count / window_seconds
+        return self.counter.edges.rate(now_ticks)
+
+    async def count_windows(self, window_seconds, windows=None):
+        """Count pulses forever - an asyncio task - putting each window_seconds' count into self.windows.
+        The counter never stops, so nothing is missed while the rest of the code reads sensors or sends."""
+
+        self.start_windows(window_seconds, windows)
+        while True:
+            self.poll_windows(supervisor.ticks_ms())
+            await asyncio.sleep(POLL_SECONDS)
 
 
     # ########################################################
@@ -121,7 +457,7 @@ class Anemom:
     # def get_mph(self, sample_time):
     #     """This is the useful thing."""
     #     count = self.collect_count(sample_time)
-    #     return count * COUNT_TO_MPH / sample_time
+    #     return calibration.load().mph(count / sample_time)
 
     # ########################################################
     # # End of doomed code.
@@ -0,0 +1,174 @@
+"""
+    Pi-WX-Station
+    A round-robin archive of the weather, for the receiver: daily highs and lows, peak wind, and so on.
+
+    Like RRDtool: each tier is a ring of fixed-length buckets - by default a minute for two hours,
+    ten minutes for two days, and an hour for two weeks - and every reading goes into the open
+    bucket of every tier, which keeps the min, max and running sum. When a bucket's time is up
+    its min, max and mean are written into the ring, as tenths in 16-bit arrays, over whatever was
+    in that slot a lap ago. So it all takes the same memory however long we've been up.
+
+    Each slot also remembers which bucket it holds, so slots nothing was written to (when no
+    packets came) are just skipped, without having to clear them.
+
+    There's no clock to say when midnight is, so "daily" means the last 24 hours - back from the
+    time we're asked, not from the last packet, so a dead link doesn't hold the day open.
+
+    (c)2025 rob cranfill
+    See https://github.com/RobCranfill/pi-wx-station
+"""
+
+import array
+
+import piwx_constants
+
+FIELDS = (piwx_constants.DICT_KEY_TEMPERATURE, piwx_constants.DICT_KEY_WIND, piwx_constants.DICT_KEY_GUST)
+
+# (bucket seconds, buckets): a minute for 2 hours, ten minutes for 2 days, an hour for 2 weeks.
+TIERS = ((60, 120), (600, 288), (3600, 336))
+
+SCALE = 10         # values are kept as round(value * SCALE)
+NO_DATA = -32768   # as a bucket's min
+
+
+class Tier():
+    """One resolution: 'size' buckets of 'seconds', for n_fields fields."""
+
+    def __init__(self, seconds, size, n_fields):
+        self.seconds = seconds
+        self.size = size
+        self._n_fields = n_fields
+        self._ids = array.array('i', [-1] * size)
+        self._min = array.array('h', [NO_DATA] * (size * n_fields))
+        self._max = array.array('h', [0] * (size * n_fields))
+        self._mean = array.array('h', [0] * (size * n_fields))
+
+        # The open bucket.
+        self.bucket_id = None
+        self._acc_min = [0.0] * n_fields
+        self._acc_max = [0.0] * n_fields
+        self._acc_sum = [0.0] * n_fields
+        self._acc_n = [0] * n_fields
+
+    def add(self, now, values):
+        """values: one per field, None for a field the packet didn't have."""
+        bucket_id = int(now // self.seconds)
+        if bucket_id != self.bucket_id:
+            self._close()
+            self.bucket_id = bucket_id
+        for f in range(self._n_fields):
+            value = values[f]
+            if value is None:
+                continue
+            if self._acc_n[f] == 0:
+                self._acc_min[f] = self._acc_max[f] = value
+                self._acc_sum[f] = 0.0
+            elif value < self._acc_min[f]:
+                self._acc_min[f] = value
+            elif value > self._acc_max[f]:
+                self._acc_max[f] = value
+            self._acc_sum[f] += value
+            self._acc_n[f] += 1
+
+    def _close(self):
+        if self.bucket_id is None:
+            return
+        slot = self.bucket_id % self.size
+        self._ids[slot] = self.bucket_id
+        base = slot * self._n_fields
+        for f in range(self._n_fields):
+            n = self._acc_n[f]
+            if n == 0:
+                self._min[base + f] = NO_DATA
+                continue
+            self._min[base + f] = round(self._acc_min[f] * SCALE)
+            self._max[base + f] = round(self._acc_max[f] * SCALE)
+            self._mean[base + f] = round(self._acc_sum[f] / n * SCALE)
+            self._acc_n[f] = 0
+
+    def oldest_id(self):
+        """The oldest bucket we can still have."""
+        return self.bucket_id - self.size + 1
+
+    def bucket(self, bucket_id, f):
+        """(min, max, mean) of field number f in that bucket, or None if we don't have it."""
+        if bucket_id == self.bucket_id:
+            if self._acc_n[f] == 0:
+                return None
+            return self._acc_min[f], self._acc_max[f], self._acc_sum[f] / self._acc_n[f]
+        slot = bucket_id % self.size
+        i = slot * self._n_fields + f
+        if self._ids[slot] != bucket_id or self._min[i] == NO_DATA or bucket_id < self.oldest_id():
+            return None
+        return self._min[i] / SCALE, self._max[i] / SCALE, self._mean[i] / SCALE
+
+    def memory_bytes(self):
+        return sum(len(a) * a.itemsize for a in (self._ids, self._min, self._max, self._mean))
+
+
+class Archive():
+    """add() every packet; ask for summaries of any stretch of the last two weeks."""
+
+    def __init__(self, fields=FIELDS, tiers=TIERS):
+        self.fields = fields
+        self.tiers = tuple(Tier(seconds, size, len(fields)) for seconds, size in tiers)
+        self.last_time = None
+        self._values = [None] * len(fields)
+
+    def add(self, data_dict, now):
+        """A packet's values, at 'now' (seconds, time.monotonic()). Placeholders (strings) are skipped."""
+        for f in range(len(self.fields)):
+            value = data_dict.get(self.fields[f])
+            self._values[f] = None if isinstance(value, str) else value
+        for tier in self.tiers:
+            tier.add(now, self._values)
+        self.last_time = now
+
+    def tier_for(self, start):
+        """The finest tier that goes back to 'start', or the coarsest if none does."""
+        for tier in self.tiers:
+            if tier.bucket_id is not None and tier.oldest_id() * tier.seconds <= start:
+                return tier
+        return self.tiers[-1]
+
+    def query(self, field, start, end):
+        """(low, high, mean of the bucket means) of 'field' from 'start' to 'end', or None.
+        Goes through the buckets of the finest tier that reaches back that far."""
+        if self.last_time is None:
+            return None
+        f = self.fields.index(field)
+        tier = self.tier_for(start)
+        low = high = None
+        total = 0.0
+        n = 0
+        last_id = min(int(end // tier.seconds), tier.bucket_id) # there's nothing after the open bucket
+        for bucket_id in range(max(int(start // tier.seconds), tier.oldest_id()), last_id + 1):
+            bucket = tier.bucket(bucket_id, f)
+            if bucket is None:
+                continue
+            if low is None or bucket[0] < low:
+                low = bucket[0]
+            if high is None or bucket[1] > high:
+                high = bucket[1]
+            total += bucket[2]
+            n += 1
+        if n == 0:
+            return None
+        return low, high, total / n
+
+    def last_24h(self, field, now):
+        """(low, high, mean) over the 24 hours up to 'now' (the same clock as add()'s) - our 'daily'."""
+        return self.query(field, now - 24 * 3600, now)
+
+    def summary_text(self, now):
+        """E.g. '24h: 54-71F, peak wind 32' - for the status line - as of 'now'."""
+        temperature = self.last_24h(piwx_constants.DICT_KEY_TEMPERATURE, now)
+        gust = (self.last_24h(piwx_constants.DICT_KEY_GUST, now)
+                or self.last_24h(piwx_constants.DICT_KEY_WIND, now))
+        text = "24h:"
+        text += f" {temperature[0]:0.0f}-{temperature[1]:0.0f}F" if temperature else " no temperature"
+        text += f", peak wind {gust[1]:0.0f}" if gust else ", no wind"
+        return text
+
+    def memory_bytes(self):
+        return sum(tier.memory_bytes() for tier in self.tiers)
@@ -0,0 +1,119 @@
+"""
+    Pi-WX-Station
+    Backlight control for the receiver's display. The light sensor is read on its own schedule -
+    not every time something wants the brightness - and its readings smoothed (an exponentially
+    weighted moving average), so a passing cloud or someone walking by doesn't make the display
+    jump. The brightness only moves when the smoothed light says it should be at least
+    HYSTERESIS_PERCENT different, and then ramps there a step at a time, from update(),
+    rather than jumping, or blocking while it fades.
+
+    (c)2025 rob cranfill
+    See https://github.com/RobCranfill/pi-wx-station
+"""
+import math
+
+# 1000 lux, "indoors near the windows on a clear day", gets full LED value.
+# 1000 seems high, try 100.
+LUX_FULL_BRIGHTNESS = 100
+
+# Never dimmer than this, percent. (ad hoc floor)
+MIN_BRIGHTNESS_PERCENT = 20
+
+# Read the light sensor this often, seconds; smooth the readings over about this long.
+LUX_SAMPLE_SECONDS = 5
+LUX_SMOOTHING_SECONDS = 20
+
+# Don't change the brightness for less than this, percent - except to get to the floor, or full.
+HYSTERESIS_PERCENT = 6
+
+# Ramp to a new brightness this fast (percent per second), a step every RAMP_STEP_SECONDS.
+RAMP_PERCENT_PER_SECOND = 20
+RAMP_STEP_SECONDS = 0.05
+
+
+def lux_to_percent(lux):
+    """The brightness for this much light."""
+    return max(MIN_BRIGHTNESS_PERCENT, int(100 * min(lux / LUX_FULL_BRIGHTNESS, 1)))
+
+
+class BacklightController():
+    """Drives set_backlight(percent) from the light sensor - or at full brightness, if there isn't one."""
+
+    def __init__(self, light_sensor, set_backlight):
+        self._sensor = light_sensor
+        self._set_backlight = set_backlight
+        self.lux = None       # smoothed
+        self.raw_lux = None   # the last reading
+        self.target = 100     # percent
+        self.level = None     # where the ramp's got to, percent
+        self.percent = None   # what we last set
+        self._next_sample = None
+        self._last_sample = None
+        self._last_update = None
+
+        self.reads = 0
+        self.read_failures = 0
+        self.writes = 0
+
+    def update(self, now):
+        """Read the sensor if it's time, take a step towards the brightness we want, and return the brightness."""
+        if self._sensor is not None and (self._next_sample is None or now >= self._next_sample):
+            self._sample(now)
+        self._ramp(now)
+        return self.percent
+
+    def next_update(self, now):
+        """When update() next has something to do."""
+        next_time = now + LUX_SAMPLE_SECONDS if self._next_sample is None else self._next_sample
+        if self.level != self.target:
+            next_time = min(next_time, now + RAMP_STEP_SECONDS)
+        return next_time
+
+    def _sample(self, now):
+        # Keep to the beat; but if we've fallen a whole period behind, start again from now.
+        self._next_sample = now if self._next_sample is None else self._next_sample
+        self._next_sample += LUX_SAMPLE_SECONDS
+        if self._next_sample <= now:
+            self._next_sample = now + LUX_SAMPLE_SECONDS
+
+        try:
+            lux = self._sensor.lux
+        except OSError as e:
+            self.read_failures += 1
+            print(f"*** Light sensor read failed: {e}")
+            return
+        self.reads += 1
+        self.raw_lux = lux
+
+        if self.lux is None:
+            self.lux = lux
+        else:
+            # Readings don't always come evenly; weight this one by how long since the last.
+            alpha = 1 - math.exp(-(now - self._last_sample) / LUX_SMOOTHING_SECONDS)
+            self.lux += alpha * (lux - self.lux)
+        self._last_sample = now
+
+        wanted = lux_to_percent(self.lux)
+        if wanted != self.target and (abs(wanted - self.target) >= HYSTERESIS_PERCENT
+                                      or wanted in (MIN_BRIGHTNESS_PERCENT, 100)):
+            print(f" Brightness: lux {self.lux:.0f} -> {wanted}%")
+            if self.level == self.target: # the ramp starts now, not at the last update
+                self._last_update = now
+            self.target = wanted
+
+    def _ramp(self, now):
+        if self.level is None: # the first time, just go there
+            self.level = self.target
+        elif self.level != self.target:
+            step = RAMP_PERCENT_PER_SECOND * (now - self._last_update)
+            if abs(self.target - self.level) <= step:
+                self.level = self.target
+            else:
+                self.level += step if self.target > self.level else -step
+        self._last_update = now
+
+        percent = round(self.level)
+        if percent != self.percent:
+            self._set_backlight(percent)
+            self.percent = percent
+            self.writes += 1
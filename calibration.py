@@ -0,0 +1,110 @@
+"""
+    Pi-WX-Station
+    Anemometer calibration: pulses per second -> MPH.
+
+    Cup anemometers aren't linear near their start-up speed - it takes some wind to get them turning
+    at all - so the calibration is a piecewise-linear curve through (pulses per second, MPH) points.
+    It comes from ANEMOMETER_CALIBRATION in settings.toml, or else from CALIBRATION_FILE, or else is
+    the anemometer's nominal 0.2 MPH per pulse per second. Either way it's written as pairs, e.g.
+        ANEMOMETER_CALIBRATION = "0:0, 0.5:1.1, 2:1.6, 100:20.3"
+    and past the last point the last segment carries on. tools/fit_calibration.py makes one from
+    readings taken next to a reference anemometer.
+
+    At startup the curve is compiled into a table of hundredths of MPH, STEPS_PER_HZ entries per
+    pulse per second, so converting a reading is a table lookup rather than a search and interpolation.
+
+    (c)2025 rob cranfill
+    See https://github.com/RobCranfill/pi-wx-station
+"""
+
+import array
+import os
+
+CALIBRATION_SETTING = "ANEMOMETER_CALIBRATION"
+CALIBRATION_FILE = "anemometer_calibration.txt"
+
+# The nominal figure: 0.0875 m/s per pulse per second, which is 0.196 MPH - or close enough, 0.2.
+# (anemom.py used to say 2.0; that was a guess, and nothing used it.)
+DEFAULT_POINTS = ((0, 0.0), (1, 0.2))
+
+# The table: this many steps per pulse per second, up to MAX_HZ; 2048 entries, 4K bytes.
+# Readings between steps are rounded to the nearest one - at most 1/16 Hz off, about 0.0125 MPH.
+# A curve steep enough to pass 655.35 MPH (0xFFFF hundredths) before MAX_HZ gets a shorter table.
+STEPS_PER_HZ = 8
+MAX_HZ = 256
+
+
+def parse_points(text):
+    """'hz:mph, hz:mph, ...' - or one 'hz mph' pair per line, with # comments - into [(hz, mph)]."""
+    points = []
+    for line in text.split("\n"):
+        for pair in line.split("#")[0].split(","):
+            pair = pair.strip()
+            if pair:
+                hz, mph = pair.replace(":", " ").split()
+                points.append((float(hz), float(mph)))
+    return points
+
+
+def read_points(setting=CALIBRATION_SETTING, path=CALIBRATION_FILE):
+    """The calibration curve's points, from settings.toml or the file; None if there's neither."""
+    text = os.getenv(setting)
+    if text is None:
+        try:
+            with open(path) as f:
+                text = f.read()
+        except OSError:
+            return None
+    return parse_points(text)
+
+
+class Calibration():
+    """The calibration curve, compiled into a table. mph(rate) converts."""
+
+    def __init__(self, points, steps_per_hz=STEPS_PER_HZ, max_hz=MAX_HZ):
+        if len(points) < 2:
+            raise ValueError("a calibration curve needs at least two points")
+        for i in range(1, len(points)):
+            if points[i][0] <= points[i - 1][0]:
+                raise ValueError(f"calibration points must go up in pulses per second: {points[i - 1]}, {points[i]}")
+        if points[0][0] > 0:
+            raise ValueError(f"the calibration curve must start at 0 pulses per second, not {points[0][0]}")
+
+        self.points = tuple(points)
+        self._steps_per_hz = steps_per_hz
+        entries = []
+        for i in range(steps_per_hz * max_hz + 1):
+            hundredths = round(max(0, self.exact_mph(i / steps_per_hz)) * 100)
+            if hundredths > 0xFFFF:
+                break
+            entries.append(hundredths)
+        self._table = array.array('H', entries)
+
+    def exact_mph(self, rate):
+        """The curve itself, interpolated in floating point. For building the table, and checking it."""
+        points = self.points
+        for i in range(1, len(points) - 1):
+            if rate < points[i][0]:
+                break
+        else:
+            i = len(points) - 1
+        (hz0, mph0), (hz1, mph1) = points[i - 1], points[i]
+        return mph0 + (rate - hz0) * (mph1 - mph0) / (hz1 - hz0)
+
+    def mph(self, rate):
+        """MPH for a rate in pulses per second. Below 0 - which shouldn't happen - is 0."""
+        i = max(0, int(rate * self._steps_per_hz + 0.5))
+        if i < len(self._table):
+            return self._table[i] / 100
+        return self.exact_mph(rate)  # past the table - hardly ever
+
+
+def load():
+    """The calibration to use: the one configured, or the default if there isn't one or it's no good."""
+    try:
+        points = read_points()
+        if points is not None:
+            return Calibration(points)
+    except (ValueError, OverflowError) as e:
+        print(f"*** Bad anemometer calibration ({e}); using the default")
+    return Calibration(DEFAULT_POINTS)
@@ -8,7 +8,8 @@ print(f"NOTICE: {supervisor.runtime.autoreload=}")
 print()
 
 ################ the real deal
-import rcv
+import piwx_rx
+piwx_rx.main_entry()
 
 
 ################ Testinng zone
@@ -6,7 +6,8 @@ import supervisor
 supervisor.runtime.autoreload = False
 print(f"NOTICE: {supervisor.runtime.autoreload=}\n")
 
-import send
+import piwx_tx
+piwx_tx.main()
 
 # import gc_test_2
 # print("done!")
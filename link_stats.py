@@ -0,0 +1,170 @@
+"""
+    Pi-WX-Station
+    Link statistics for the receiver, from the sequence numbers the transmitter puts on every packet.
+
+    Counts packets received, lost, duplicated and out of order; packet error rate over a few
+    sliding windows; and the mean and jitter of the time between packets - which is what
+    we should be tuning SEND_DELAY and LISTEN_TIMEOUT against.
+
+    (c)2025 rob cranfill
+    See https://github.com/RobCranfill/pi-wx-station
+"""
+
+import piwx_packet
+
+SEQUENCE_MODULUS = piwx_packet.SEQUENCE_MODULUS
+
+# Packet error rate over the last this-many packets sent.
+# The biggest is also how far back we remember, and must be a power of two, so the ring lines up with the sequence numbers.
+PER_WINDOWS = (16, 128, 1024)
+
+# This many old packets in a row means the transmitter restarted, not that the radio is playing tricks.
+RESTART_AFTER = 3
+
+# Smoothing for the interval and jitter averages; 1/16 is what RTP (RFC 3550) uses for jitter.
+INTERVAL_GAIN = 1 / 16
+
+# What we remember about each packet, in a ring indexed by sequence number.
+_UNKNOWN  = 0
+_ARRIVED  = 1
+_LOST     = 2
+
+
+class LinkStats():
+    """Feed it the sequence number and arrival time of every good packet."""
+
+    def __init__(self, per_windows=PER_WINDOWS):
+        self._windows = per_windows
+        self._ring_len = max(per_windows)
+        self._outcomes = bytearray(self._ring_len)
+        self._lost_in_window = [0] * len(per_windows)
+        self.reset()
+
+    def reset(self):
+        """Forget everything."""
+
+        self.received = 0
+        self.lost = 0
+        self.duplicates = 0
+        self.out_of_order = 0
+        self.restarts = 0
+        self.mean_interval = None # seconds between packets, smoothed
+        self.jitter = 0.0         # mean deviation from that, seconds
+        self._reset_sequence()
+
+    def _reset_sequence(self):
+        """Forget where the sequence numbers were, but keep the totals - for when the transmitter restarts."""
+
+        self._highest = None      # newest sequence number seen
+        self._highest_time = 0.0
+        self._tracked = 0         # how many slots of the ring hold real outcomes
+        self._stale_run = 0       # old packets in a row
+        for i in range(self._ring_len):
+            self._outcomes[i] = _UNKNOWN
+        for i in range(len(self._windows)):
+            self._lost_in_window[i] = 0
+
+    def _advance(self, sequence, outcome):
+        """Record the outcome for the next sequence number, sliding all the windows along by one."""
+
+        ring_len = self._ring_len
+        for i in range(len(self._windows)):
+            if self._outcomes[(sequence - self._windows[i]) % ring_len] == _LOST:
+                self._lost_in_window[i] -= 1
+            if outcome == _LOST:
+                self._lost_in_window[i] += 1
+        self._outcomes[sequence % ring_len] = outcome
+        if self._tracked < ring_len:
+            self._tracked += 1
+
+    def packet_received(self, sequence, now):
+        """Count one packet, arriving at time 'now' (seconds, say time.monotonic())."""
+
+        if self._highest is None:
+            self._start(sequence, now)
+            return
+
+        ahead = (sequence - self._highest) % SEQUENCE_MODULUS
+
+        if ahead == 0 or ahead >= SEQUENCE_MODULUS // 2:
+            self._stale_run += 1
+            if self._stale_run >= RESTART_AFTER:
+                self._restart(sequence, now)
+            elif ahead == 0:
+                self.duplicates += 1
+            else:
+                self._late(SEQUENCE_MODULUS - ahead, sequence)
+            return
+
+        self._stale_run = 0
+        if ahead > self._ring_len:
+            # Too big a jump to be loss we could track; most likely the transmitter restarted.
+            self._restart(sequence, now)
+            return
+
+        # The usual case: the next packet, maybe after a few we didn't get (yet).
+        for skipped in range(self._highest + 1, self._highest + ahead):
+            self._advance(skipped, _LOST)
+        self._advance(sequence, _ARRIVED)
+        self.lost += ahead - 1
+        self.received += 1
+
+        # Time per sequence step, so a lost packet doesn't look like a long interval.
+        interval = (now - self._highest_time) / ahead
+        if self.mean_interval is None:
+            self.mean_interval = interval
+        else:
+            self.mean_interval += (interval - self.mean_interval) * INTERVAL_GAIN
+            self.jitter += (abs(interval - self.mean_interval) - self.jitter) * INTERVAL_GAIN
+        self._highest = sequence % SEQUENCE_MODULUS
+        self._highest_time = now
+
+    def _late(self, behind, sequence):
+        """A packet older than the newest one: a duplicate, or one that got here late."""
+
+        if behind >= self._tracked:
+            # From before we started (or too long ago to remember); we never counted it lost.
+            self.out_of_order += 1
+            self.received += 1
+            return
+
+        slot = sequence % self._ring_len
+        if self._outcomes[slot] == _ARRIVED:
+            self.duplicates += 1
+            return
+
+        # Late, not lost after all; take it back out of every window it's still in.
+        self.out_of_order += 1
+        self.received += 1
+        self.lost -= 1
+        self._outcomes[slot] = _ARRIVED
+        for i in range(len(self._windows)):
+            if behind < self._windows[i]:
+                self._lost_in_window[i] -= 1
+
+    def _start(self, sequence, now):
+        self._highest = sequence % SEQUENCE_MODULUS
+        self._highest_time = now
+        self._advance(sequence, _ARRIVED)
+        self.received += 1
+
+    def _restart(self, sequence, now):
+        # The old packets in the run that told us so got counted as duplicates or late; close enough.
+        self.restarts += 1
+        self._reset_sequence()
+        self._start(sequence, now)
+
+    def packet_error_rate(self, window_index=0):
+        """Fraction of the last PER_WINDOWS[window_index] packets sent that we didn't get."""
+        n = min(self._windows[window_index], self._tracked)
+        return self._lost_in_window[window_index] / n if n else 0.0
+
+    def status_text(self):
+        """One line for the display's status area, which only has room for 51 characters, e.g.
+            'RX 1945 L54 D0 O0 PER 6/3% 3.1s+/-0.05'
+        - received, lost, duplicates, out of order; PER over the shortest and longest windows; interval and jitter."""
+        text = (f"RX {self.received} L{self.lost} D{self.duplicates} O{self.out_of_order} "
+                f"PER {self.packet_error_rate(0) * 100:.0f}/{self.packet_error_rate(len(self._windows) - 1) * 100:.0f}%")
+        if self.mean_interval is not None:
+            text += f" {self.mean_interval:0.1f}s+/-{self.jitter:0.2f}"
+        return text
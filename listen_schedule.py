@@ -0,0 +1,106 @@
+"""
+    Pi-WX-Station
+    Listen windows for the receiver. Time-sync packets say when the transmitter built them
+    (its supervisor.ticks_ms()) and how long until it sends the next one, so rather than
+    keep the radio listening all the time, we can turn it on for a short window around then.
+
+    Our clock and the transmitter's don't run at quite the same rate, so we learn the ratio from
+    the ticks in packets over a long stretch, and how late packets tend to be against our guess.
+    A missed window gets wider, and we guess the next packet comes one interval later;
+    after MAX_MISSES in a row we give up on windows and listen all the time until we hear something.
+
+    (c)2025 rob cranfill
+    See https://github.com/RobCranfill/pi-wx-station
+"""
+
+# supervisor.ticks_ms() wraps around at this.
+TICKS_PERIOD = 1 << 29
+
+LISTEN_WINDOW_S = 0.1      # whole width, seconds
+MAX_LISTEN_WINDOW_S = 3.2  # widen (by doubling) up to this after misses
+MAX_MISSES = 4             # then just listen
+
+# The crystals are good to 50 ppm or so; anything further off than this is jitter or a restart.
+MAX_RATE_ERROR = 0.001
+
+# Measure the clock rate over at least this long (seconds), and start over after this long,
+# in case it drifts with temperature.
+MIN_RATE_BASELINE_S = 30
+MAX_RATE_BASELINE_S = 3600
+
+# Smoothing for how late packets come against the guess.
+LATENESS_GAIN = 1 / 4
+
+
+class ListenSchedule():
+    """Feed it every time-sync packet; ask it when to listen."""
+
+    def __init__(self, window_s=LISTEN_WINDOW_S, max_window_s=MAX_LISTEN_WINDOW_S, max_misses=MAX_MISSES):
+        self._window_s = window_s
+        self._max_window_s = max_window_s
+        self._max_misses = max_misses
+
+        self.rate = 1.0        # our seconds per transmitter second
+        self.lateness = 0.0    # how much after the guess packets arrive, smoothed
+        self.width = window_s
+        self.misses = 0
+        self.expected = None   # our time.monotonic() when the next packet should arrive, before lateness
+        self._interval = 0.0   # the last interval the transmitter announced, in its seconds
+
+        self._last_ticks = None
+        self._last_rx = 0.0
+        self._tx_time = 0.0    # transmitter seconds, unwrapped, since the rate baseline started
+        self._baseline_rx = 0.0
+        self._baseline_tx = 0.0
+
+    def packet_received(self, now, tx_ticks, next_send_ms):
+        """A time-sync packet arrived at 'now' (seconds, time.monotonic())."""
+
+        if self._last_ticks is None:
+            self._restart_baseline(now)
+        else:
+            tx_elapsed = ((tx_ticks - self._last_ticks) % TICKS_PERIOD) / 1000
+            rx_elapsed = now - self._last_rx
+            if abs(rx_elapsed - tx_elapsed) > 1 + rx_elapsed * MAX_RATE_ERROR:
+                # The transmitter restarted, or we were away so long its ticks wrapped; start learning again.
+                self._restart_baseline(now)
+            else:
+                self._tx_time += tx_elapsed
+                baseline = self._tx_time - self._baseline_tx
+                if baseline >= MIN_RATE_BASELINE_S:
+                    rate = (now - self._baseline_rx) / baseline
+                    self.rate = min(max(rate, 1 - MAX_RATE_ERROR), 1 + MAX_RATE_ERROR)
+                if baseline >= MAX_RATE_BASELINE_S:
+                    self._baseline_rx = now
+                    self._baseline_tx = self._tx_time
+
+        if self.expected is not None and self.misses == 0:
+            self.lateness += (now - self.expected - self.lateness) * LATENESS_GAIN
+
+        self._last_ticks = tx_ticks
+        self._last_rx = now
+        self._interval = next_send_ms / 1000
+        self.expected = now + self._interval * self.rate
+        self.misses = 0
+        self.width = self._window_s
+
+    def _restart_baseline(self, now):
+        self._tx_time = 0.0
+        self._baseline_rx = now
+        self._baseline_tx = 0.0
+        self.lateness = 0.0
+        self.expected = None
+
+    def window(self):
+        """(open, close) - when to listen for the next packet, in time.monotonic() seconds;
+        or None to listen all the time."""
+        if self.expected is None or self.misses >= self._max_misses:
+            return None
+        middle = self.expected + self.lateness
+        return middle - self.width / 2, middle + self.width / 2
+
+    def missed(self):
+        """The window closed with no packet. Guess the next one's an interval later, and widen."""
+        self.misses += 1
+        self.expected += self._interval * self.rate
+        self.width = min(self.width * 2, self._max_window_s)
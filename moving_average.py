@@ -1,29 +1,99 @@
 
-#TODO: initialize with None, only average non-None items!
-#      OR vary length of data array
+# Moving averages, O(1) per update whatever the length: a preallocated ring and a running sum.
+# The ring holds values as integer hundredths, so the running sum is exact - no drift from adding
+# and subtracting floats forever. Slots start as "no data" (as do None updates, for a missed reading),
+# and only the slots with data are averaged.
+#
+# Or, for readings that don't come evenly - missed packets, an adaptive send cadence - MODE_EWMA,
+# or MODE_TIME_WEIGHTED, where a reading after a long gap counts for more, since it's been that long
+# since we knew anything.
+
+import array
+import math
+import time
+
+MODE_WINDOW = 0        # the mean of the last n_datapoints readings
+MODE_EWMA = 1          # exponentially weighted, like a window of n_datapoints
+MODE_TIME_WEIGHTED = 2 # exponentially weighted by time: 'time_constant' seconds
+
+SCALE = 100 # the ring holds round(value * SCALE)
+NO_DATA = -0x3FFFFFFF # as a ring slot; still a small int on CircuitPython, so no allocation
 
 
 class moving_average():
     """Like it sez."""
-    def __init__(self, n_datapoints):
+    def __init__(self, n_datapoints, mode=MODE_WINDOW, time_constant=None):
+        """time_constant is for MODE_TIME_WEIGHTED: seconds. (Roughly, the average
+        is over the last that-many seconds.) It defaults to n_datapoints seconds."""
 
         self._n_datapoints = n_datapoints
-        self._moving_average_data = []
+        self._mode = mode
+        self._time_constant = time_constant if time_constant is not None else n_datapoints
+        self._alpha = 2 / (n_datapoints + 1)
+
+        self._ring = array.array('l', [NO_DATA] * n_datapoints) if mode == MODE_WINDOW else None
+        self._next = 0
+        self._sum = 0
+        self._n_data = 0    # slots with data
+        self._average = None
+        self._last_time = None
+
+
+    def update_moving_average(self, new_data_point, now=None):
+        """Add a reading - or None, for a missed one - and return the new average value,
+        or None if there's no data. 'now' is for MODE_TIME_WEIGHTED: time.monotonic() if not given."""
 
+        if self._mode == MODE_WINDOW:
+            old = self._ring[self._next]
+            if old != NO_DATA:
+                self._sum -= old
+                self._n_data -= 1
+            if new_data_point is None:
+                self._ring[self._next] = NO_DATA
+            else:
+                value = round(new_data_point * SCALE)
+                self._ring[self._next] = value
+                self._sum += value
+                self._n_data += 1
+            self._next = (self._next + 1) % self._n_datapoints
+            self._average = self._sum / (self._n_data * SCALE) if self._n_data else None
 
-    def update_moving_average(self, new_data_point):
-        """return new average value"""
+        elif new_data_point is None:
+            pass
 
-        if len(self._moving_average_data) == self._n_datapoints:
-            self._moving_average_data = self._moving_average_data[1:]
-        self._moving_average_data.append(new_data_point)
+        elif self._average is None:
+            self._average = new_data_point
+            self._last_time = now if now is not None else time.monotonic()
 
-        avg = sum(self._moving_average_data) / len(self._moving_average_data)
+        elif self._mode == MODE_EWMA:
+            self._average += (new_data_point - self._average) * self._alpha
 
-        # print(f"{self._moving_average_data=} + {new_data_point=} -> {new_list=}, {avg=}")
-        print(f"  + {new_data_point=} -> {self._moving_average_data=}, {avg=}")
+        else:
+            if now is None:
+                now = time.monotonic()
+            # A reading from before the last one (out of order) just doesn't count for much.
+            alpha = 1 - math.exp(-max(0, now - self._last_time) / self._time_constant)
+            self._average += (new_data_point - self._average) * alpha
+            self._last_time = max(now, self._last_time)
 
-        return avg
+        return self._average
+
+
+    def average(self):
+        """The average so far, or None."""
+        return self._average
+
+
+    def reset(self):
+        """Back to no data."""
+        if self._ring is not None:
+            for i in range(self._n_datapoints):
+                self._ring[i] = NO_DATA
+        self._next = 0
+        self._sum = 0
+        self._n_data = 0
+        self._average = None
+        self._last_time = None
 
 
 def test():
@@ -35,9 +105,14 @@ def test():
     print(f"{ma.update_moving_average(3)}")
     print(f"{ma.update_moving_average(4)}")
     print(f"{ma.update_moving_average(100)}")
+    print(f"{ma.update_moving_average(None)}")
     print(f"{ma.update_moving_average(100)}")
     print(f"{ma.update_moving_average(100)}")
-    print(f"{ma.update_moving_average(100)}")
+
+    ma = moving_average(4, MODE_TIME_WEIGHTED)
+    print(f"{ma.update_moving_average(1, now=0)}")
+    print(f"{ma.update_moving_average(2, now=1)}")
+    print(f"{ma.update_moving_average(100, now=10)}") # after a gap, counts for more
 
     print("done!")
     while True:
@@ -6,6 +6,15 @@ import os
 DICT_KEY_TEMPERATURE = 'T'
 DICT_KEY_WIND        = 'W'
 DICT_KEY_UPTIME      = 'U'
+DICT_KEY_PRESSURE    = 'P'
+DICT_KEY_HUMIDITY    = 'H'
+DICT_KEY_GUST        = 'G'
+DICT_KEY_SAMPLES     = 'S' # list of (age in seconds, wind, temperature) from a batch packet, oldest first
+DICT_KEY_HISTORY     = 'Y' # (sequence number, list of previous winds, oldest first) from a history packet
+
+# The transmitter keeps these in its data dict too, but there's no room for them in packets.
+DICT_KEY_CPU_TEMPERATURE   = 'c' # degrees C
+DICT_KEY_RADIO_TEMPERATURE = 'r' # degrees C
 
 DICT_VALUE_NO_THERMOMETER = '?T'
 DICT_VALUE_NO_ANEMOMETER  = "?W"
@@ -15,3 +24,21 @@ RADIO_FREQ_MHZ = 915.0
 # Read 16-character encryption key.
 # TODO: can this fail?
 ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY")
+
+# Binary packet format; see piwx_packet.py. Bump the version if the field table changes!
+PACKET_VERSION = 5
+
+# The fields we can send, in field-bitmap order: (dict key, struct format, scale).
+# A value goes over the air as the integer round(value * scale).
+PACKET_FIELDS = (
+    (DICT_KEY_TEMPERATURE, 'h', 10), # degrees F
+    (DICT_KEY_WIND,        'H', 10), # MPH
+    (DICT_KEY_GUST,        'H', 10), # MPH
+    (DICT_KEY_PRESSURE,    'H', 10), # hPa
+    (DICT_KEY_HUMIDITY,    'B',  2), # percent
+    (DICT_KEY_UPTIME,      'I',  1), # seconds
+    )
+
+# Status fields. In delta mode these only go out in keyframes - they change every time but nobody needs them
+# promptly - and they're left out of any packet that would otherwise be too long.
+PACKET_KEYFRAME_ONLY = (DICT_KEY_UPTIME,)
@@ -0,0 +1,611 @@
+"""
+    Pi-WX-Station
+    Binary packet codec, shared by the sending and receiving sides.
+
+    A packet is a 4-byte header followed by the fields named in the header's bitmap:
+        byte 0: format version (high nibble) and flags (low nibble)
+        byte 1: field bitmap; bit N set means piwx_constants.PACKET_FIELDS[N] follows.
+                The top bit (BITMAP_TIME_SYNC) isn't a field: it means there's a time block after the fields.
+        bytes 2-3: sequence number, little-endian, wrapping at 65536
+    Each field is a little-endian integer of the value times the field's scale,
+    so '72.4F' is two bytes instead of five characters plus JSON punctuation.
+
+    Keyframe and delta packets (see DeltaEncoder) have a keyframe ID byte after the header.
+
+    Time-sync packets have the transmitter's supervisor.ticks_ms() when it built the packet, 4 bytes,
+    and how many milliseconds after that it will send the next one, 2 bytes; see listen_schedule.py.
+
+    History packets have a count byte after the fields,
+    then that many previous wind readings, oldest first, one byte each (MPH * HISTORY_SCALE).
+
+    Batch packets have a sample count byte after that, then that many samples, oldest first:
+        age (deciseconds before the newest sample), wind (MPH * 10), temperature (degrees F * 10, or NO_TEMPERATURE)
+
+    The last byte is a CRC-8 of everything before it. The radio's own CRC is over the encrypted bytes,
+    so a packet from someone with a different key (or none) passes it and decrypts to garbage.
+
+    (c)2025 rob cranfill
+    see https://github.com/RobCranfill/pi-wx-station
+"""
+
+import array
+import struct
+
+import piwx_constants
+
+
+HEADER_FORMAT = "<BBH"
+SEQUENCE_MODULUS = 65536
+HEADER_LEN = struct.calcsize(HEADER_FORMAT)
+
+# Header flags, low nibble of byte 0.
+FLAG_KEYFRAME = 0x01 # full state; a keyframe ID follows the header
+FLAG_DELTA    = 0x02 # only what changed since the keyframe whose ID follows the header
+FLAG_BATCH    = 0x04 # several timestamped wind/temperature samples follow the fields
+FLAG_HISTORY  = 0x08 # the previous few wind readings follow the fields, for the receiver to backfill
+
+# Not a field: the top bit of the bitmap says a time block follows the fields. (There are only 7 fields.)
+BITMAP_TIME_SYNC = 0x80
+TIME_SYNC_FORMAT = "<IH"
+TIME_SYNC_LEN = struct.calcsize(TIME_SYNC_FORMAT)
+
+# One byte per history reading: 0.2 MPH steps, which is one anemometer count per second.
+HISTORY_SCALE = 5
+
+SAMPLE_FORMAT = "<HHh"
+SAMPLE_LEN = struct.calcsize(SAMPLE_FORMAT)
+SAMPLE_SCALE = 10
+NO_TEMPERATURE = -32768
+
+CHECKSUM_LEN = 1
+
+# Longest packet we could ever be handed; the RFM69 can't actually do more than 60 bytes.
+MAX_PACKET_LEN = 255
+MAX_HISTORY = MAX_PACKET_LEN
+MAX_SAMPLES = MAX_PACKET_LEN // SAMPLE_LEN
+
+# supervisor.ticks_ms() wraps around at 2**29.
+TICKS_MASK = (1 << 29) - 1
+
+# Smallest and largest value for each struct format we use, so we can clamp rather than blow up.
+_FORMAT_LIMITS = {
+    'b': (-128, 127),
+    'B': (0, 255),
+    'h': (-32768, 32767),
+    'H': (0, 65535),
+    'I': (0, 4294967295),
+    }
+
+# The field table, expanded to (key, struct format, byte size, scale, min, max).
+FIELDS = tuple(
+    (key, "<" + fmt, struct.calcsize(fmt), scale) + _FORMAT_LIMITS[fmt]
+        for key, fmt, scale in piwx_constants.PACKET_FIELDS)
+
+N_FIELDS = len(FIELDS)
+ALL_FIELDS = (1 << N_FIELDS) - 1
+if ALL_FIELDS & BITMAP_TIME_SYNC:
+    raise ValueError("Too many PACKET_FIELDS: the top bit of the bitmap is taken")
+
+
+def _field_bit(key):
+    for bit in range(N_FIELDS):
+        if FIELDS[bit][0] == key:
+            return bit
+
+
+WIND_BIT = _field_bit(piwx_constants.DICT_KEY_WIND)
+TEMPERATURE_BIT = _field_bit(piwx_constants.DICT_KEY_TEMPERATURE)
+
+# Bitmap of the fields that only go in keyframes, and are the first to go if a packet won't fit.
+KEYFRAME_ONLY_FIELDS = 0
+for _bit, _field in enumerate(FIELDS):
+    if _field[0] in piwx_constants.PACKET_KEYFRAME_ONLY:
+        KEYFRAME_ONLY_FIELDS |= 1 << _bit
+
+
+# Bitmap of the fields that batch samples carry, so they don't also go as fields.
+SAMPLED_FIELDS = (1 << WIND_BIT) | (1 << TEMPERATURE_BIT)
+
+
+def _to_wire(value, scale, lo, hi):
+    """The scaled integer for the value, clamped to what the field can hold."""
+    return min(max(int(round(value * scale)), lo), hi)
+
+
+def _is_number(value):
+    """Placeholder strings like '?T' don't go over the air; the receiver supplies its own."""
+    return isinstance(value, (int, float))
+
+
+def _make_crc8_table():
+    """CRC-8, polynomial 0x07, one table lookup per byte."""
+    table = bytearray(256)
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table[i] = crc
+    return table
+
+_CRC8_TABLE = _make_crc8_table()
+
+
+def crc8(buffer, length):
+    """CRC-8 of the first 'length' bytes of the buffer."""
+    crc = 0
+    for i in range(length):
+        crc = _CRC8_TABLE[crc ^ buffer[i]]
+    return crc
+
+
+def present_fields(data_dict):
+    """The bitmap of fields the dict has numeric values for."""
+    bitmap = 0
+    for bit in range(N_FIELDS):
+        if _is_number(data_dict.get(FIELDS[bit][0])):
+            bitmap |= 1 << bit
+    return bitmap
+
+
+def wire_values(data_dict):
+    """The dict's values as they would go over the air, by key. Equal here means equal at the receiver."""
+    result = {}
+    for key, _, _, scale, lo, hi in FIELDS:
+        value = data_dict.get(key)
+        if _is_number(value):
+            result[key] = _to_wire(value, scale, lo, hi)
+    return result
+
+
+def _fields_size(bitmap):
+    """Bytes taken by the fields in the bitmap."""
+    size = 0
+    for bit in range(N_FIELDS):
+        if bitmap & (1 << bit):
+            size += FIELDS[bit][2]
+    return size
+
+
+def batch_size_limit(max_len):
+    """How many samples fit in a batch packet of at most max_len bytes, along with all the other fields."""
+    room = max_len - HEADER_LEN - _fields_size(ALL_FIELDS & ~SAMPLED_FIELDS) - 1 - CHECKSUM_LEN
+    return max(0, min(room // SAMPLE_LEN, 255))
+
+
+def packet_size(data_dict, flags=0, fields=ALL_FIELDS, samples=None, history=None, time_sync=False):
+    """How long the packet for these arguments to encode() will be, without building it."""
+
+    size = HEADER_LEN
+    if flags & (FLAG_KEYFRAME | FLAG_DELTA):
+        size += 1
+    if time_sync:
+        size += TIME_SYNC_LEN
+    if history is not None:
+        size += history.size()
+    if samples is not None:
+        size += samples.size()
+        fields &= ~SAMPLED_FIELDS
+    return size + _fields_size(present_fields(data_dict) & fields) + CHECKSUM_LEN
+
+
+def encode_into(buffer, data_dict, flags=0, key_id=0, fields=ALL_FIELDS, samples=None, history=None, sequence=0,
+                tx_ticks=None, next_send_ms=0):
+    """Write the packet for the numeric values in the dict into the buffer, and return its length.
+    'fields' is a bitmap to restrict which of them go; key_id is used for keyframes and deltas.
+    sequence should go up by one for every packet sent.
+    samples is a SampleBatch for a batch packet; history is a WindHistory for a history packet.
+    tx_ticks, if given, makes it a time-sync packet: our ticks_ms() now, and when we'll send next.
+
+    If it won't fit in the buffer, the status fields (KEYFRAME_ONLY_FIELDS) are left out;
+    if it still won't fit, nothing is written and we return 0.
+
+    This is the transmitter's every-pass code, so it allocates nothing:
+    range() loops instead of enumerate(), and struct.pack_into() straight into the buffer."""
+
+    if samples is not None:
+        flags |= FLAG_BATCH
+        fields &= ~SAMPLED_FIELDS
+    if history is not None:
+        flags |= FLAG_HISTORY
+
+    time_sync = tx_ticks is not None
+    size = packet_size(data_dict, flags, fields, samples, history, time_sync)
+    if size > len(buffer):
+        fields &= ~KEYFRAME_ONLY_FIELDS
+        size = packet_size(data_dict, flags, fields, samples, history, time_sync)
+        if size > len(buffer):
+            print(f"*** Packet too large: {size} bytes")
+            return 0
+
+    bitmap = present_fields(data_dict) & fields
+    struct.pack_into(HEADER_FORMAT, buffer, 0, (piwx_constants.PACKET_VERSION << 4) | flags,
+                     bitmap | BITMAP_TIME_SYNC if time_sync else bitmap, sequence % SEQUENCE_MODULUS)
+
+    offset = HEADER_LEN
+    if flags & (FLAG_KEYFRAME | FLAG_DELTA):
+        buffer[offset] = key_id & 0xFF
+        offset += 1
+
+    for bit in range(N_FIELDS):
+        if bitmap & (1 << bit):
+            key, fmt, field_size, scale, lo, hi = FIELDS[bit]
+            struct.pack_into(fmt, buffer, offset, _to_wire(data_dict[key], scale, lo, hi))
+            offset += field_size
+
+    if time_sync:
+        struct.pack_into(TIME_SYNC_FORMAT, buffer, offset, tx_ticks & TICKS_MASK, min(max(next_send_ms, 0), 65535))
+        offset += TIME_SYNC_LEN
+
+    if history is not None:
+        offset = history.write_into(buffer, offset)
+    if samples is not None:
+        offset = samples.write_into(buffer, offset)
+
+    buffer[offset] = crc8(buffer, offset)
+    return offset + CHECKSUM_LEN
+
+
+def encode(data_dict, flags=0, key_id=0, fields=ALL_FIELDS, samples=None, history=None, sequence=0,
+           tx_ticks=None, next_send_ms=0):
+    """Return a new bytearray with the packet; see encode_into()."""
+    packet = bytearray(packet_size(data_dict, flags, fields, samples, history, tx_ticks is not None))
+    encode_into(packet, data_dict, flags, key_id, fields, samples, history, sequence, tx_ticks, next_send_ms)
+    return packet
+
+
+class PacketBuffer():
+    """A reusable buffer for outgoing packets, with a ready-made view of each length,
+    so handing a packet to the radio doesn't allocate either."""
+
+    def __init__(self, max_len):
+        self.buffer = bytearray(max_len)
+        view = memoryview(self.buffer)
+        self._views = [view[:n] for n in range(max_len + 1)]
+
+    def view(self, length):
+        """The first 'length' bytes of the buffer."""
+        return self._views[length]
+
+
+class DeltaEncoder():
+    """Send a full keyframe every so often, and in between only the fields that differ from it.
+    Deltas are relative to the keyframe, not the previous packet, so losing one costs only that update."""
+
+    def __init__(self, keyframe_interval):
+        self._keyframe_interval = keyframe_interval
+        self._count = 0
+        self._key_id = 0
+        self._keyframe_fields = 0
+        self._keyframe_wire = [0] * N_FIELDS
+
+    def encode_into(self, buffer, data_dict, history=None, sequence=0, tx_ticks=None, next_send_ms=0):
+        """Write the next packet - a keyframe or a delta - for the dict into the buffer; return its length."""
+
+        present = present_fields(data_dict)
+
+        # A delta can't say "this field went away", so a change in what we have needs a keyframe too.
+        if self._count % self._keyframe_interval == 0 or present != self._keyframe_fields:
+            self._count = 1
+            self._key_id = (self._key_id + 1) & 0xFF
+            self._keyframe_fields = present
+            for bit in range(N_FIELDS):
+                if present & (1 << bit):
+                    key, _, _, scale, lo, hi = FIELDS[bit]
+                    self._keyframe_wire[bit] = _to_wire(data_dict[key], scale, lo, hi)
+            return encode_into(buffer, data_dict, FLAG_KEYFRAME, self._key_id, history=history, sequence=sequence,
+                               tx_ticks=tx_ticks, next_send_ms=next_send_ms)
+
+        self._count += 1
+        changed = 0
+        for bit in range(N_FIELDS):
+            if present & (1 << bit):
+                key, _, _, scale, lo, hi = FIELDS[bit]
+                if _to_wire(data_dict[key], scale, lo, hi) != self._keyframe_wire[bit]:
+                    changed |= 1 << bit
+        return encode_into(buffer, data_dict, FLAG_DELTA, self._key_id, changed & ~KEYFRAME_ONLY_FIELDS,
+                           history=history, sequence=sequence, tx_ticks=tx_ticks, next_send_ms=next_send_ms)
+
+    def encode(self, data_dict, history=None, sequence=0, tx_ticks=None, next_send_ms=0):
+        """Return a new bytearray with the next packet; see encode_into()."""
+        packet = bytearray(255)
+        return packet[:self.encode_into(packet, data_dict, history, sequence, tx_ticks, next_send_ms)]
+
+
+class WindHistory():
+    """The sending side of history packets: the last few wind readings, kept on-air-ready in a ring buffer.
+    The receiver uses the packets' sequence numbers to tell how many of them it missed."""
+
+    def __init__(self, depth):
+        self._depth = depth
+        self._wire = bytearray(depth)
+        self._count = 0
+        self._next = 0
+
+    def size(self):
+        """Bytes this takes in a packet."""
+        return 1 + self._count
+
+    def write_into(self, buffer, offset):
+        """Write the count and previous readings, oldest first; return the new offset."""
+        buffer[offset] = self._count
+        offset += 1
+        start = self._next - self._count
+        for i in range(self._count):
+            buffer[offset + i] = self._wire[(start + i) % self._depth]
+        return offset + self._count
+
+    def add(self, wind):
+        """Call after sending each reading: it's history for the next packets."""
+        self._wire[self._next] = _to_wire(wind, HISTORY_SCALE, 0, 255)
+        self._next = (self._next + 1) % self._depth
+        self._count = min(self._count + 1, self._depth)
+
+
+class SampleBatch():
+    """The sending side of batch packets: up to 'capacity' samples, in preallocated arrays.
+    Timestamps are supervisor.ticks_ms() values; ages in the packet are relative to the newest sample."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._ticks = array.array('L', [0] * capacity)
+        self._winds = array.array('H', [0] * capacity)
+        self._temperatures = array.array('h', [0] * capacity)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def is_full(self):
+        return self._count >= self.capacity
+
+    def clear(self):
+        self._count = 0
+
+    def add(self, ticks_ms, wind, temperature):
+        """Add a sample; temperature can be None. Ignored if we're full."""
+        if self._count >= self.capacity:
+            return
+        self._ticks[self._count] = ticks_ms & TICKS_MASK
+        self._winds[self._count] = _to_wire(wind, SAMPLE_SCALE, 0, 65535)
+        self._temperatures[self._count] = (NO_TEMPERATURE if temperature is None
+                                           else _to_wire(temperature, SAMPLE_SCALE, -32767, 32767))
+        self._count += 1
+
+    def size(self):
+        """Bytes this takes in a packet."""
+        return 1 + self._count * SAMPLE_LEN
+
+    def write_into(self, buffer, offset):
+        """Write the count and samples, oldest first; return the new offset."""
+        buffer[offset] = self._count
+        offset += 1
+        newest = self._ticks[self._count - 1] if self._count else 0
+        for i in range(self._count):
+            age_ds = ((newest - self._ticks[i]) & TICKS_MASK) // 100
+            struct.pack_into(SAMPLE_FORMAT, buffer, offset,
+                             min(age_ds, 65535), self._winds[i], self._temperatures[i])
+            offset += SAMPLE_LEN
+        return offset
+
+
+def _read_int(buffer, offset, code):
+    """A little-endian integer of struct format 'code' - by hand, since unpack_from() makes a tuple."""
+    if code == 'B':
+        return buffer[offset]
+    if code == 'b':
+        value = buffer[offset]
+        return value - 256 if value > 127 else value
+    value = buffer[offset] | (buffer[offset + 1] << 8)
+    if code == 'H':
+        return value
+    if code == 'h':
+        return value - 65536 if value > 32767 else value
+    return value | (buffer[offset + 2] << 16) | (buffer[offset + 3] << 24) # 'I'
+
+
+class Frame():
+    """One decoded packet. PacketDecoder fills in the same one every time, so copy out what you want to keep."""
+
+    def __init__(self):
+        self.flags = 0
+        self.sequence = 0
+        self.key_id = 0
+        self.bitmap = 0
+        self.time_sync = False
+        self.tx_ticks = 0     # only if time_sync
+        self.next_send_ms = 0 # only if time_sync
+        self.values = [0] * N_FIELDS # by field bit; only the bits in 'bitmap' mean anything
+        self.n_history = 0
+        self.history = bytearray(MAX_HISTORY) # on-air bytes, oldest first
+        self.n_samples = 0
+        self.sample_ages = array.array('H', [0] * MAX_SAMPLES) # deciseconds
+        self.sample_winds = array.array('H', [0] * MAX_SAMPLES) # on-air values
+        self.sample_temperatures = array.array('h', [0] * MAX_SAMPLES)
+
+    def has(self, bit):
+        return self.bitmap & (1 << bit) != 0
+
+    def history_wind(self, i):
+        """The i'th previous wind reading, oldest first."""
+        return self.history[i] / HISTORY_SCALE
+
+    def sample(self, i):
+        """The i'th batch sample, oldest first: (age in seconds, wind, temperature or None). Allocates!"""
+        temperature = self.sample_temperatures[i]
+        return (self.sample_ages[i] / 10, self.sample_winds[i] / SAMPLE_SCALE,
+                None if temperature == NO_TEMPERATURE else temperature / SAMPLE_SCALE)
+
+    def missed_winds(self, last_sequence):
+        """How many of the history readings, counting back from the newest, we missed since the packet
+        numbered last_sequence. 0 if last_sequence is None (we have nothing to go on), or this is a duplicate."""
+        if not self.flags & FLAG_HISTORY or last_sequence is None:
+            return 0
+        gap = (self.sequence - last_sequence - 1) % SEQUENCE_MODULUS
+        if gap >= SEQUENCE_MODULUS // 2: # a duplicate, or stale
+            return 0
+        return min(gap, self.n_history)
+
+    def update_dict(self, data_dict):
+        """Put the fields into the dict, by key."""
+        for bit in range(N_FIELDS):
+            if self.bitmap & (1 << bit):
+                data_dict[FIELDS[bit][0]] = self.values[bit]
+
+    def to_dict(self):
+        """A new dict of everything, the way decode() used to return it - for debugging and host tools."""
+        result = {}
+        self.update_dict(result)
+        if self.flags & FLAG_HISTORY:
+            result[piwx_constants.DICT_KEY_HISTORY] = (
+                self.sequence, [self.history_wind(i) for i in range(self.n_history)])
+        if self.flags & FLAG_BATCH:
+            result[piwx_constants.DICT_KEY_SAMPLES] = [self.sample(i) for i in range(self.n_samples)]
+        return result
+
+
+class PacketDecoder():
+    """Parses packets straight out of the radio's bytearray into a reused Frame.
+    Never raises on garbage: anything that doesn't check out is counted and returns None."""
+
+    def __init__(self):
+        self.frame = Frame()
+        self.bad_length = 0
+        self.bad_checksum = 0
+        self.bad_version = 0
+        self.bad_layout = 0
+
+    def rejected(self):
+        """How many packets we've thrown away."""
+        return self.bad_length + self.bad_checksum + self.bad_version + self.bad_layout
+
+    def decode(self, packet):
+        """Return the Frame for the packet, or None if it doesn't check out."""
+
+        if packet is None:
+            return None
+        length = len(packet)
+        if length < HEADER_LEN + CHECKSUM_LEN or length > MAX_PACKET_LEN:
+            self.bad_length += 1
+            return None
+
+        end = length - CHECKSUM_LEN
+        if crc8(packet, end) != packet[end]:
+            self.bad_checksum += 1
+            return None
+
+        version_flags = packet[0]
+        if version_flags >> 4 != piwx_constants.PACKET_VERSION:
+            self.bad_version += 1
+            return None
+
+        frame = self.frame
+        frame.flags = flags = version_flags & 0x0F
+        bitmap = packet[1]
+        frame.time_sync = bitmap & BITMAP_TIME_SYNC != 0
+        frame.bitmap = bitmap = bitmap & ~BITMAP_TIME_SYNC
+        frame.sequence = _read_int(packet, 2, 'H')
+        frame.n_history = 0
+        frame.n_samples = 0
+        offset = HEADER_LEN
+
+        if bitmap & ~ALL_FIELDS or (flags & FLAG_KEYFRAME and flags & FLAG_DELTA):
+            self.bad_layout += 1
+            return None
+
+        if flags & (FLAG_KEYFRAME | FLAG_DELTA):
+            if offset >= end:
+                self.bad_layout += 1
+                return None
+            frame.key_id = packet[offset]
+            offset += 1
+
+        for bit in range(N_FIELDS):
+            if bitmap & (1 << bit):
+                _, fmt, field_size, scale, _, _ = FIELDS[bit]
+                if offset + field_size > end:
+                    self.bad_layout += 1
+                    return None
+                value = _read_int(packet, offset, fmt[1])
+                frame.values[bit] = value if scale == 1 else value / scale
+                offset += field_size
+
+        if frame.time_sync:
+            if offset + TIME_SYNC_LEN > end:
+                self.bad_layout += 1
+                return None
+            frame.tx_ticks = _read_int(packet, offset, 'I')
+            frame.next_send_ms = _read_int(packet, offset + 4, 'H')
+            offset += TIME_SYNC_LEN
+
+        if flags & FLAG_HISTORY:
+            if offset >= end or offset + 1 + packet[offset] > end:
+                self.bad_layout += 1
+                return None
+            n_history = frame.n_history = packet[offset]
+            offset += 1
+            for i in range(n_history):
+                frame.history[i] = packet[offset + i]
+            offset += n_history
+
+        if flags & FLAG_BATCH:
+            if offset >= end or offset + 1 + packet[offset] * SAMPLE_LEN > end:
+                self.bad_layout += 1
+                return None
+            n_samples = frame.n_samples = packet[offset]
+            offset += 1
+            for i in range(n_samples):
+                frame.sample_ages[i] = _read_int(packet, offset, 'H')
+                frame.sample_winds[i] = _read_int(packet, offset + 2, 'H')
+                frame.sample_temperatures[i] = _read_int(packet, offset + 4, 'h')
+                offset += SAMPLE_LEN
+
+            # The newest sample is the current reading.
+            if n_samples:
+                frame.values[WIND_BIT] = frame.sample_winds[n_samples - 1] / SAMPLE_SCALE
+                frame.bitmap |= 1 << WIND_BIT
+                temperature = frame.sample_temperatures[n_samples - 1]
+                if temperature != NO_TEMPERATURE:
+                    frame.values[TEMPERATURE_BIT] = temperature / SAMPLE_SCALE
+                    frame.bitmap |= 1 << TEMPERATURE_BIT
+
+        if offset != end:
+            self.bad_layout += 1
+            return None
+
+        return frame
+
+
+class DeltaDecoder(PacketDecoder):
+    """The receiving end of DeltaEncoder; also takes plain packets."""
+
+    def __init__(self):
+        super().__init__()
+        self._key_id = None
+        self._keyframe_bitmap = 0
+        self._keyframe_values = [0] * N_FIELDS
+
+    def merge(self, frame, data_dict):
+        """Put the frame's values, merged onto its keyframe, into the dict.
+        If we missed the keyframe, only the delta's own fields go in; the caller supplies placeholders."""
+
+        if frame.flags & FLAG_KEYFRAME:
+            self._key_id = frame.key_id
+            self._keyframe_bitmap = frame.bitmap
+            for bit in range(N_FIELDS):
+                self._keyframe_values[bit] = frame.values[bit]
+
+        elif frame.flags & FLAG_DELTA:
+            if frame.key_id == self._key_id:
+                for bit in range(N_FIELDS):
+                    if self._keyframe_bitmap & (1 << bit):
+                        data_dict[FIELDS[bit][0]] = self._keyframe_values[bit]
+            else:
+                print(f"** Missed keyframe #{frame.key_id}; have #{self._key_id}")
+
+        frame.update_dict(data_dict)
+
+
+def decode(packet):
+    """Return a new dict of what's in the packet, or None if it doesn't check out. For host tools."""
+    frame = PacketDecoder().decode(packet)
+    return None if frame is None else frame.to_dict()
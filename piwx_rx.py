@@ -13,13 +13,12 @@ FIXME:
     - missed packets not working?
     - wrap whole thing in try/catch
       - but don't re-init the hardware on another go-around!
-    - if missed packet, don't re-compute average wind
 
 """
 
 # stdlibs
+import asyncio
 import gc
-import json
 import random
 import time
 import traceback
@@ -34,8 +33,14 @@ import adafruit_vcnl4020
 import neopixel
 
 # our libs
+import archive
+import backlight
+import link_stats
+import listen_schedule
 import moving_average
 import piwx_constants
+import piwx_packet
+import rolling_stats
 import tft_22
 
 
@@ -52,7 +57,8 @@ DISPLAY_WAIT = 3
 
 # TODO: this may be important.
 # We send every X seconds, we should probably wait for 2X seconds??
-LISTEN_TIMEOUT  = 8
+# The transmitter's heartbeat - MAX_SEND_INTERVAL - is 15 seconds when nothing's changing.
+LISTEN_TIMEOUT  = 20
 
 # we will re-use old data for this many missed packets
 MAX_MISSED_PACKETS = 8
@@ -65,6 +71,27 @@ NO_DATA_PACKET['C'] = 'W?'
 # We will average the wind over this many readings (which take 2-3 seconds each).
 WIND_MOVING_AVG_SAMPLES = 5
 
+# Or, since with the adaptive cadence readings don't come evenly: moving_average.MODE_TIME_WEIGHTED
+# averages over about WIND_AVERAGE_SECONDS, giving a reading more weight the longer it's been since the last.
+WIND_AVERAGE_MODE = moving_average.MODE_WINDOW
+WIND_AVERAGE_SECONDS = 15
+
+# Run as asyncio tasks, so the radio is always listening - even while the display shows a page?
+# Otherwise we only listen in between pages, and miss most packets.
+USE_ASYNCIO = True
+
+# With USE_ASYNCIO: how often to look for a packet, in seconds. The radio holds one packet in its FIFO
+# until we read it, so this just has to be well under the transmitter's send interval.
+RADIO_POLL_SECONDS = 0.01
+
+# With USE_ASYNCIO: get the next likely values ready to show (tft.warm_up()) if there's this long
+# till the next page, in seconds. Rendering one - loading its glyphs, the first time - holds up the other tasks.
+WARM_UP_MIN_SECONDS = 1
+
+# With USE_ASYNCIO: if the packets say when the next one's coming (the transmitter's TIME_SYNC),
+# only turn the radio on around then? See listen_schedule.py for the window widths.
+USE_LISTEN_WINDOWS = True
+
 
 def show_radio_status(radio):
     """For fun. But also could use to show local temp - if it worked!"""
@@ -78,29 +105,30 @@ def show_radio_status(radio):
     print()
 
 
-def get_message(rfm):
-    '''Return the dictionary of values received by the radio, or None'''
+def get_message(rfm, decoder):
+    '''Return the decoder's Frame for the packet received by the radio, or None'''
 
     # Look for a new packet - wait up to given timeout.
-    
-    # FIXME: .receive() has thrown UnicodeError once.
 
     print("\nListening...")
-    packet = rfm.receive(timeout=LISTEN_TIMEOUT, keep_listening=False)
-    # print(" Got a packet or timed out....")
+    try:
+        packet = rfm.receive(timeout=LISTEN_TIMEOUT, keep_listening=False)
+    except Exception as e:
+        # .receive() has thrown UnicodeError once; don't let that take down the whole loop.
+        print(f"*** Radio receive failed: {e}")
+        return None
 
     # If no packet was received after the timeout then None is returned.
     result = None
     if packet is None:
         print("No packet?")
     else:
-        print(f" Got a packet; {rfm.last_rssi=}")
-        pstr = packet.decode('utf8')
-        # print(f"Rcvd: '{pstr}'")
+        print(f" Got a packet; {len(packet)} bytes, {rfm.last_rssi=}")
 
-        # TODO: somehow pre-load the default value dict, then overlay any received values?
-        # TODO: catch exception?
-        result = json.loads(pstr)
+        # This is None if it doesn't check out, which counts as a missed packet.
+        result = decoder.decode(packet)
+        if result is None:
+            print(f"** Bad packet; {decoder.rejected()} so far")
 
     # also get local temp?
 
@@ -130,13 +158,8 @@ def init_hardware():
     tft.set_status_text("Starting up...")
     tft.refresh()
 
-    # Does this help? no, not obviously, and adds >10 seconds to startup.
-    #
-    # print("pre-loading glyphs....")
-    # t_start = time.monotonic()
-    # for i in range(10):
-    #     tft.set_text(str(i))
-    # print(f"done in {time.monotonic() - t_start} seconds")
+    # Pre-loading glyphs here adds >10 seconds to startup. Instead, tft_22 renders the values
+    # either side of what's showing in the display task's idle time (tft.warm_up()).
 
     # Initialize VCNL4020 light sensor.
     vcln = None
@@ -150,29 +173,6 @@ def init_hardware():
     return rfm, tft, vcln
 
 
-def set_brightness_value(tft, light_sensor):
-    """Set the display brighness acccording to ambient light."""
-
-    lux_percent = 100 # full brightness
-    if light_sensor is not None:
-
-        lux = light_sensor.lux
-
-        # 1000 lux, "indoors near the windows on a clear day", gets full LED value.
-        # 1000 seems high, try 100.
-        #
-        lux_scaled = min(lux/100, 1)
-
-        lux_percent = int(100 * lux_scaled)
-        if lux_percent < 20: # ad hoc floor
-            lux_percent = 20
-        print(f" Brightness: {lux=} -> {lux_scaled=} -> {lux_percent=}")
-
-    tft.set_backlight(lux_percent)
-
-    return lux_percent
-
-
 def c_to_f(c):
     """Return farenheit from celsius"""
     return (c*9/5) + 32
@@ -181,13 +181,19 @@ def c_to_f(c):
 def initial_dict():
     """Dictionary of values we display, with defaults."""
     d = {}
+    reset_dict(d)
+    return d
+
+
+def reset_dict(d):
+    """Back to just the defaults - in place, so we don't make a new dict every packet."""
+    d.clear()
     d['T'] = piwx_constants.DICT_VALUE_NO_THERMOMETER
     d['W'] = piwx_constants.DICT_VALUE_NO_ANEMOMETER
-    return d
 
 
-def update_dict_from_radio(rfm, dict, missed_packet_count):
-    """Return (new dictionary, missed packet count)."""
+def update_dict_from_radio(rfm, decoder, dict, missed_packet_count):
+    """Update the dictionary in place; return (the packet's Frame or None, missed packet count)."""
 
     # # test exception handling
     # if random.randint(0, 10) > 2:
@@ -195,35 +201,119 @@ def update_dict_from_radio(rfm, dict, missed_packet_count):
 
     # Get a radio packet.
     #
-    data = get_message(rfm)
-    print(f" Received dictionary: {data}")
+    frame = get_message(rfm, decoder)
 
-    if data is None: # or random.randint(0, 10) > 1: # For testing, drop some packets
+    if frame is None: # or random.randint(0, 10) > 1: # For testing, drop some packets
         missed_packet_count += 1
         print(f"** missing packet #{missed_packet_count}")
 
         if missed_packet_count >= MAX_MISSED_PACKETS:
             print("*** MISSED PACKETS > {MAX_MISSED_PACKETS}!")
-            dict = initial_dict()
+            reset_dict(dict)
 
     else:
         # print("Got data packet - resetting missed packet count.")
         missed_packet_count = 0
+        apply_frame(decoder, frame, dict)
+
+    return frame, missed_packet_count
+
+
+def apply_frame(decoder, frame, data_dict):
+    """Put a new packet's values in the dict."""
+
+    # Anything not in the packet (no thermometer? missed keyframe?) shows as its placeholder.
+    # Delta packets get merged onto the last keyframe.
+    reset_dict(data_dict)
+    decoder.merge(frame, data_dict)
+    print(f" Received dictionary: {data_dict}")
+
+
+def record_frame(frame, data_dict, stats, history, now):
+    """Put a new packet's readings into the rolling stats and the archive, at time 'now'.
+    A batch packet's older samples go in first, each at its own time, the same way - just with
+    only the wind and temperature they have. The newest one's in data_dict already."""
+
+    if frame.flags & piwx_packet.FLAG_BATCH and frame.n_samples:
+        sample_dict = {}
+        for i in range(frame.n_samples - 1):
+            sample_dict[piwx_constants.DICT_KEY_WIND] = frame.sample_winds[i] / piwx_packet.SAMPLE_SCALE
+            temperature = frame.sample_temperatures[i]
+            sample_dict[piwx_constants.DICT_KEY_TEMPERATURE] = (
+                None if temperature == piwx_packet.NO_TEMPERATURE else temperature / piwx_packet.SAMPLE_SCALE)
+            sample_time = now - frame.sample_ages[i] / 10
+            stats.update(sample_dict, sample_time)
+            history.add(sample_dict, sample_time)
+
+    stats.update(data_dict, now)
+    history.add(data_dict, now)
+
+
+def make_wind_averager():
+    return moving_average.moving_average(WIND_MOVING_AVG_SAMPLES, WIND_AVERAGE_MODE, WIND_AVERAGE_SECONDS)
+
 
-        # for k in ['T', 'W']:
-        #     data_val = str(data[k])
-        #     dict[k] = data_val
-        #     # print(f" * update_dict_from_radio assigning {k} = '{dict[k]}'")
-        # # print(f" update_dict_from_radio: {dict=}")
+def update_wind_average(averager, frame, data_dict, last_sequence, now=None, last_time=None):
+    """Feed a new packet's wind reading(s) to the averager, oldest first, each at its own time -
+    for MODE_TIME_WEIGHTED - from 'now', when the packet came in, and 'last_time', when the last one did.
+    Return (the new average, the packet's sequence number if it has history)."""
 
-        # Return whole thing!
-        dict = data
+    if now is None:
+        now = time.monotonic()
 
-    return dict, missed_packet_count
+    if frame.flags & piwx_packet.FLAG_BATCH and frame.n_samples:
+        # A batch packet: catch up on all the readings since the last one. Their ages are from the newest.
+        for i in range(frame.n_samples):
+            avg = averager.update_moving_average(frame.sample_winds[i] / piwx_packet.SAMPLE_SCALE,
+                                                 now - frame.sample_ages[i] / 10)
+        print(f" Unpacked {frame.n_samples} batched samples")
+        return avg, last_sequence
 
+    # If the packet carries history, first put back what we missed, so the average doesn't skip the gap.
+    # The missed packets came between the last one we got and this one; call it evenly.
+    if frame.flags & piwx_packet.FLAG_HISTORY:
+        n_missed = frame.missed_winds(last_sequence)
+        spacing = 0 if last_time is None else (now - last_time) / (n_missed + 1)
+        for i in range(frame.n_history - n_missed, frame.n_history):
+            averager.update_moving_average(frame.history_wind(i), now - spacing * (frame.n_history - i))
+        if n_missed:
+            print(f" Backfilled {n_missed} missed wind readings")
+        last_sequence = frame.sequence
 
-def update_display(tft, text, is_temperature, missed_packets):
-    """Update all the things. TODO: Missed packets is displayed elsewhere. fix?"""
+    return averager.update_moving_average(data_dict[piwx_constants.DICT_KEY_WIND], now), last_sequence
+
+
+def temperature_text(data_dict):
+    """Temperature is is just displayed "raw" - or it's the placeholder string."""
+    temp = data_dict[piwx_constants.DICT_KEY_TEMPERATURE]
+    return temp if isinstance(temp, str) else f"{temp:2.0f}"
+
+
+def wind_text(data_dict, wind_avg):
+    """Wind needs massaging - display running average."""
+    w_data = data_dict[piwx_constants.DICT_KEY_WIND]
+    if isinstance(w_data, str) or wind_avg is None:
+        return piwx_constants.DICT_VALUE_NO_ANEMOMETER
+
+    # # to display most recent wind value:
+    # return str(int(w_data))
+
+    # to display wind average:
+    print(f" >> wind speed {w_data}; {WIND_MOVING_AVG_SAMPLES} sample average now {wind_avg:0.1f}")
+    return f"{wind_avg:2.0f}"
+
+
+def gust_text(data_dict):
+    """The peak gust since the last packet, for the line under the wind - or None if we don't have one."""
+    gust = data_dict.get(piwx_constants.DICT_KEY_GUST)
+    if gust is None:
+        return None
+    return f"Gusting to {gust:0.0f} MPH"
+
+
+def update_display(tft, text, is_temperature, missed_packets, detail=None):
+    """Update all the things. TODO: Missed packets is displayed elsewhere. fix?
+    'detail' goes on the line under the big text - the gust, under the wind - or None for nothing."""
 
     # print(f" DISPLAY: '{text}' {is_temperature}")
     tft.set_text(text)
@@ -231,6 +321,7 @@ def update_display(tft, text, is_temperature, missed_packets):
         tft.set_text_color(DISPLAY_COLOR_TEMPERATURE)
     else:
         tft.set_text_color(DISPLAY_COLOR_WIND)
+    tft.set_detail_text(detail or "")
 
     tft.refresh()
 
@@ -265,12 +356,24 @@ def sec_to_hms(seconds):
     return f"{h:02}:{m:02}:{s:02}"
 
 
-def show_status_info(radio, display, missed, which_status, brightness, transmitter_uptime):
-    """Update some status info. You need to call update() on the display for this to show."""
-    
-    # TODO: a better way to be able to alternate messages? Break this into two??
-
-    if which_status:
+# How many different status lines show_status_info() takes turns with.
+N_STATUS_LINES = 7
+
+def show_status_info(radio, display, missed, which_status, brightness, transmitter_uptime, link, stats, history, now):
+    """Update some status info - status line number 'which_status', as of time 'now' - and return the number of the next one.
+    You need to call update() on the display for this to show."""
+
+    if which_status == 0:
+        display.set_status_text(link.status_text())
+    elif which_status == 3:
+        display.set_status_text(stats.summary_text(piwx_constants.DICT_KEY_WIND, 1, "Wind", now))
+    elif which_status == 4:
+        display.set_status_text(stats.summary_text(piwx_constants.DICT_KEY_TEMPERATURE, 2, "Temp", now))
+    elif which_status == 5:
+        display.set_status_text(history.summary_text(now))
+    elif which_status == 6:
+        display.set_status_text(display.frame_stats_text())
+    elif which_status == 1:
         display.set_status_text(
             f"{missed} missed packets; RSSI {radio.last_rssi}; {gc.mem_free()} bytes free")
     else:
@@ -282,7 +385,7 @@ def show_status_info(radio, display, missed, which_status, brightness, transmitt
                 f"TX up {sec_to_hms(transmitter_uptime)}")
             )
 
-    return not which_status
+    return (which_status + 1) % N_STATUS_LINES
 
 
 def check_proximity(proximity_sensor):
@@ -299,11 +402,21 @@ def run(radio, tft_display, sensor):
     missed_packets = 0
     tx_uptime = 0
     data_dict = initial_dict()
-    show_status_a = True # clunky - fix?
-
-    averager = moving_average.moving_average(WIND_MOVING_AVG_SAMPLES)
+    decoder = piwx_packet.DeltaDecoder()
+    link = link_stats.LinkStats()
+    stats = rolling_stats.RollingStats()
+    history = archive.Archive()
+    which_status = 0
+
+    averager = make_wind_averager()
+    wind_avg = None
+    wind_sequence = None
+    wind_time = None
     print(f"* Averaging wind readings over {WIND_MOVING_AVG_SAMPLES} samples.")
 
+    # This reads the light sensor when it's due, not every time we ask it.
+    backlight_controller = backlight.BacklightController(sensor, tft_display.set_backlight)
+
     # Run this loop forever.
     while True:
 
@@ -311,53 +424,195 @@ def run(radio, tft_display, sensor):
     
 
         # do this often:
-        set_brightness_value(tft_display, sensor)
+        backlight_controller.update(time.monotonic())
 
-        data_dict, missed_packets = update_dict_from_radio(radio, data_dict, missed_packets)
+        frame, missed_packets = update_dict_from_radio(radio, decoder, data_dict, missed_packets)
+        if frame is not None:
+            link.packet_received(frame.sequence, time.monotonic())
+            record_frame(frame, data_dict, stats, history, time.monotonic())
 
-        b = set_brightness_value(tft_display, sensor)
+        # Only a new packet changes the average wind - don't re-count old data.
+        if frame is not None and not isinstance(data_dict[piwx_constants.DICT_KEY_WIND], str):
+            now = time.monotonic()
+            wind_avg, wind_sequence = update_wind_average(averager, frame, data_dict, wind_sequence, now, wind_time)
+            wind_time = now
 
-        tx_uptime = data_dict[piwx_constants.DICT_KEY_UPTIME]
-        if tx_uptime is None:
-            tx_uptime = -1
-        # else:
-            # print(f"TX uptime is {tx_uptime} - {type(tx_uptime)=}")
+        b = backlight_controller.update(time.monotonic())
 
+        tx_uptime = data_dict.get(piwx_constants.DICT_KEY_UPTIME, -1)
 
-        # Temperature is is just displayed "raw".
-        temp_str = data_dict[piwx_constants.DICT_KEY_TEMPERATURE]
 
-        show_status_a = show_status_info(radio, tft_display, missed_packets, show_status_a, b, tx_uptime)
+        temp_str = temperature_text(data_dict)
+
+        which_status = show_status_info(radio, tft_display, missed_packets, which_status, b, tx_uptime, link, stats, history,
+                                        time.monotonic())
         update_display(tft_display, temp_str, True, missed_packets)
 
         time.sleep(DISPLAY_WAIT)
 
-        b = set_brightness_value(tft_display, sensor)
+        b = backlight_controller.update(time.monotonic())
 
-        # Wind needs massaging - display running average.
-        #
-        w_data = data_dict[piwx_constants.DICT_KEY_WIND]
-        if w_data == piwx_constants.DICT_VALUE_NO_ANEMOMETER:
-            wind_str = w_data
-        else:
-            wind_val = float(w_data)
+        wind_str = wind_text(data_dict, wind_avg)
 
-            # # to display most recent wind value:
-            # wind_str = str(int(wind_val))
-
-            # to display wind average:
-            avg = averager.update_moving_average(wind_val)
-            print(f" >> wind speed {wind_val}; {WIND_MOVING_AVG_SAMPLES} second average now {avg:0.1f}")
-            wind_str = f"{avg:2.0f}"
-
-        show_status_a = show_status_info(radio, tft_display, missed_packets, show_status_a, b, tx_uptime)
-        update_display(tft_display, wind_str, False, missed_packets)
+        which_status = show_status_info(radio, tft_display, missed_packets, which_status, b, tx_uptime, link, stats, history,
+                                        time.monotonic())
+        update_display(tft_display, wind_str, False, missed_packets, gust_text(data_dict))
 
         time.sleep(DISPLAY_WAIT)
 
     # end run()
 
 
+#############################################################
+# The asyncio version: the same things, as tasks that take turns, so the radio never stops listening.
+#
+class ReceiverState():
+    """What the receiver tasks share."""
+
+    def __init__(self):
+        self.data_dict = initial_dict()
+        self.decoder = piwx_packet.DeltaDecoder()
+        self.link = link_stats.LinkStats()
+        self.stats = rolling_stats.RollingStats()
+        self.history = archive.Archive()
+        self.averager = make_wind_averager()
+        self.wind_avg = None
+        self.wind_sequence = None
+        self.wind_time = None # when the last wind reading came in
+        self.missed_packets = 0
+        self.last_packet_time = time.monotonic()
+        self.brightness = 100
+        self.new_data = asyncio.Event() # so the display can show it right away
+        self.schedule = listen_schedule.ListenSchedule() if USE_LISTEN_WINDOWS else None
+
+    def packet_received(self, packet, now):
+        """Decode and use a packet that came in at time 'now'."""
+
+        frame = self.decoder.decode(packet)
+        if frame is None:
+            print(f"** Bad packet; {self.decoder.rejected()} so far")
+            return
+
+        self.missed_packets = 0
+        self.last_packet_time = now
+        self.link.packet_received(frame.sequence, now)
+        if self.schedule is not None and frame.time_sync:
+            self.schedule.packet_received(now, frame.tx_ticks, frame.next_send_ms)
+        apply_frame(self.decoder, frame, self.data_dict)
+        record_frame(frame, self.data_dict, self.stats, self.history, now)
+        if not isinstance(self.data_dict[piwx_constants.DICT_KEY_WIND], str):
+            self.wind_avg, self.wind_sequence = update_wind_average(
+                self.averager, frame, self.data_dict, self.wind_sequence, now, self.wind_time)
+            self.wind_time = now
+        self.new_data.set()
+
+    def check_timeout(self, now):
+        """Count a missed packet for every LISTEN_TIMEOUT that goes by without one."""
+
+        if now - self.last_packet_time < LISTEN_TIMEOUT:
+            return
+        self.last_packet_time = now
+        self.missed_packets += 1
+        print(f"** missing packet #{self.missed_packets}")
+        if self.missed_packets >= MAX_MISSED_PACKETS:
+            print(f"*** MISSED PACKETS > {MAX_MISSED_PACKETS}!")
+            reset_dict(self.data_dict)
+            self.new_data.set()
+
+
+async def radio_task(rfm, state):
+    """Keep the radio listening - or, with listen windows, listening when a packet's due -
+    and take each packet, timestamped, as soon as it's in."""
+
+    rfm.listen()
+    listening = True
+    while True:
+        now = time.monotonic()
+        if rfm.payload_ready():
+            try:
+                packet = rfm.receive(keep_listening=True, timeout=0)
+            except Exception as e:
+                # .receive() has thrown UnicodeError once; don't let that take down the whole loop.
+                print(f"*** Radio receive failed: {e}")
+                packet = None
+            if packet is not None:
+                print(f" Got a packet; {len(packet)} bytes, {rfm.last_rssi=}")
+                state.packet_received(packet, now)
+        else:
+            state.check_timeout(now)
+
+        window = state.schedule.window() if state.schedule is not None else None
+        if window is not None:
+            opens, closes = window
+            if now > closes:
+                state.schedule.missed()
+                continue
+            if now < opens:
+                # Nothing due for a while; save power till then.
+                if listening:
+                    rfm.sleep()
+                    listening = False
+                await asyncio.sleep(opens - now)
+                continue
+        if not listening:
+            rfm.listen()
+            listening = True
+        await asyncio.sleep(RADIO_POLL_SECONDS)
+
+
+async def display_task(tft, radio, state):
+    """Show temperature, then wind, DISPLAY_WAIT seconds each - but redraw as soon as there's new data."""
+
+    which_status = 0
+    show_temperature = True
+    while True:
+        which_status = show_status_info(radio, tft, state.missed_packets, which_status, state.brightness,
+                                        state.data_dict.get(piwx_constants.DICT_KEY_UPTIME, -1),
+                                        state.link, state.stats, state.history, time.monotonic())
+        page_end = time.monotonic() + DISPLAY_WAIT
+        while True:
+            if show_temperature:
+                update_display(tft, temperature_text(state.data_dict), True, state.missed_packets)
+            else:
+                update_display(tft, wind_text(state.data_dict, state.wind_avg), False, state.missed_packets,
+                               gust_text(state.data_dict))
+
+            state.new_data.clear()
+            if page_end - time.monotonic() > WARM_UP_MIN_SECONDS:
+                tft.warm_up()
+            remaining = page_end - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(state.new_data.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+
+        show_temperature = not show_temperature
+
+
+async def brightness_task(backlight_controller, state):
+    """Read the light sensor when it's due, and ramp the backlight - nothing else waits on either."""
+    while True:
+        now = time.monotonic()
+        state.brightness = backlight_controller.update(now)
+        await asyncio.sleep(max(0, backlight_controller.next_update(now) - time.monotonic()))
+
+
+async def run_tasks(radio, tft_display, sensor):
+    """The asyncio main loop - only exits if exception thrown."""
+
+    state = ReceiverState()
+    backlight_controller = backlight.BacklightController(sensor, tft_display.set_backlight)
+    print(f"* Averaging wind readings over {WIND_MOVING_AVG_SAMPLES} samples.")
+
+    await asyncio.gather(
+        asyncio.create_task(radio_task(radio, state)),
+        asyncio.create_task(display_task(tft_display, radio, state)),
+        asyncio.create_task(brightness_task(backlight_controller, state)),
+        )
+
+
 def main_entry():
     """This catches exceptions and re-runs that which can be re-run."""
 
@@ -366,7 +621,10 @@ def main_entry():
 
     while True:
         try:
-            run(radio, tft_display, sensor)
+            if USE_ASYNCIO:
+                asyncio.run(run_tasks(radio, tft_display, sensor))
+            else:
+                run(radio, tft_display, sensor)
         except KeyboardInterrupt:
             print("\n* Got ctrl-C!\n")
             break
@@ -380,4 +638,6 @@ def main_entry():
     #     pass
 
 
-main_entry()
+# do it! (but not if we're just being imported, say by a host-side tool)
+if __name__ == "__main__":
+    main_entry()
@@ -12,9 +12,9 @@
 # region imports
 
 # stdlibs
+import asyncio
 import board
 import digitalio
-import json
 import microcontroller
 import os
 import random
@@ -27,8 +27,11 @@ import neopixel
 
 # my code
 import anemom
+import calibration
 import sensors
 import piwx_constants
+import piwx_packet
+import sample_schedule
 
 # endregion imports
 # region defines
@@ -49,9 +52,60 @@ LED_COLOR_OFF = 0x00_00_00
 # This is a hardware limit
 MAX_RFM_MSG_LEN = 60
 
+# Send a full keyframe packet this often; in between, only what changed. 1 means always send everything.
+KEYFRAME_INTERVAL = 10
+
+# Pack this many wind/temperature samples into each packet, so we key the radio less often.
+# 1 means no batching. Capped at what fits in MAX_RFM_MSG_LEN.
+# The receiver's LISTEN_TIMEOUT needs to be longer than BATCH_SIZE * (COLLECTION_TIME + SEND_DELAY).
+BATCH_SIZE = 1
+
+# Send the previous this-many wind readings in each packet, so the receiver can fill in for lost packets.
+# 0 means don't. (Batch packets don't need this.)
+HISTORY_DEPTH = 4
+
 # just test the sensors and data packing, or actually send data?
 ACTUALLY_SEND = True
 
+# Run as asyncio tasks, so the anemometer is counted all the time - not just for COLLECTION_TIME out of every pass?
+USE_ASYNCIO = True
+
+# With USE_ASYNCIO, each packet's wind is the average over this many COLLECTION_TIME windows - all the time
+# since the last packet - so we send about as often as the old COLLECTION_TIME + SEND_DELAY loop did.
+WINDOWS_PER_SEND = 3
+
+# With USE_ASYNCIO, send more often when the wind or temperature is changing, and less when it isn't?
+# Otherwise we send every WINDOWS_PER_SEND windows.
+ADAPTIVE_CADENCE = True
+MIN_SEND_INTERVAL = 2  # seconds, while things are changing
+MAX_SEND_INTERVAL = 15 # seconds, the heartbeat when they aren't; keep it under the receiver's LISTEN_TIMEOUT!
+WIND_CHANGE_MPH = 1.5  # this much change since the last packet, or this much gustiness, counts as changing
+TEMPERATURE_CHANGE_F = 0.5
+
+# With USE_ASYNCIO, put our clock and when we'll send next in every packet, so the receiver
+# can turn its radio on just for then (see listen_schedule.py). Then we have to keep to that time:
+# a change in the weather can only shorten the interval after the next send.
+TIME_SYNC = True
+
+# With USE_ASYNCIO, how often to sample each thing, and how old its last value can get - the staleness
+# budget - before we stop sending it: (period, max age) in seconds. The temperature etc. don't change fast;
+# the sensor does all three in one measurement, so the ones that come due together share it.
+# The wind's counted all the time; its period is COLLECTION_TIME, the counting window.
+SAMPLE_PERIODS = {
+    piwx_constants.DICT_KEY_TEMPERATURE:       (30, 120),
+    piwx_constants.DICT_KEY_HUMIDITY:          (120, 600),
+    piwx_constants.DICT_KEY_PRESSURE:          (300, 900),
+    piwx_constants.DICT_KEY_CPU_TEMPERATURE:   (60, 300),
+    piwx_constants.DICT_KEY_RADIO_TEMPERATURE: (300, 900),
+    }
+WIND_MAX_AGE = 2 * MAX_SEND_INTERVAL
+
+# FIXME: for testing - send random wind instead of what the anemometer counts.
+USE_RANDOM_WIND = True
+
+# Print what we're doing every pass? The f-strings make garbage, and garbage collection stalls pulse counting.
+DEBUG = False
+
 # endregion defines
 # region functions
 
@@ -107,20 +161,13 @@ def init_radio(neo_pix):
     return radio
 
 
-# Is this correct? oversimplistic? (it's assuming the count is linear w/r/t windspeed).
-# This comes from 
-COUNT_TO_MPH_CONST = 0.2
+# Pulses per second -> MPH. Not linear, near the bottom - see calibration.py, and settings.toml for the curve.
+# The default is derived from interfacing-anemometer-npn-pulse-output-with-arduino.
+CALIBRATION = calibration.load()
 
 def count_to_mph(count, period):
     """Return the MPH implied by the given count over the indicated period in seconds."""
-
-    # Derived from interfacing-anemometer-npn-pulse-output-with-arduino
-    #
-    # meters_per_second = count_per_second * 0.0875;
-    # or, close enough,
-    # mph = count_per_second * 0.2
-    # ???
-    return count / period * COUNT_TO_MPH_CONST
+    return CALIBRATION.mph(count / period)
 
 
 def create_initial_data_dict():
@@ -128,61 +175,90 @@ def create_initial_data_dict():
     return {}
 
 
+def read_sensor(data_dict, sensor):
+    """Put the sensor's readings in the dict."""
+    use_reading(data_dict, sensor.read() if sensor.is_ok() else None)
+
+
+def use_reading(data_dict, reading):
+    """Put a sensors.Reading in the dict: the temperature, and pressure and humidity if we have them.
+    If there's no sensor (reading is None) we leave them out, and the receiver shows its placeholders."""
+
+    if reading is None or reading.temperature is None:
+        data_dict.pop(piwx_constants.DICT_KEY_TEMPERATURE, None)
+        return
+    data_dict[piwx_constants.DICT_KEY_TEMPERATURE] = (reading.temperature * 9 / 5) + 32
+    if reading.pressure is not None:
+        data_dict[piwx_constants.DICT_KEY_PRESSURE] = reading.pressure
+    if reading.humidity is not None:
+        data_dict[piwx_constants.DICT_KEY_HUMIDITY] = reading.humidity
+
+
 def update_data_dict(data_dict, sensor, anemom):
-    """Populate with the *display values* for the receiving station to show."""
+    """Populate with the values for the receiving station to show. They go over the air as scaled integers."""
 
-    # Get the temperature.
-    if sensor.is_ok():
-        temp = sensor.temperature()
-        temp_f = (temp * 9 / 5) + 32
-        data_dict[piwx_constants.DICT_KEY_TEMPERATURE] = f"{temp_f:2.0f}" # TODO: negative? >100?
-    else:
-        data_dict[piwx_constants.DICT_KEY_TEMPERATURE] = piwx_constants.DICT_VALUE_NO_THERMOMETER
+    read_sensor(data_dict, sensor)
 
-    USE_RANDOM_WIND = True
     if USE_RANDOM_WIND:
-        # FIXME: for testing
         anemom_count = random.randint(0, 60)
     else:
         # Caclulate wind speed.
         anemom_count = anemom.get_raw(COLLECTION_TIME)
 
     mph = count_to_mph(anemom_count, COLLECTION_TIME)
-    print(f" {anemom_count=} -> {mph} MPH")
-
+    print(f" {anemom_count=} -> {mph} MPH") if DEBUG else True
 
-    # Keep windspeed as a string, with 1/10th mph precision.
-    data_dict[piwx_constants.DICT_KEY_WIND] = f"{mph:2.1f}"
+    # Windspeed goes with 1/10th mph precision.
+    data_dict[piwx_constants.DICT_KEY_WIND] = mph
 
     return data_dict
 
 
-def main():
-    """This has our forever processing loop."""
+def build_packet(packet_buffer, encoder, data_dict, wind_history, batch, sequence, next_send_ms=None):
+    """Write the next packet, numbered 'sequence', into the buffer and return its length
+    - or 0 if there's nothing to send yet. Nothing here allocates, so we can do it every pass.
+    With next_send_ms it's a time-sync packet, saying we'll send the next one that many ms from now."""
 
-    # Turn off neopixel
-    neo = neopixel.NeoPixel(board.NEOPIXEL, 1)
-    neo.fill(0)
+    tx_ticks = None if next_send_ms is None else supervisor.ticks_ms()
 
-    ## Set up whichever temperature sensor is attatched.
-    sensor = sensors.Sensor()
-    if sensor is None:
-        print("**** No p/t/h sensor???")
+    wind = data_dict[piwx_constants.DICT_KEY_WIND]
 
-    ## Our anemometer interface.
-    anemometer = anemom.Anemom(board.D12, LED_DATA_SEND_COLOR, debug=False, neopixel=neo)
+    if batch is not None:
+        # Keep collecting at the usual pace, but only wake the radio when the batch is full.
+        batch.add(supervisor.ticks_ms(), wind, data_dict.get(piwx_constants.DICT_KEY_TEMPERATURE))
+        if not batch.is_full():
+            return 0
+        length = piwx_packet.encode_into(packet_buffer.buffer, data_dict, samples=batch, sequence=sequence)
+        batch.clear()
+        return length
+
+    length = encoder.encode_into(packet_buffer.buffer, data_dict, wind_history, sequence, tx_ticks, next_send_ms)
+    if wind_history is not None:
+        wind_history.add(wind)
+    return length
+
+
+def make_packet_builders():
+    """Everything the packets are built with, made once: (packet buffer, encoder, wind history, batch)."""
+
+    packet_buffer = piwx_packet.PacketBuffer(MAX_RFM_MSG_LEN)
+    encoder = piwx_packet.DeltaEncoder(KEYFRAME_INTERVAL)
+    wind_history = piwx_packet.WindHistory(HISTORY_DEPTH) if HISTORY_DEPTH > 0 else None
+    batch = None
+    if BATCH_SIZE > 1:
+        batch = piwx_packet.SampleBatch(min(BATCH_SIZE, piwx_packet.batch_size_limit(MAX_RFM_MSG_LEN)))
+    return packet_buffer, encoder, wind_history, batch
 
-    ## Initialize RFM69 radio
-    radio = None
-    if ACTUALLY_SEND:
-        radio = init_radio(neo)
-    else:
-        print("\n\n****************** NOT USING RADIO!!!!! \n\n")
+
+def run_blocking(radio, neo, sensor, anemometer):
+    """The original loop: count the anemometer, send, sleep; repeat. The anemometer goes uncounted
+    for everything but COLLECTION_TIME, so we only see about a quarter of the wind."""
 
     packet_count = 0
     time_start = time.time() # seconds
 
     data_dict = create_initial_data_dict()
+    packet_buffer, encoder, wind_history, batch = make_packet_builders()
 
     print(f"\nSending data every {SEND_DELAY} seconds at most.\n")
 
@@ -191,14 +267,10 @@ def main():
         # Create the data dictionary to send.
         data_dict = update_data_dict(data_dict, sensor, anemometer)
 
-        # The message can get kinda long; remove un-needed spaces.
-        msg_to_send = json.dumps(data_dict).replace(" ", "")
-
         # Augment with some status data?
         uptime = time.time() - time_start
         # print(f" Uptime: {uptime} seconds")
-        data_dict['U'] = uptime
-        msg_augmented = json.dumps(data_dict).replace(" ", "")
+        data_dict[piwx_constants.DICT_KEY_UPTIME] = uptime
 
         # TODO: also send CPU or radio temperature? (that is, device temp)
         # if radio is not None:
@@ -206,15 +278,15 @@ def main():
 
         # Other things we could send: RSSI, power level.
 
-        # Only send extra stuff if we have room.
-        if len(msg_augmented) <= MAX_RFM_MSG_LEN:
-            msg_to_send = msg_augmented
-        else:
-            print(f"Full data packet too large! {len(msg_augmented)=}")
-            print(f"  ie: {msg_augmented}")
+        # This leaves out the status data if it would make the packet too long.
+        # Every packet gets the next sequence number, so the receiver can count what it missed.
+        length = build_packet(packet_buffer, encoder, data_dict, wind_history, batch, packet_count)
+        if length == 0: # still batching, or it didn't fit
+            time.sleep(SEND_DELAY)
+            continue
 
         packet_count += 1
-        print(f"({ACTUALLY_SEND=}) Sending packet #{packet_count}, {len(msg_to_send)} chars: {msg_to_send}\n")
+        print(f"({ACTUALLY_SEND=}) Sending packet #{packet_count}, {length} bytes: {data_dict}\n") if DEBUG else True
         try:
             neo.fill(LED_POST_SEND_COLOR)
             if radio is not None:
@@ -224,7 +296,7 @@ def main():
                 time.sleep(LED_POST_SEND_BLINK)
                 neo.fill(LED_COLOR_OFF)
 
-                radio.send(msg_to_send)
+                radio.send(packet_buffer.view(length))
             time.sleep(LED_POST_SEND_BLINK)
 
         except AssertionError:
@@ -237,10 +309,259 @@ def main():
         # we never exit the send loop.
 
 
+class AdaptiveCadence():
+    """Decides when to send: every MIN_SEND_INTERVAL while the wind or temperature is changing,
+    stretching out to MAX_SEND_INTERVAL - the heartbeat - when it's flat. Feed it every counting window."""
+
+    # Smoothing for the gustiness, per window.
+    GAIN = 1 / 8
+
+    # Windows come every COLLECTION_TIME, give or take the task scheduling, so don't miss one by a hair.
+    SLACK = 0.25
+
+    def __init__(self, min_interval=MIN_SEND_INTERVAL, max_interval=MAX_SEND_INTERVAL,
+                 wind_change=WIND_CHANGE_MPH, temperature_change=TEMPERATURE_CHANGE_F, committed=False):
+        """If committed, the interval only changes at a send, so we always send when we said we would."""
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._wind_change = wind_change
+        self._variance_limit = wind_change * wind_change
+        self._temperature_change = temperature_change
+        self._committed = committed
+        self._changing = False
+        self.interval = min_interval
+        self._last_send = None
+        self._sent_wind = 0.0
+        self._sent_temperature = None
+        self._wind_sum = 0.0
+        self._n_winds = 0
+        self._wind_mean = 0.0
+        self._wind_variance = 0.0
+
+    def should_send(self, now, wind, temperature):
+        """Add one window's wind (and the latest temperature, or None); return True if it's time to send.
+        now is in seconds - time.monotonic()."""
+
+        self._wind_sum += wind
+        self._n_winds += 1
+        deviation = wind - self._wind_mean
+        self._wind_mean += deviation * self.GAIN
+        self._wind_variance += (deviation * deviation - self._wind_variance) * self.GAIN
+
+        if self._last_send is None:
+            return True
+
+        # What we'd send now, vs. what the receiver has.
+        changing = (abs(self._wind_sum / self._n_winds - self._sent_wind) >= self._wind_change
+                    or self._wind_variance >= self._variance_limit)
+        if temperature is not None and self._sent_temperature is not None:
+            changing = changing or abs(temperature - self._sent_temperature) >= self._temperature_change
+        if changing:
+            self._changing = True
+            if not self._committed:
+                self.interval = self._min_interval
+
+        return now - self._last_send >= self.interval - self.SLACK
+
+    def sent(self, now, wind, temperature):
+        """We just sent; back off, unless things change again."""
+        self._last_send = now
+        self._sent_wind = wind
+        self._sent_temperature = temperature
+        self._wind_sum = 0.0
+        self._n_winds = 0
+        if self._changing:
+            self.interval = self._min_interval
+        else:
+            self.interval = min(self.interval * 2, self._max_interval)
+        self._changing = False
+
+
+class Outbox():
+    """Hands a built packet from packet_task to radio_task: the length of what's in the packet buffer.
+    There's only the one buffer, but radio.send() never awaits, so a packet can't change under it mid-send."""
+
+    def __init__(self):
+        self.length = 0
+        self.ready = asyncio.Event()
+        self.unsent = 0 # packets built over before the radio got to them
+
+
+def make_sample_schedule(data_dict, sensor, radio):
+    """Everything we sample, at its own SAMPLE_PERIODS rate. If there's no sensor (or it has no pressure, say)
+    we leave those out, and the receiver shows its placeholders."""
+
+    schedule = sample_schedule.SampleSchedule(data_dict)
+    if sensor.is_ok():
+        period, max_age = SAMPLE_PERIODS[piwx_constants.DICT_KEY_TEMPERATURE]
+        schedule.add(piwx_constants.DICT_KEY_TEMPERATURE, period, max_age,
+                     lambda reading: None if reading.temperature is None else (reading.temperature * 9 / 5) + 32,
+                     sensor)
+        if sensor.has_pressure():
+            period, max_age = SAMPLE_PERIODS[piwx_constants.DICT_KEY_PRESSURE]
+            schedule.add(piwx_constants.DICT_KEY_PRESSURE, period, max_age, lambda reading: reading.pressure, sensor)
+        if sensor.has_humidity():
+            period, max_age = SAMPLE_PERIODS[piwx_constants.DICT_KEY_HUMIDITY]
+            schedule.add(piwx_constants.DICT_KEY_HUMIDITY, period, max_age, lambda reading: reading.humidity, sensor)
+
+    period, max_age = SAMPLE_PERIODS[piwx_constants.DICT_KEY_CPU_TEMPERATURE]
+    schedule.add(piwx_constants.DICT_KEY_CPU_TEMPERATURE, period, max_age, lambda: microcontroller.cpu.temperature)
+    if radio is not None:
+        period, max_age = SAMPLE_PERIODS[piwx_constants.DICT_KEY_RADIO_TEMPERATURE]
+        schedule.add(piwx_constants.DICT_KEY_RADIO_TEMPERATURE, period, max_age, lambda: radio.temperature)
+
+    # Pushed by packet_task, from the anemometer's windows.
+    schedule.add(piwx_constants.DICT_KEY_WIND, COLLECTION_TIME, WIND_MAX_AGE)
+    return schedule
+
+
+async def packet_task(windows, gusts, data_dict, outbox, packet_buffer, encoder, wind_history, batch, cadence,
+                      schedule=None):
+    """Turn counting windows into packets for the radio task: as often as the cadence says,
+    or every WINDOWS_PER_SEND windows if there isn't one. Each packet has the peak gust since the last,
+    from the anemometer's anemom.GustTracker. Everything else in it is whatever the schedule last sampled."""
+
+    time_start = time.time() # seconds
+    sequence = 0
+    count = 0
+    rate_sum = 0.0
+    n_windows = 0
+    while True:
+        # The rate is pulses per second - from the count, or in light wind, the times between pulses.
+        _, window_count, window_rate = await windows.get()
+        if USE_RANDOM_WIND:
+            window_count = random.randint(0, 60)
+            window_rate = window_count / COLLECTION_TIME
+        count += window_count
+        rate_sum += window_rate
+        n_windows += 1
+
+        if cadence is not None:
+            now = time.monotonic()
+            temperature = data_dict.get(piwx_constants.DICT_KEY_TEMPERATURE)
+            if not cadence.should_send(now, count_to_mph(window_rate, 1), temperature):
+                continue
+        elif n_windows < WINDOWS_PER_SEND:
+            continue
+
+        wind = count_to_mph(rate_sum, n_windows) # the mean rate
+        data_dict[piwx_constants.DICT_KEY_WIND] = wind
+        if schedule is not None:
+            schedule.updated(piwx_constants.DICT_KEY_WIND, time.monotonic())
+        if USE_RANDOM_WIND:
+            data_dict[piwx_constants.DICT_KEY_GUST] = wind + random.randint(0, 10)
+        elif gusts.peak >= 0:
+            # Never less than the average; the gust span can be a bit out of step with the windows.
+            data_dict[piwx_constants.DICT_KEY_GUST] = max(wind, count_to_mph(gusts.peak, gusts.seconds))
+        gusts.reset()
+        data_dict[piwx_constants.DICT_KEY_UPTIME] = time.time() - time_start
+        print(f" {count=} in {n_windows} windows -> {data_dict}") if DEBUG else True
+        count = 0
+        rate_sum = 0.0
+        n_windows = 0
+        if cadence is not None:
+            cadence.sent(now, wind, temperature)
+
+        # Batches go out when they're full, which we don't know ahead of time.
+        next_send_ms = None
+        if TIME_SYNC and batch is None:
+            interval = cadence.interval if cadence is not None else WINDOWS_PER_SEND * COLLECTION_TIME
+            next_send_ms = int(interval * 1000)
+
+        length = build_packet(packet_buffer, encoder, data_dict, wind_history, batch, sequence, next_send_ms)
+        if length == 0: # still batching, or it didn't fit
+            continue
+        sequence += 1
+        if outbox.length:
+            outbox.unsent += 1
+        outbox.length = length
+        outbox.ready.set()
+
+
+async def radio_task(radio, packet_buffer, outbox, sent):
+    """Send each packet as soon as it's built, and tell the LED task."""
+    while True:
+        await outbox.ready.wait()
+        outbox.ready.clear()
+        length = outbox.length
+        outbox.length = 0
+        try:
+            if radio is not None:
+                radio.send(packet_buffer.view(length))
+        except AssertionError as e:
+            print(f"*** Sending packet failed: {e}")
+        sent.set()
+
+
+async def led_task(neo, sent):
+    """Blink after every send - without holding anything else up while it's lit."""
+    while True:
+        await sent.wait()
+        sent.clear()
+        neo.fill(LED_POST_SEND_COLOR)
+        await asyncio.sleep(LED_POST_SEND_BLINK)
+        neo.fill(LED_COLOR_OFF)
+
+
+async def run_tasks(radio, neo, sensor, anemometer):
+    """The anemometer counts continuously in its own task; everything else happens around it."""
+
+    data_dict = create_initial_data_dict()
+    packet_buffer, encoder, wind_history, batch = make_packet_builders()
+    windows = anemom.PulseWindows()
+    outbox = Outbox()
+    sent = asyncio.Event()
+    cadence = AdaptiveCadence(committed=TIME_SYNC) if ADAPTIVE_CADENCE else None
+    schedule = make_sample_schedule(data_dict, sensor, radio)
+
+    if cadence is None:
+        print(f"\nSending data every {WINDOWS_PER_SEND * COLLECTION_TIME} seconds.\n")
+    else:
+        print(f"\nSending data every {MIN_SEND_INTERVAL} to {MAX_SEND_INTERVAL} seconds.\n")
+
+    await asyncio.gather(
+        asyncio.create_task(anemometer.count_windows(COLLECTION_TIME, windows)),
+        asyncio.create_task(schedule.run()),
+        asyncio.create_task(packet_task(windows, anemometer.gusts, data_dict, outbox, packet_buffer, encoder,
+                                        wind_history, batch, cadence, schedule)),
+        asyncio.create_task(radio_task(radio, packet_buffer, outbox, sent)),
+        asyncio.create_task(led_task(neo, sent)),
+        )
+
+
+def main():
+    """Set up the hardware, then run forever."""
+
+    # Turn off neopixel
+    neo = neopixel.NeoPixel(board.NEOPIXEL, 1)
+    neo.fill(0)
+
+    ## Set up whichever temperature sensor is attatched.
+    sensor = sensors.Sensor()
+    if sensor is None:
+        print("**** No p/t/h sensor???")
+
+    ## Our anemometer interface.
+    anemometer = anemom.Anemom(board.D12, LED_DATA_SEND_COLOR, debug=False, neopixel=neo)
+
+    ## Initialize RFM69 radio
+    radio = None
+    if ACTUALLY_SEND:
+        radio = init_radio(neo)
+    else:
+        print("\n\n****************** NOT USING RADIO!!!!! \n\n")
+
+    if USE_ASYNCIO:
+        asyncio.run(run_tasks(radio, neo, sensor, anemometer))
+    else:
+        run_blocking(radio, neo, sensor, anemometer)
+
+
 # endregion functions
 # region main
 
-# do it!
-main()
+# do it! (but not if we're just being imported, say by a host-side tool)
+if __name__ == "__main__":
+    main()
 
 # endregion main
\ No newline at end of file
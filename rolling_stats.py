@@ -0,0 +1,242 @@
+"""
+    Pi-WX-Station
+    Rolling statistics for the receiver: min, max, mean and standard deviation of every numeric field
+    over the last minute, ten minutes and hour, all kept up to date together as packets arrive.
+
+    Each window is split into SLOTS time slots. A slot's readings are summed up as they come
+    (count, mean and Welford's sum of squared differences, min, max); when it's over, it's added
+    into the window's running totals, and the oldest slot that's fallen out of the window is taken
+    back out (Chan et al.'s pairwise update, both ways). Min and max come from monotonic deques
+    of slots, so they're amortized O(1) too. So every window of every field costs the same fixed
+    memory, however often packets come, and asking for any of it is just arithmetic on the totals.
+
+    The window's edge moves a slot at a time: the last minute is really the last 58 to 60 seconds.
+    It moves on with the clock, not just with readings: a field that stops coming, or a link that
+    goes quiet, empties out of the window rather than hanging on at its last figures.
+
+    (c)2025 rob cranfill
+    See https://github.com/RobCranfill/pi-wx-station
+"""
+
+import array
+import math
+
+import piwx_constants
+
+FIELDS = (piwx_constants.DICT_KEY_TEMPERATURE, piwx_constants.DICT_KEY_WIND, piwx_constants.DICT_KEY_GUST,
+          piwx_constants.DICT_KEY_PRESSURE, piwx_constants.DICT_KEY_HUMIDITY)
+WINDOWS_S = (60, 600, 3600)
+
+# Slots per window. 30 makes the hour's slots two minutes long, and it all comes to about
+# 12K bytes for five fields by three windows; see memory_bytes().
+SLOTS = 30
+
+
+class RollingWindow():
+    """One field, over one window of 'seconds'. add() readings, in time order."""
+
+    def __init__(self, seconds, slots=SLOTS):
+        self.seconds = seconds
+        self._slots = slots
+        self._slot_s = seconds / slots
+
+        # The finished slots still in the window, oldest first from _head.
+        self._ids = array.array('i', [0] * slots)
+        self._n = array.array('H', [0] * slots)
+        self._mean = array.array('f', [0] * slots)
+        self._m2 = array.array('f', [0] * slots)
+        self._min = array.array('f', [0] * slots)
+        self._max = array.array('f', [0] * slots)
+        self._head = 0
+        self._length = 0
+
+        # Monotonic deques, of positions in the slot ring: mins going up, maxes going down.
+        self._min_q = array.array('H', [0] * slots)
+        self._max_q = array.array('H', [0] * slots)
+        self._min_head = self._min_length = 0
+        self._max_head = self._max_length = 0
+
+        # The finished slots, all together.
+        self._total_n = 0
+        self._total_mean = 0.0
+        self._total_m2 = 0.0
+
+        # The slot we're in.
+        self._id = None
+        self._cur_n = 0
+        self._cur_mean = 0.0
+        self._cur_m2 = 0.0
+        self._cur_min = 0.0
+        self._cur_max = 0.0
+
+    def add(self, value, now):
+        """A reading at 'now' (seconds, time.monotonic())."""
+        self.expire(now)
+
+        # Welford.
+        self._cur_n += 1
+        delta = value - self._cur_mean
+        self._cur_mean += delta / self._cur_n
+        self._cur_m2 += delta * (value - self._cur_mean)
+        if self._cur_n == 1:
+            self._cur_min = self._cur_max = value
+        elif value < self._cur_min:
+            self._cur_min = value
+        elif value > self._cur_max:
+            self._cur_max = value
+
+    def expire(self, now):
+        """Move the window on to end at 'now', dropping what's fallen out of it."""
+        slot_id = int(now // self._slot_s)
+        if self._id is None or slot_id > self._id:
+            self._finish_slot()
+            self._id = slot_id
+            self._expire(slot_id)
+
+    def _finish_slot(self):
+        n = self._cur_n
+        if n == 0:
+            return
+        if self._length == self._slots: # can't be, after _expire(); but don't overrun
+            self._drop_oldest()
+        i = (self._head + self._length) % self._slots
+        self._ids[i] = self._id
+        self._n[i] = n
+        self._mean[i] = self._cur_mean
+        self._m2[i] = self._cur_m2
+        self._min[i] = self._cur_min
+        self._max[i] = self._cur_max
+        self._length += 1
+
+        # Into the totals.
+        total = self._total_n + n
+        delta = self._cur_mean - self._total_mean
+        self._total_mean += delta * n / total
+        self._total_m2 += self._cur_m2 + delta * delta * self._total_n * n / total
+        self._total_n = total
+
+        # Into the deques: anything at the back this slot beats can never be the min (or max) again.
+        size = self._slots
+        while self._min_length and self._min[self._min_q[(self._min_head + self._min_length - 1) % size]] >= self._cur_min:
+            self._min_length -= 1
+        self._min_q[(self._min_head + self._min_length) % size] = i
+        self._min_length += 1
+        while self._max_length and self._max[self._max_q[(self._max_head + self._max_length - 1) % size]] <= self._cur_max:
+            self._max_length -= 1
+        self._max_q[(self._max_head + self._max_length) % size] = i
+        self._max_length += 1
+
+        self._cur_n = 0
+        self._cur_mean = 0.0
+        self._cur_m2 = 0.0
+
+    def _expire(self, slot_id):
+        """Drop the slots that aren't in the window that ends with slot_id."""
+        while self._length and self._ids[self._head] <= slot_id - self._slots:
+            self._drop_oldest()
+
+    def _drop_oldest(self):
+        i = self._head
+        n = self._n[i]
+        total = self._total_n - n
+        if total == 0:
+            self._total_mean = 0.0
+            self._total_m2 = 0.0
+        else:
+            mean = self._mean[i]
+            rest_mean = (self._total_n * self._total_mean - n * mean) / total
+            delta = mean - rest_mean
+            self._total_m2 = max(0.0, self._total_m2 - self._m2[i] - delta * delta * total * n / self._total_n)
+            self._total_mean = rest_mean
+        self._total_n = total
+
+        if self._min_length and self._min_q[self._min_head] == i:
+            self._min_head = (self._min_head + 1) % self._slots
+            self._min_length -= 1
+        if self._max_length and self._max_q[self._max_head] == i:
+            self._max_head = (self._max_head + 1) % self._slots
+            self._max_length -= 1
+        self._head = (self._head + 1) % self._slots
+        self._length -= 1
+
+    def count(self):
+        return self._total_n + self._cur_n
+
+    def mean(self):
+        """None if there've been no readings in the window."""
+        n = self._total_n + self._cur_n
+        if n == 0:
+            return None
+        return self._total_mean + (self._cur_mean - self._total_mean) * self._cur_n / n
+
+    def stddev(self):
+        """Population standard deviation; None if no readings."""
+        n = self._total_n + self._cur_n
+        if n == 0:
+            return None
+        delta = self._cur_mean - self._total_mean
+        m2 = self._total_m2 + self._cur_m2 + delta * delta * self._total_n * self._cur_n / n
+        return math.sqrt(max(0.0, m2) / n)
+
+    def min(self):
+        if self._min_length:
+            low = self._min[self._min_q[self._min_head]]
+            return min(low, self._cur_min) if self._cur_n else low
+        return self._cur_min if self._cur_n else None
+
+    def max(self):
+        if self._max_length:
+            high = self._max[self._max_q[self._max_head]]
+            return max(high, self._cur_max) if self._cur_n else high
+        return self._cur_max if self._cur_n else None
+
+    def memory_bytes(self):
+        return sum(len(a) * a.itemsize for a in
+                   (self._ids, self._n, self._mean, self._m2, self._min, self._max, self._min_q, self._max_q))
+
+
+class RollingStats():
+    """Every field in 'fields', over every window in 'windows_s' seconds."""
+
+    def __init__(self, fields=FIELDS, windows_s=WINDOWS_S, slots=SLOTS):
+        self.fields = fields
+        self.windows_s = windows_s
+        self._windows = {}
+        for field in fields:
+            self._windows[field] = tuple(RollingWindow(seconds, slots) for seconds in windows_s)
+
+    def update(self, data_dict, now):
+        """Add a packet's values - the numeric ones; placeholders are strings. The others' windows move on too."""
+        for field in self.fields:
+            value = data_dict.get(field)
+            missing = value is None or isinstance(value, str)
+            for window in self._windows[field]:
+                if missing:
+                    window.expire(now)
+                else:
+                    window.add(value, now)
+
+    def expire(self, now):
+        """Move every window on to end at 'now' - when there's been no packet for a while."""
+        for windows in self._windows.values():
+            for window in windows:
+                window.expire(now)
+
+    def window(self, field, i):
+        """The RollingWindow for 'field' over windows_s[i]."""
+        return self._windows[field][i]
+
+    def summary_text(self, field, i, name, now):
+        """E.g. 'Wind 10m: 8.2 avg (3.1-17.4) sd 2.1' - for the status line - as of 'now'."""
+        window = self._windows[field][i]
+        window.expire(now)
+        seconds = self.windows_s[i]
+        period = f"{seconds // 3600}h" if seconds % 3600 == 0 else f"{seconds // 60}m"
+        if window.count() == 0:
+            return f"{name} {period}: no data"
+        return (f"{name} {period}: {window.mean():0.1f} avg "
+                f"({window.min():0.1f}-{window.max():0.1f}) sd {window.stddev():0.1f}")
+
+    def memory_bytes(self):
+        """What the preallocated arrays take - the fixed budget."""
+        return sum(window.memory_bytes() for windows in self._windows.values() for window in windows)
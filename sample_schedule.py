@@ -0,0 +1,189 @@
+"""
+    Pi-WX-Station
+    A multi-rate sampling schedule for the transmitter. Each source - the sensor's temperature,
+    pressure and humidity, the anemometer, the CPU and radio temperatures - has its own sampling
+    period, and a staleness budget: how old its last value can get and still go out in packets.
+    Slow things are read only when they're due; in between, their last values stay in the data dict
+    and go out again. A value older than its budget (the sensor's stopped answering, say) is taken
+    out of the dict, so the receiver shows its placeholder rather than old news.
+
+    Sources that come due together and share a group - the sensor's fields, which one forced
+    measurement gets all of - are read with one start_reading()/finish_reading() between them.
+    A source with no read function is pushed: something else puts its value in the dict and says
+    so with updated() - the anemometer's windows, which are counted all the time anyway.
+    A read that raises OSError - the sensor's dropped off the bus, say - counts as a failed read,
+    like one that gets nothing; the staleness budget says when its value goes.
+
+    (c)2025 rob cranfill
+    See https://github.com/RobCranfill/pi-wx-station
+"""
+
+import asyncio
+import time
+
+# With no polled sources, check for stale values this often (seconds).
+IDLE_SECONDS = 1.0
+
+
+class Source():
+    """One thing to sample. See SampleSchedule.add()."""
+
+    def __init__(self, key, period, max_age, read, group):
+        self.key = key
+        self.period = period
+        self.max_age = max_age
+        self.read = read
+        self.group = group
+        self.next_due = None  # None: due right away
+        self.last_good = None # when we last got a value
+        self.reads = 0
+        self.failures = 0     # reads that got nothing, or raised OSError
+        self.expired = 0      # times its value got too old and was taken out
+
+
+class SampleSchedule():
+    """The sources, and their values in data_dict."""
+
+    def __init__(self, data_dict):
+        self._data_dict = data_dict
+        self.sources = []
+        self.group_reads = 0    # start_reading()s, each shared by the sources due in its group
+        self.group_failures = 0 # start_reading()s or finish_reading()s that raised OSError
+
+        # Reused every pass, so sampling doesn't allocate lists.
+        self._due = []
+        self._groups = []
+        self._results = []
+
+    def add(self, key, period, max_age, read=None, group=None):
+        """Sample data_dict[key] every 'period' seconds; it can be up to 'max_age' seconds old.
+        read() returns the value, or None if it couldn't; with a group, it's read(group's reading),
+        where the group has start_reading() - returning seconds to wait - and finish_reading(),
+        like sensors.Sensor. With no read, the value's pushed; see updated()."""
+
+        if max_age < period:
+            raise ValueError(f"{key}: a staleness budget of {max_age}s is less than its period, {period}s")
+        source = Source(key, period, max_age, read, group)
+        self.sources.append(source)
+        return source
+
+    def source(self, key):
+        for source in self.sources:
+            if source.key == key:
+                return source
+        return None
+
+    def updated(self, key, now):
+        """A pushed source's value just went into the dict."""
+        source = self.source(key)
+        source.last_good = now
+        source.reads += 1
+
+    def due(self, now):
+        """The polled sources due at 'now'. (The same list every time.)"""
+        self._due.clear()
+        for source in self.sources:
+            if source.read is not None and (source.next_due is None or source.next_due <= now):
+                self._due.append(source)
+        return self._due
+
+    def next_due(self, now):
+        """When the next polled source is due; or a bit from now, if there aren't any."""
+        soonest = now + IDLE_SECONDS
+        for source in self.sources:
+            if source.read is not None:
+                if source.next_due is None:
+                    return now
+                soonest = min(soonest, source.next_due)
+        return soonest
+
+    def start(self, due):
+        """Start the readings the due sources' groups need; returns the seconds to wait before finish()."""
+        self._groups.clear()
+        self._results.clear()
+        wait = 0
+        for source in due:
+            if source.group is not None and source.group not in self._groups:
+                self._groups.append(source.group)
+                try:
+                    wait = max(wait, source.group.start_reading())
+                    self._results.append(True) # started; finish() puts the reading here
+                except OSError as e:
+                    self._group_failed(source.group, "start", e)
+                    self._results.append(None)
+        self.group_reads += len(self._groups)
+        return wait
+
+    def _group_failed(self, group, what, e):
+        self.group_failures += 1
+        print(f"*** {type(group).__name__}.{what}_reading() failed: {e}")
+
+    def finish(self, due, now):
+        """Read the due sources into the dict, and schedule them again; then take out anything stale."""
+        for i, group in enumerate(self._groups):
+            if self._results[i] is not None:
+                try:
+                    self._results[i] = group.finish_reading()
+                except OSError as e:
+                    self._group_failed(group, "finish", e)
+                    self._results[i] = None
+
+        for source in due:
+            value = None
+            try:
+                if source.group is None:
+                    value = source.read()
+                else:
+                    reading = self._results[self._groups.index(source.group)]
+                    if reading is not None:
+                        value = source.read(reading)
+            except OSError as e:
+                print(f"*** Reading {source.key} failed: {e}")
+            source.reads += 1
+            if value is None:
+                source.failures += 1
+            else:
+                self._data_dict[source.key] = value
+                source.last_good = now
+
+            # Keep to the beat; but if we've fallen a whole period behind, start again from now.
+            source.next_due = now + source.period if source.next_due is None else source.next_due + source.period
+            if source.next_due <= now:
+                source.next_due = now + source.period
+
+        self.expire(now)
+
+    def expire(self, now):
+        """Take values that are older than their budget out of the dict."""
+        for source in self.sources:
+            if source.last_good is not None and now - source.last_good > source.max_age:
+                self._data_dict.pop(source.key, None)
+                source.last_good = None
+                source.expired += 1
+
+    def age(self, key, now):
+        """How old data_dict[key] is, in seconds; None if there isn't one."""
+        source = self.source(key)
+        return None if source.last_good is None else now - source.last_good
+
+    def sample(self, now, wait=time.sleep):
+        """Read whatever's due at 'now', waiting for measurements with wait(seconds). Returns how many were read."""
+        due = self.due(now)
+        if due:
+            wait(self.start(due))
+            self.finish(due, now)
+        else:
+            self.expire(now)
+        return len(due)
+
+    async def run(self):
+        """Sample everything when it's due, forever; other tasks run while we wait for measurements."""
+        while True:
+            now = time.monotonic()
+            due = self.due(now)
+            if due:
+                await asyncio.sleep(self.start(due))
+                self.finish(due, now)
+            else:
+                self.expire(now)
+            await asyncio.sleep(max(0, self.next_due(now) - time.monotonic()))
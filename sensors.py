@@ -2,21 +2,196 @@
 
 This will, so far, either be an Adafruit BME280 temperature/pressure/humidity sensor,
 or a (slightly cheaper) Adafruit PCT2075 temperature-only sensor.
+
+The BME280 is driven directly, in forced mode: read() starts one measurement of all three,
+then gets them back in one burst - two I2C transactions in all - and the rest of the time
+the sensor sleeps. (The Adafruit library left it measuring continuously, and did a transaction
+or two for each value; all that heats the sensor up, and draws current.) How much oversampling
+and IIR filtering it does is a profile; see PROFILES.
 """
 
 import board
 import math
+import struct
+import time
 import traceback
 
-
-# Use the 'advanced' library - we have lots of RAM - altho do we *need* "advanced"??
-import adafruit_bme280.advanced as adafruit_bme280
+from adafruit_bus_device.i2c_device import I2CDevice
 import adafruit_pct2075
 
 
+# Which BME280 settings to use, from PROFILES.
+SENSOR_PROFILE = "weather station"
+
+# Oversampling for temperature, pressure and humidity (0 means skip it, or 1, 2, 4, 8, 16),
+# and the IIR filter coefficient for temperature and pressure (0 means off, or 2, 4, 8, 16).
+# More of either is quieter, but takes longer, so draws more current.
+PROFILES = {
+    # What Bosch recommends for weather monitoring: about 9 ms a measurement.
+    "low power":       (1, 1, 1, 0),
+    # Quieter, and the filter smooths out a gust on the sensor: about 30 ms.
+    "weather station": (2, 8, 2, 4),
+    # Bosch's indoor navigation: as quiet as pressure gets; about 45 ms.
+    "indoor":          (2, 16, 1, 16),
+    }
+
+BME280_ADDRESS = 0x77
+BME280_CHIP_ID = 0x60
+
+_REG_CALIBRATION_1 = 0x88 # 26 bytes
+_REG_CHIP_ID = 0xD0
+_REG_RESET = 0xE0
+_REG_CALIBRATION_2 = 0xE1 # 7 bytes
+_REG_CTRL_HUM = 0xF2
+_REG_CTRL_MEAS = 0xF4
+_REG_CONFIG = 0xF5
+_REG_DATA = 0xF7 # 8 bytes: pressure, temperature, humidity
+
+_MODE_SLEEP = 0
+_MODE_FORCED = 1
+_OVERSAMPLING_CODES = {0: 0, 1: 1, 2: 2, 4: 3, 8: 4, 16: 5}
+_FILTER_CODES = {0: 0, 2: 1, 4: 2, 8: 3, 16: 4}
+
+
+class Reading():
+    """One set of readings. Temperature in C, pressure in hPa, humidity in %; None for one we didn't get.
+    The same one is filled in every time, so reading doesn't allocate one."""
+    def __init__(self):
+        self.temperature = None
+        self.pressure = None
+        self.humidity = None
+
+
+def measure_seconds(profile):
+    """The longest a forced measurement can take, from the BME280 datasheet (9.1)."""
+    osrs_t, osrs_p, osrs_h, _ = profile
+    ms = 1.25 + 2.3 * osrs_t
+    if osrs_p:
+        ms += 2.3 * osrs_p + 0.575
+    if osrs_h:
+        ms += 2.3 * osrs_h + 0.575
+    return ms / 1000
+
+
+class BME280Forced():
+    """A BME280, in forced mode. start() a measurement, wait, finish() it; or read() does all that."""
+
+    def __init__(self, i2c, address=BME280_ADDRESS, profile=SENSOR_PROFILE):
+        self._device = I2CDevice(i2c, address)
+        self._data = bytearray(8)
+        self._register = bytearray(1)
+        self._command = bytearray(2)
+        self.reading = Reading()
+
+        chip_id = self._read(_REG_CHIP_ID, bytearray(1))[0]
+        if chip_id != BME280_CHIP_ID:
+            raise RuntimeError(f"Not a BME280: chip id {chip_id:#x}")
+        self._write(_REG_RESET, 0xB6)
+        time.sleep(0.002)
+
+        # Bosch's compensation parameters, from the sensor's NVM.
+        cal = self._read(_REG_CALIBRATION_1, bytearray(26))
+        (self._t1, self._t2, self._t3,
+         self._p1, self._p2, self._p3, self._p4, self._p5, self._p6, self._p7, self._p8, self._p9
+         ) = struct.unpack("<HhhHhhhhhhhh", cal[:24])
+        self._h1 = cal[25]
+        cal = self._read(_REG_CALIBRATION_2, bytearray(7))
+        self._h2, self._h3 = struct.unpack("<hB", cal[:3])
+        self._h4 = _signed_12((cal[3] << 4) | (cal[4] & 0x0F))
+        self._h5 = _signed_12((cal[5] << 4) | (cal[4] >> 4))
+        self._h6 = struct.unpack("<b", cal[6:7])[0]
+
+        self.set_profile(profile)
+
+    def set_profile(self, profile):
+        """A name from PROFILES, or (osrs_t, osrs_p, osrs_h, iir) like they are."""
+        if isinstance(profile, str):
+            if profile not in PROFILES:
+                raise ValueError(f"No sensor profile {profile!r}; there's {', '.join(PROFILES)}")
+            profile = PROFILES[profile]
+        osrs_t, osrs_p, osrs_h, iir = profile
+        if (osrs_t not in _OVERSAMPLING_CODES or osrs_p not in _OVERSAMPLING_CODES
+                or osrs_h not in _OVERSAMPLING_CODES or iir not in _FILTER_CODES):
+            raise ValueError(f"Bad sensor profile {profile}")
+        self.profile = profile
+        self.measure_seconds = measure_seconds(profile)
+
+        # ctrl_hum only counts after a write to ctrl_meas; and the filter setting only sticks while asleep.
+        self._write(_REG_CTRL_HUM, _OVERSAMPLING_CODES[osrs_h])
+        self._write(_REG_CONFIG, _FILTER_CODES[iir] << 2)
+        self._ctrl_meas = (_OVERSAMPLING_CODES[osrs_t] << 5) | (_OVERSAMPLING_CODES[osrs_p] << 2)
+        self._write(_REG_CTRL_MEAS, self._ctrl_meas | _MODE_SLEEP)
+
+    def start(self):
+        """Start a measurement. Returns how many seconds to wait before finish(). It goes back to sleep by itself."""
+        self._write(_REG_CTRL_MEAS, self._ctrl_meas | _MODE_FORCED)
+        return self.measure_seconds
+
+    def finish(self):
+        """Read the measurement start() started - all of it, in one go - into self.reading, and return that."""
+        data = self._read(_REG_DATA, self._data)
+        adc_p = (data[0] << 12) | (data[1] << 4) | (data[2] >> 4)
+        adc_t = (data[3] << 12) | (data[4] << 4) | (data[5] >> 4)
+        adc_h = (data[6] << 8) | data[7]
+        reading = self.reading
+        reading.temperature = reading.pressure = reading.humidity = None
+
+        # Bosch's floating-point compensation formulas, from the datasheet (8.1).
+        if adc_t == 0x80000: # skipped; and we need it for the others
+            return reading
+        var1 = (adc_t / 16384.0 - self._t1 / 1024.0) * self._t2
+        var2 = (adc_t / 131072.0 - self._t1 / 8192.0) ** 2 * self._t3
+        t_fine = var1 + var2
+        reading.temperature = t_fine / 5120.0
+
+        if adc_p != 0x80000:
+            var1 = t_fine / 2.0 - 64000.0
+            var2 = var1 * var1 * self._p6 / 32768.0
+            var2 = var2 + var1 * self._p5 * 2.0
+            var2 = var2 / 4.0 + self._p4 * 65536.0
+            var1 = (self._p3 * var1 * var1 / 524288.0 + self._p2 * var1) / 524288.0
+            var1 = (1.0 + var1 / 32768.0) * self._p1
+            if var1 != 0:
+                p = 1048576.0 - adc_p
+                p = (p - var2 / 4096.0) * 6250.0 / var1
+                var1 = self._p9 * p * p / 2147483648.0
+                var2 = p * self._p8 / 32768.0
+                reading.pressure = (p + (var1 + var2 + self._p7) / 16.0) / 100
+
+        if adc_h != 0x8000:
+            h = t_fine - 76800.0
+            h = ((adc_h - (self._h4 * 64.0 + self._h5 / 16384.0 * h))
+                 * (self._h2 / 65536.0 * (1.0 + self._h6 / 67108864.0 * h * (1.0 + self._h3 / 67108864.0 * h))))
+            h = h * (1.0 - self._h1 * h / 524288.0)
+            reading.humidity = min(100.0, max(0.0, h))
+
+        return reading
+
+    def read(self):
+        """start(), wait, finish()."""
+        time.sleep(self.start())
+        return self.finish()
+
+    def _write(self, register, value):
+        self._command[0] = register
+        self._command[1] = value
+        with self._device as device:
+            device.write(self._command)
+
+    def _read(self, register, buffer):
+        self._register[0] = register
+        with self._device as device:
+            device.write_then_readinto(self._register, buffer)
+        return buffer
+
+
+def _signed_12(value):
+    return value - 4096 if value & 0x800 else value
+
+
 class Sensor():
     """This will try to connnect to either of the two kinds of sensors I have."""
-    def __init__(self):
+    def __init__(self, profile=SENSOR_PROFILE):
         self._has_temperature = False
         self._has_pressure = False
         self._has_humidity = False
@@ -24,6 +199,8 @@ class Sensor():
         self._is_bme280 = False
         self._is_pct2075 = False
 
+        self._reading = Reading()
+
 
         # The temperature/humidity/pressure sensor, if any.
         sensor = None
@@ -40,12 +217,13 @@ class Sensor():
         if i2c_ok:
 
             try:
-                sensor = adafruit_bme280.Adafruit_BME280_I2C(i2c)
-                print("BME280 temperature/pressure/humidity sensor OK!")
+                sensor = BME280Forced(i2c, profile=profile)
+                print(f"BME280 temperature/pressure/humidity sensor OK! Profile {profile!r}")
                 self._is_bme280 = True
                 self._has_temperature = True
-                self._has_pressure = True
-                self._has_humidity = True
+                self._has_pressure = sensor.profile[1] != 0
+                self._has_humidity = sensor.profile[2] != 0
+                self._reading = sensor.reading
             except Exception as e:
                 print("\n**** No BME280 sensor?")
                 # traceback.print_exception(e)
@@ -89,21 +267,40 @@ class Sensor():
         """Does this sensor sense humidity?"""
         return self._has_humidity
 
+    def start_reading(self):
+        """Start a measurement; returns how many seconds to wait - asyncio.sleep(), say - before finish_reading()."""
+        if self._is_bme280:
+            return self._sensor.start()
+        return 0
+
+    def finish_reading(self):
+        """The Reading start_reading() started. It's the same Reading every time."""
+        if self._is_bme280:
+            return self._sensor.finish()
+        self._reading.temperature = self._sensor.temperature
+        return self._reading
+
+    def read(self):
+        """Everything the sensor has, in one go; blocks while it measures."""
+        time.sleep(self.start_reading())
+        return self.finish_reading()
+
+    # These each take a measurement of their own; read() gets all three for the price of one.
+
     def temperature(self):
         if not self._has_temperature:
             print("Sensor has no temperature???")
             return math.NaN # FIXME
-        return self._sensor.temperature
+        return self.read().temperature
 
     def pressure(self):
         if not self.has_pressure:
             print("Sensor has no pressure???")
             return None # FIXME
-        return self._sensor.pressure
+        return self.read().pressure
 
     def humidity(self):
         if not self._has_humidity:
             print("Sensor has no humidity???")
             return None # FIXME
-        return self._sensor.humidity
-
+        return self.read().humidity
@@ -9,12 +9,19 @@
     
     Also, only required glyphs ([0-9], [' '], [MTW?]) are kept in the font file, to keep it small.
 
+    tools/compile_font.py compiles the BDF fonts into packed binary ones - .pbf - which PackedFont
+    reads a glyph at a time, rather than parsing the whole BDF for them.
+
 """
 import random
 import time
 
+import struct
+
+import bitmaptools
 import board
 import displayio
+import fontio
 import fourwire
 import pwmio
 import terminalio
@@ -27,16 +34,296 @@ import adafruit_ili9341
 
 DEFAULT_FONT_PATH = "fonts/LeagueSpartanBold-piwx.bdf"
 
+# Use the packed version of the font - the same name, but .pbf - if there is one?
+USE_PACKED_FONT = True
+
+# The characters we show in the big font; tools/compile_font.py keeps just these.
+FONT_CHARACTERS = "0123456789 MTW?"
+
+# The packed font format: a header, an index of glyphs sorted by code point, then the glyphs' bitmaps -
+# rows of 1-bit pixels, most significant bit first, padded to a byte, like BDF's hex but binary.
+PACKED_MAGIC = b"PWXF"
+PACKED_VERSION = 1
+PACKED_HEADER = "<4sBBHhhhhhh" # magic, version, 0, glyphs, bounding box w h x y, ascent, descent
+PACKED_INDEX = "<HHHhhhI"      # code point, width, height, dx, dy, shift_x, offset of its bitmap
+
 DISPLAY_HEIGHT = 240
 DISPLAY_WIDTH  = 320
 
+# What's changed since the last refresh().
+DIRTY_TEXT   = 0x01
+DIRTY_COLOR  = 0x02
+DIRTY_STATUS = 0x04
+DIRTY_DETAIL = 0x08
+
+# Render the big values once each, and keep them - up to this many bytes of bitmaps - rather than
+# having bitmap_label rebuild its bitmap every time? Each is about 9 KB.
+USE_VALUE_CACHE = True
+VALUE_CACHE_BYTES = 64 * 1024
+
+# When a value's shown, get the ones this far either side of it ready in idle time.
+WARM_UP_NEIGHBOURS = 1
+
+# Values are made of these; warm_up() loads their glyphs this many at a time, before anything else.
+WARM_UP_CHARACTERS = "0123456789 TW?"
+WARM_UP_GLYPHS = 4
+
+# Don't throw out the last this-many values shown - the temperature and the wind take turns.
+KEEP_SHOWN = 2
+
+
+class PackedFont():
+    """A font compiled by tools/compile_font.py. Only the index is kept in memory; get_glyph() seeks
+    to a glyph's bitmap and reads it straight into a displayio.Bitmap, every time - which is quick,
+    and means the glyphs don't sit on the heap."""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        header = self._file.read(struct.calcsize(PACKED_HEADER))
+        magic, version, _, n_glyphs, w, h, x, y, self.ascent, self.descent = struct.unpack(PACKED_HEADER, header)
+        if magic != PACKED_MAGIC or version != PACKED_VERSION:
+            raise ValueError(f"{path} isn't a version {PACKED_VERSION} packed font")
+        self._bounding_box = (w, h, x, y)
+
+        entry_size = struct.calcsize(PACKED_INDEX)
+        index = self._file.read(n_glyphs * entry_size)
+        self._index = {}
+        for i in range(n_glyphs):
+            entry = struct.unpack_from(PACKED_INDEX, index, i * entry_size)
+            self._index[entry[0]] = entry[1:]
+        self.glyphs_read = 0
+
+    def get_bounding_box(self):
+        return self._bounding_box
+
+    def get_glyph(self, code_point):
+        entry = self._index.get(code_point)
+        if entry is None:
+            return None
+        width, height, dx, dy, shift_x, offset = entry
+        bitmap = displayio.Bitmap(max(1, width), max(1, height), 2)
+        if width and height:
+            self._file.seek(offset)
+            bitmaptools.readinto(bitmap, self._file, 1, 1)
+        self.glyphs_read += 1
+        return fontio.Glyph(bitmap, 0, width, height, dx, dy, shift_x, 0)
+
+
+def load_font(path, packed=USE_PACKED_FONT):
+    """The packed version of the font, if there is one and we want it; or the BDF."""
+    if packed:
+        packed_path = path.rsplit(".", 1)[0] + ".pbf"
+        try:
+            return PackedFont(packed_path)
+        except OSError:
+            print(f"* No {packed_path}? Using {path}.")
+    return bitmap_font.load_font(path)
+
+
+def bitmap_bytes(width, height, value_count):
+    """How much memory a displayio.Bitmap takes: rows are padded to 32 bits."""
+    bits = 1
+    while (1 << bits) < value_count:
+        bits *= 2
+    return (width * bits + 31) // 32 * 4 * height
+
+
+def neighbours(text, n=WARM_UP_NEIGHBOURS):
+    """Values near a number, formatted the same way: ' 9' -> [' 8', '10']. Nothing for non-numbers."""
+    try:
+        value = int(text)
+    except ValueError:
+        return []
+    result = []
+    for i in range(1, n + 1):
+        for v in (value - i, value + i):
+            result.append(f"{v:{len(text)}d}")
+    return result
+
+
+class ValueCache():
+    """Bitmaps of values - '72', ' 9', 'T?' - rendered from the font once each, and kept, least
+    recently used first out, up to max_bytes. bitmap_font loads each glyph the first time it's
+    needed - slowly, parsing the BDF - so warm_up() loads the ones values are made of, a few at a
+    time, and then renders the values prepare() was given, in time there's nothing else to do."""
+
+    def __init__(self, font, width, height, max_bytes=VALUE_CACHE_BYTES):
+        self._font = font
+        self.width = width
+        self._loaded = set() # characters whose glyphs we've had the font load
+
+        # Lay the glyphs out like bitmap_label does.
+        self.ascent = 0
+        descent = 0
+        self._load_glyphs("M j'")
+        for c in "M j'":
+            glyph = font.get_glyph(ord(c))
+            if glyph is not None:
+                self.ascent = max(self.ascent, glyph.height + glyph.dy)
+                descent = max(descent, -glyph.dy)
+        self.height = min(height, self.ascent + descent)
+
+        self.entry_bytes = bitmap_bytes(self.width, self.height, 2)
+        self.max_entries = max(1, max_bytes // self.entry_bytes)
+        self._bitmaps = {}
+        self._lru = []    # texts, least recently used first
+        self._shown = []  # the last few shown - the temperature and the wind, say - which stay
+        self._glyphs_to_load = []
+        if hasattr(font, "load_glyphs"): # a packed font reads them as they're wanted
+            self._glyphs_to_load = [c for c in WARM_UP_CHARACTERS if c not in self._loaded]
+        self._warm_queue = []
+
+        self.hits = 0
+        self.misses = 0      # values rendered as they were shown
+        self.cold_misses = 0 # ...that had glyphs to load, too
+        self.evictions = 0
+        self.warmed = 0      # values rendered by warm_up()
+
+    def _load_glyphs(self, text):
+        """Load any glyphs for this text we haven't; returns whether there were any."""
+        missing = "".join(c for c in text if c not in self._loaded)
+        if not missing or not hasattr(self._font, "load_glyphs"):
+            return False
+        self._font.load_glyphs(missing)
+        self._loaded.update(missing)
+        return True
+
+    def memory_bytes(self):
+        return len(self._bitmaps) * self.entry_bytes
+
+    def __contains__(self, text):
+        return text in self._bitmaps
+
+    def get(self, text):
+        """The bitmap for this text, to show now; rendered if we have to."""
+        if text in self._shown:
+            self._shown.remove(text)
+        self._shown.append(text)
+        del self._shown[:-KEEP_SHOWN]
+
+        bitmap = self._bitmaps.get(text)
+        if bitmap is not None:
+            self.hits += 1
+            self._lru.remove(text)
+            self._lru.append(text)
+            return bitmap
+
+        self.misses += 1
+        if self._load_glyphs(text):
+            self.cold_misses += 1
+        return self._add(text)
+
+    def prepare(self, texts):
+        """Render these in warm_up(), if they're not here already."""
+        for text in texts:
+            if text not in self._bitmaps and text not in self._warm_queue:
+                self._warm_queue.append(text)
+        # Only the newest ones that fit alongside what's showing; more would just push each other out.
+        # If there isn't room for both a value's neighbours, don't bother.
+        room = self.max_entries - KEEP_SHOWN
+        if room < 2 * WARM_UP_NEIGHBOURS:
+            self._warm_queue.clear()
+        else:
+            del self._warm_queue[:-room]
+
+    def warm_up(self):
+        """Load a few glyphs, or render one prepared value. Returns whether there's more to do."""
+        if self._glyphs_to_load:
+            self._load_glyphs(self._glyphs_to_load[:WARM_UP_GLYPHS])
+            del self._glyphs_to_load[:WARM_UP_GLYPHS]
+        else:
+            while self._warm_queue:
+                text = self._warm_queue.pop(0)
+                if text not in self._bitmaps:
+                    self._load_glyphs(text)
+                    self._add(text)
+                    self.warmed += 1
+                    break
+        return len(self._glyphs_to_load) + len(self._warm_queue) > 0
+
+    def _add(self, text):
+        while len(self._lru) >= self.max_entries:
+            old = None
+            for candidate in self._lru:
+                if candidate not in self._shown:
+                    old = candidate
+                    break
+            if old is None: # everything's showing; make room anyway
+                old = self._lru[0]
+            self._lru.remove(old)
+            del self._bitmaps[old]
+            self.evictions += 1
+
+        bitmap = self._render(text)
+        self._bitmaps[text] = bitmap
+        self._lru.append(text)
+        return bitmap
+
+    def _render(self, text):
+        bitmap = displayio.Bitmap(self.width, self.height, 2)
+        x = 0
+        for c in text:
+            glyph = self._font.get_glyph(ord(c))
+            if glyph is None:
+                continue
+            gx = x + glyph.dx
+            gy = self.ascent - glyph.dy - glyph.height
+            x1 = max(0, -gx)
+            y1 = max(0, -gy)
+            if glyph.width > x1 and glyph.height > y1 and gx + x1 < self.width and gy + y1 < self.height:
+                bitmaptools.blit(bitmap, glyph.bitmap, gx + x1, gy + y1,
+                                 x1=glyph.tile_index * glyph.width + x1, y1=y1,
+                                 x2=(glyph.tile_index + 1) * glyph.width, y2=glyph.height, skip_source_index=0)
+            x += glyph.shift_x
+        return bitmap
+
+
+class CachedLabel(displayio.Group):
+    """The big label, drawn from a ValueCache: the same pixels as a bitmap_label in the same
+    place, but a new value just swaps the TileGrid's bitmap - already rendered, we hope."""
+
+    def __init__(self, cache, *, color, x, y):
+        super().__init__(x=x, y=y)
+        self.cache = cache
+        self._palette = displayio.Palette(2)
+        self._palette.make_transparent(0)
+        self._palette[1] = color
+        self._text = ""
+        self._tile_grid = displayio.TileGrid(cache.get(self._text), pixel_shader=self._palette,
+                                             y=cache.ascent // 2 - cache.ascent)
+        self.append(self._tile_grid)
+
+    @property
+    def color(self):
+        return self._palette[1]
+
+    @color.setter
+    def color(self, new_color):
+        self._palette[1] = new_color
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, new_text):
+        self._text = new_text
+        self._tile_grid.bitmap = self.cache.get(new_text)
+
 
 class tft_22():
     """"Driver for an Adafruit 2.2" TFT display.
     Features one big text area, and one little 'status' line at the bottom.
-    YOu can set the color of the text, and control the display's backlight."""
+    YOu can set the color of the text, and control the display's backlight.
+
+    Setting something to what it already is does nothing - a bitmap_label rebuilds its bitmap, and
+    repaints all of itself, every time its text is set, even to the same thing - and refresh() only
+    refreshes if something changed. displayio itself only pushes the areas that changed, so a new
+    status line is just the strip at the bottom, not the whole 320x240.
+    With value_cache, the big text comes from a ValueCache; call warm_up() when there's time to spare."""
 
-    def __init__(self, rgb_background, flip_vertical=True, font_path=DEFAULT_FONT_PATH):
+    def __init__(self, rgb_background, flip_vertical=True, font_path=DEFAULT_FONT_PATH, value_cache=USE_VALUE_CACHE,
+                 packed_font=USE_PACKED_FONT):
 
         # Release any resources currently in use for the displays.
         displayio.release_displays()
@@ -76,19 +363,44 @@ class tft_22():
 
         # Create the main text label.
         # TODO: catch missing file?
-        display_font = bitmap_font.load_font(font_path)
+        display_font = load_font(font_path, packed_font)
 
         # for LeagueSpartanBold-220-digits
-        text_area = bitmap_label.Label(display_font, color=0xFFFFFF, x=-5, y=100)
+        if value_cache:
+            self._value_cache = ValueCache(display_font, DISPLAY_WIDTH + 5, DISPLAY_HEIGHT, VALUE_CACHE_BYTES)
+            text_area = CachedLabel(self._value_cache, color=0xFFFFFF, x=-5, y=100)
+        else:
+            self._value_cache = None
+            text_area = bitmap_label.Label(display_font, color=0xFFFFFF, x=-5, y=100)
 
         splash.append(text_area)
         self._text_area = text_area
 
         # Nice little status line at the bottom.
-        self._text_area_status = bitmap_label.Label(terminalio.FONT, text=f"{__name__} OK",
+        self._status_text = f"{__name__} OK"
+        self._text_area_status = bitmap_label.Label(terminalio.FONT, text=self._status_text,
                                              color=0xFFFFFF, x=10, y=DISPLAY_HEIGHT-6)
         splash.append(self._text_area_status)
 
+        # And another, above it, for a detail of what's showing - the gust, under the wind.
+        self._detail_text = ""
+        self._text_area_detail = bitmap_label.Label(terminalio.FONT, text=self._detail_text,
+                                             color=0xFFFFFF, x=10, y=DISPLAY_HEIGHT-23)
+        splash.append(self._text_area_detail)
+
+        # What's showing, so we can skip setting it again.
+        self._text = ""
+        self._text_color = 0xFFFFFF
+        self._dirty = DIRTY_TEXT | DIRTY_COLOR | DIRTY_STATUS # nothing's been drawn yet
+
+        # Frame timing.
+        self.frames = 0          # refreshes that pushed something
+        self.frames_skipped = 0  # refresh() calls with nothing to do
+        self.sets_skipped = 0    # set_...() calls that didn't change anything
+        self.last_frame_ms = 0
+        self.max_frame_ms = 0
+        self.total_frame_ms = 0
+
 
     def set_backlight(self, duty_cycle_percent):
         """duty_cycle_percent is 0 thru 100, but 0 is rather low."""
@@ -99,19 +411,79 @@ class tft_22():
 
     def set_text(self, text):
         """Set the text to display. '0-9' (and 'M', if that's useful) only! You must refresh the display when ready."""
+        if text == self._text:
+            self.sets_skipped += 1
+            return
+        self._text = text
         self._text_area.text = text
+        self._dirty |= DIRTY_TEXT
+        if self._value_cache is not None:
+            self._value_cache.prepare(neighbours(text))
+
+    def prepare(self, texts):
+        """Get these values ready to show, in warm_up()."""
+        if self._value_cache is not None:
+            self._value_cache.prepare(texts)
+
+    def warm_up(self):
+        """Render one value we'll probably want soon; call when there's time to spare.
+        Returns whether there's more to do."""
+        return self._value_cache is not None and self._value_cache.warm_up()
 
     def set_text_color(self, rgb_color):
         """Set the text to the indicated RGB color. You must refresh the display when ready."""
+        if rgb_color == self._text_color:
+            self.sets_skipped += 1
+            return
+        self._text_color = rgb_color
         self._text_area.color = rgb_color
+        self._dirty |= DIRTY_COLOR
 
     def set_status_text(self, text):
         """The little text area at the bottom. You must refresh the display."""
+        if text == self._status_text:
+            self.sets_skipped += 1
+            return
+        self._status_text = text
         self._text_area_status.text = text
+        self._dirty |= DIRTY_STATUS
+
+    def set_detail_text(self, text):
+        """The little text area above the status line; "" for nothing. You must refresh the display."""
+        if text == self._detail_text:
+            self.sets_skipped += 1
+            return
+        self._detail_text = text
+        self._text_area_detail.text = text
+        self._dirty |= DIRTY_DETAIL
+
+    def dirty(self):
+        """What's changed since the last refresh: DIRTY_ flags, or 0."""
+        return self._dirty
 
     def refresh(self):
-        """Only repaint the display when done making changes, to make it look nicer."""
+        """Only repaint the display when done making changes, to make it look nicer.
+        Does nothing if nothing's changed; returns whether it refreshed."""
+        if not self._dirty:
+            self.frames_skipped += 1
+            return False
+
+        start = time.monotonic_ns()
         self._display.refresh()
+        ms = (time.monotonic_ns() - start) / 1_000_000
+
+        self._dirty = 0
+        self.frames += 1
+        self.last_frame_ms = ms
+        self.max_frame_ms = max(self.max_frame_ms, ms)
+        self.total_frame_ms += ms
+        return True
+
+    def frame_stats_text(self):
+        """A status line's worth of frame timing."""
+        mean = self.total_frame_ms / self.frames if self.frames else 0
+        return (f"{self.frames} frames ({self.frames_skipped} skipped), "
+                f"{self.last_frame_ms:.0f}ms, mean {mean:.0f}, max {self.max_frame_ms:.0f}")
 
 
 def test():
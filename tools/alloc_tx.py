@@ -0,0 +1,123 @@
+"""
+    Host-side report: how much memory piwx_tx allocates per transmit pass.
+
+    Runs piwx_tx's packet building under CPython, with the hardware modules replaced by tools/standins,
+    and uses tracemalloc to see how much each pass allocates. On CircuitPython nothing is freed until
+    a garbage collection, so the per-pass high-water mark is roughly how far gc.mem_free() drops
+    every pass - and how soon the next collection, which stalls pulse counting, comes around.
+
+    CPython boxes every float, and ints over 256, so the absolute numbers are higher than on the Feather;
+    compare the rows with each other.
+
+        python tools/alloc_tx.py [passes]
+"""
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+import host
+host.use_standins()
+
+import piwx_constants
+import piwx_packet
+import piwx_tx
+
+
+def old_json_pass(data_dict, state):
+    """The baseline: what piwx_tx.main() did per pass before the binary format."""
+    strings = {}
+    for k, v in data_dict.items():
+        strings[k] = v if k == piwx_constants.DICT_KEY_UPTIME else f"{v:2.0f}"
+    msg_to_send = json.dumps(strings).replace(" ", "")
+    strings['U'] = data_dict[piwx_constants.DICT_KEY_UPTIME]
+    msg_augmented = json.dumps(strings).replace(" ", "")
+    if len(msg_augmented) <= piwx_tx.MAX_RFM_MSG_LEN:
+        msg_to_send = msg_augmented
+    state["text"] = f"(True) Sending packet #1, {len(msg_to_send)} chars: {msg_to_send}\n"
+    state["radio"].send(msg_to_send.encode("utf8"))
+
+
+def encode_pass(data_dict, state):
+    """The binary format, but a new packet every time."""
+    state["radio"].send(state["encoder"].encode(data_dict, state["history"]))
+    state["history"].add(data_dict[piwx_constants.DICT_KEY_WIND])
+
+
+def build_packet_pass(data_dict, state):
+    """What piwx_tx does now: piwx_tx.build_packet() into a PacketBuffer."""
+    length = piwx_tx.build_packet(state["buffer"], state["encoder"], data_dict, state["history"], None, 0)
+    state["radio"].send(state["buffer"].view(length))
+
+
+def build_batch_pass(data_dict, state):
+    """Same, batching; most passes don't send."""
+    length = piwx_tx.build_packet(state["buffer"], None, data_dict, None, state["batch"], 0)
+    if length:
+        state["radio"].send(state["buffer"].view(length))
+
+
+class _Radio():
+    """Sends to nowhere - unlike the adafruit_rfm69 stand-in, it keeps nothing, so it allocates nothing."""
+    def send(self, data):
+        return True
+
+
+def measure(pass_fn, readings):
+    """Return (mean, max) bytes allocated per pass, and the bytes still held after all the passes."""
+
+    state = {
+        "radio": _Radio(),
+        "buffer": piwx_packet.PacketBuffer(piwx_tx.MAX_RFM_MSG_LEN),
+        "encoder": piwx_packet.DeltaEncoder(piwx_tx.KEYFRAME_INTERVAL),
+        "history": piwx_packet.WindHistory(4),
+        "batch": piwx_packet.SampleBatch(piwx_packet.batch_size_limit(piwx_tx.MAX_RFM_MSG_LEN)),
+        }
+
+    # Warm up, so one-time allocations (caches, interned strings) don't count.
+    for data_dict in readings[:20]:
+        pass_fn(data_dict, state)
+
+    per_pass = [0] * len(readings)
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    for i in range(len(readings)):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        pass_fn(readings[i], state)
+        per_pass[i] = tracemalloc.get_traced_memory()[1] - before
+    retained = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+
+    return sum(per_pass) / len(per_pass), max(per_pass), retained
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    # Readings made ahead of time, so the passes only do the packet work.
+    rng = random.Random(1)
+    readings = []
+    for i in range(n):
+        readings.append({
+            piwx_constants.DICT_KEY_TEMPERATURE: 70 + rng.random(),
+            piwx_constants.DICT_KEY_WIND: piwx_tx.count_to_mph(rng.randint(0, 60), piwx_tx.COLLECTION_TIME),
+            piwx_constants.DICT_KEY_PRESSURE: 1013 + rng.random(),
+            piwx_constants.DICT_KEY_HUMIDITY: 55 + rng.random(),
+            piwx_constants.DICT_KEY_UPTIME: 100000 + 3 * i,
+            })
+
+    print(f"{n} transmit passes (packet building and sending only)")
+    print(f"  {'':28} {'bytes/pass':>10} {'worst':>6} {'retained':>9}")
+    for name, fn in (("JSON twice + f-strings (old)", old_json_pass),
+                     ("encode(), new bytearray", encode_pass),
+                     ("build_packet(), reused", build_packet_pass),
+                     ("build_packet(), batching", build_batch_pass)):
+        t_start = time.perf_counter()
+        mean, worst, retained = measure(fn, readings)
+        print(f"  {name:28} {mean:10.1f} {worst:6} {retained:9}   ({(time.perf_counter() - t_start) * 1e6 / n:.1f} us/pass)")
+
+
+if __name__ == "__main__":
+    main()
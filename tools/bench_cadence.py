@@ -0,0 +1,108 @@
+"""
+    Host-side benchmark: fixed vs. adaptive transmit cadence.
+
+    Replays days of one-a-second wind readings - calm spells, light air, steady breeze and gusts,
+    from tools/weather_series.py - through piwx_tx.AdaptiveCadence, and through the fixed
+    every-WINDOWS_PER_SEND-seconds schedule, building each packet with the real encoder.
+    Reports packets and radio-on time per hour, overall and by kind of weather, plus staleness:
+    the longest gap between packets, and the longest the receiver's wind was more than
+    STALE_MPH off the true 3-second average.
+
+        python tools/bench_cadence.py [days]
+"""
+import collections
+import math
+import sys
+
+import host
+host.use_standins()
+
+import piwx_constants
+import piwx_packet
+import piwx_tx
+import radio_model
+import weather_series
+
+
+STALE_MPH = 3.0
+
+
+def replay(winds, spells, cadence):
+    """Return {regime: [packets, radio-on seconds, seconds]}, longest gap, longest stale spell, mean abs error."""
+
+    encoder = piwx_packet.DeltaEncoder(piwx_tx.KEYFRAME_INTERVAL)
+    regime_of = [None] * len(winds)
+    for i, (start, name) in enumerate(spells):
+        end = spells[i + 1][0] if i + 1 < len(spells) else len(winds)
+        for t in range(start, min(end, len(winds))):
+            regime_of[t] = name
+
+    stats = collections.defaultdict(lambda: [0, 0.0, 0])
+    recent = collections.deque(maxlen=3)
+    wind_sum = 0.0
+    n_winds = 0
+    shown = None
+    last_send = 0
+    longest_gap = 0
+    stale = 0
+    longest_stale = 0
+    total_error = 0.0
+
+    for t, wind in enumerate(winds):
+        temperature = 60 + 10 * math.sin(2 * math.pi * t / 86400)
+        recent.append(wind)
+        wind_sum += wind
+        n_winds += 1
+        regime = stats[regime_of[t]]
+        regime[2] += 1
+
+        if cadence is None:
+            send = n_winds >= piwx_tx.WINDOWS_PER_SEND
+        else:
+            send = cadence.should_send(t, wind, temperature)
+        if send:
+            shown = wind_sum / n_winds
+            packet = encoder.encode({piwx_constants.DICT_KEY_WIND: shown,
+                                     piwx_constants.DICT_KEY_TEMPERATURE: temperature,
+                                     piwx_constants.DICT_KEY_UPTIME: t})
+            regime[0] += 1
+            regime[1] += radio_model.radio_on_s(len(packet))
+            longest_gap = max(longest_gap, t - last_send)
+            last_send = t
+            wind_sum = 0.0
+            n_winds = 0
+            if cadence is not None:
+                cadence.sent(t, shown, temperature)
+
+        if shown is not None:
+            error = abs(shown - sum(recent) / len(recent))
+            total_error += error
+            stale = stale + 1 if error > STALE_MPH else 0
+            longest_stale = max(longest_stale, stale)
+
+    return stats, longest_gap, longest_stale, total_error / len(winds)
+
+
+def main():
+    days = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    winds, spells = weather_series.wind_regimes(int(days * 86400))
+
+    print(f"{days} days of wind, one reading a second; per hour of each kind of weather:")
+    print(f"  {'':24} {'packets/h':>10} {'radio ms/h':>11} {'mAh/day':>8}   {'max gap':>8} {'max stale':>10} {'mean err':>9}")
+    for label, cadence in ((f"fixed, every {piwx_tx.WINDOWS_PER_SEND}s", None),
+                           (f"adaptive, {piwx_tx.MIN_SEND_INTERVAL}-{piwx_tx.MAX_SEND_INTERVAL}s",
+                            piwx_tx.AdaptiveCadence())):
+        stats, longest_gap, longest_stale, mean_error = replay(winds, spells, cadence)
+        packets = sum(s[0] for s in stats.values())
+        on_time = sum(s[1] for s in stats.values())
+        hours = len(winds) / 3600
+        print(f"  {label:24} {packets / hours:10.0f} {on_time / hours * 1000:11.0f} "
+              f"{radio_model.charge_mah(on_time / hours * 24):8.3f}   {longest_gap:7}s {longest_stale:9}s "
+              f"{mean_error:8.2f}")
+        for name, _, _, _ in weather_series.WIND_REGIMES:
+            if stats[name][2]:
+                print(f"    {name:22} {stats[name][0] / (stats[name][2] / 3600):10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+    Host-side check and benchmark: rendering the receiver's display, step by step.
+
+    Runs the real tft_22 on the stand-in displayio with DRAW on, so each refresh() draws what it
+    pushes into an RGB565 framebuffer, as the ILI9341 would get it. Goes through the things
+    piwx_rx does to the display - the first frame, turning pages, a new packet with a new value
+    and one with nothing new, a round of status lines, losing the transmitter and getting it back, a gust -
+    with piwx_rx's own functions, on tft_22 and on the old way of driving it (OldTft, from
+    tools/sim_display_refresh.py). For each step: frames, bytes over SPI and the time they'd take
+    at the bus's baud rate, and the host time to do it (CPython and the stand-ins, so only good
+    for comparing). Then some hours of the receiver's pages, the same way.
+
+    Checks every step leaves the framebuffer just as drawing the whole screen from scratch would -
+    nothing stale left where displayio didn't push - that the two show the same picture, in the
+    right colours, with the gust on its own line under the wind, and that tft_22 never pushes more
+    than the old way (but for the frame-count status line, which is wider or narrower as the
+    counts are).
+    With --png, writes tft_22's frame after each step there.
+
+        python tools/bench_display.py [--png DIR] [hours]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import host
+host.use_standins()
+
+import displayio
+displayio.DRAW = True
+
+import adafruit_rfm69
+import piwx_constants
+import piwx_packet
+import piwx_rx
+import sim_display_refresh
+import tft_22
+import weather_series
+
+STATUS_STRIP = sim_display_refresh.STATUS_STRIP
+
+
+class Receiver():
+    """Just enough of the receiver to feed the display: its state, a radio, and packets."""
+
+    def __init__(self):
+        self.state = piwx_rx.ReceiverState()
+        self.radio = adafruit_rfm69.RFM69(None, None, None, 915.0)
+        self.encoder = piwx_packet.DeltaEncoder(10)
+        self.readings = weather_series.readings(100, sim_display_refresh.PACKET_SECONDS)
+        self.sequence = 0
+        self.which_status = 0
+        self.last = None
+        self.now = 0
+
+    def packet(self, **changes):
+        """The next reading - with these changes - in the next packet."""
+        reading = {k: v for k, v in self.readings[self.sequence].items() if v is not None}
+        reading.update(changes)
+        self.send(reading)
+
+    def repeat(self):
+        """The last reading again, in the next packet."""
+        self.send(self.last)
+
+    def send(self, reading):
+        self.now = self.sequence * sim_display_refresh.PACKET_SECONDS
+        self.state.packet_received(self.encoder.encode(reading, sequence=self.sequence), self.now)
+        self.last = reading
+        self.sequence += 1
+
+    def status(self, tft):
+        state = self.state
+        return piwx_rx.show_status_info(self.radio, tft, state.missed_packets, self.which_status, state.brightness,
+                                        state.data_dict.get(piwx_constants.DICT_KEY_UPTIME, -1),
+                                        state.link, state.stats, state.history, self.now)
+
+
+def page(show_temperature):
+    def step(rx, tft):
+        sim_display_refresh.draw(tft, rx.state, show_temperature)
+    return step
+
+
+def status_lines(rx, tft):
+    for _ in range(piwx_rx.N_STATUS_LINES):
+        rx.which_status = rx.status(tft)
+        tft.refresh()
+
+
+# (name, what happens to the receiver first - once, not per display - what's done to each display,
+#  and the colour the big text should be)
+TEMPERATURE = piwx_rx.DISPLAY_COLOR_TEMPERATURE
+WIND = piwx_rx.DISPLAY_COLOR_WIND
+STEPS = (
+    ("first frame",              lambda rx: rx.packet(),                   page(True),   TEMPERATURE),
+    ("to the wind page",         None,                                     page(False),  WIND),
+    ("to the temperature page",  None,                                     page(True),   TEMPERATURE),
+    ("packet, new temperature",  lambda rx: rx.packet(**{piwx_constants.DICT_KEY_TEMPERATURE:
+                                            rx.state.data_dict[piwx_constants.DICT_KEY_TEMPERATURE] + 3}),
+                                                                           page(True),   TEMPERATURE),
+    ("packet, nothing new",      lambda rx: rx.repeat(),                   page(True),   TEMPERATURE),
+    ("status lines, a round",    None,                                     None,         TEMPERATURE),
+    ("transmitter lost",         lambda rx: piwx_rx.reset_dict(rx.state.data_dict), page(True), TEMPERATURE),
+    ("  and the wind page",      None,                                     page(False),  WIND),
+    ("transmitter back",         lambda rx: rx.packet(),                   page(False),  WIND),
+    ("packet, gusting",          lambda rx: rx.packet(**{piwx_constants.DICT_KEY_GUST: 31}), page(False), WIND),
+    ("  and the temperature",    None,                                     page(True),   TEMPERATURE),
+    )
+
+
+def same_picture(old, new):
+    """Do the two show the same thing? Not counting the status line, if it's the frame counts, which differ."""
+    a = old._display.framebuffer
+    b = new._display.framebuffer
+    if old._text_area_status.text != new._text_area_status.text:
+        n = (tft_22.DISPLAY_HEIGHT - STATUS_STRIP) * tft_22.DISPLAY_WIDTH
+        return a[:n] == b[:n]
+    return a == b
+
+
+def text_color_shown(tft, color):
+    """Is the big text there, in this colour, and not in another?"""
+    pixels = set(tft._display.framebuffer[:(tft_22.DISPLAY_HEIGHT - STATUS_STRIP) * tft_22.DISPLAY_WIDTH])
+    others = {displayio.rgb565(c) for c in (TEMPERATURE, WIND) if c != color}
+    return displayio.rgb565(color) in pixels and not pixels & others
+
+
+def detail_shown(rx, tft, color):
+    """The gust's on its own line, under the wind, and not on the temperature page - or over the status line."""
+    gust = piwx_rx.gust_text(rx.state.data_dict) if color == WIND else None
+    return tft._text_area_detail.text == (gust or "") and tft._text_area_status.text != gust
+
+
+def run_step(rx, tft, step):
+    """(frames, pixels, bytes, host ms) for doing this to the display."""
+    display = tft._display
+    log_before = len(display.refresh_log)
+    start = time.perf_counter()
+    with quiet():
+        (step or status_lines)(rx, tft)
+    ms = (time.perf_counter() - start) * 1000
+    log = display.refresh_log[log_before:]
+    return len(log), sum(p for p, _ in log), sum(b for _, b in log), ms
+
+
+def quiet():
+    """The receiver's chatter goes nowhere."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def spi_ms(tft, n_bytes):
+    return n_bytes * 8 / tft._display.bus.baudrate * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rendering benchmark for the receiver's display.")
+    parser.add_argument("hours", nargs="?", type=float, default=0.25, help="of the receiver's pages, at the end")
+    parser.add_argument("--png", metavar="DIR", help="write tft_22's frame after each step here")
+    args = parser.parse_args()
+    if args.png:
+        os.makedirs(args.png, exist_ok=True)
+
+    ok = True
+    rx = Receiver()
+    old = sim_display_refresh.OldTft(0x000000)
+    new = tft_22.tft_22(0x000000, font_path=sim_display_refresh.FONT_PATH)
+    tfts = (("old", old), ("tft_22", new))
+
+    print("The receiver's display, step by step, drawn into an RGB565 framebuffer "
+          f"({tft_22.DISPLAY_WIDTH}x{tft_22.DISPLAY_HEIGHT}, SPI at {new._display.bus.baudrate / 1e6:g} MHz):")
+    print(f"  {'':26} {'frames':>13} {'kpixels':>15} {'KB':>15} {'SPI ms':>15} {'host ms':>15}")
+    print(f"  {'':26}" + f" {'old':>7} {'tft_22':>7}" * 5)
+    failed = []
+    for n, (name, event, step, color) in enumerate(STEPS):
+        if event is not None:
+            with quiet():
+                event(rx)
+        which_status = rx.which_status
+        results = []
+        for _, tft in tfts:
+            rx.which_status = which_status
+            results.append(run_step(rx, tft, step))
+        (f_old, p_old, b_old, ms_old), (f_new, p_new, b_new, ms_new) = results
+
+        step_ok = (all(tft._display.framebuffer == tft._display.render() for _, tft in tfts)
+                   and same_picture(old, new)
+                   and text_color_shown(new, color)
+                   and detail_shown(rx, new, color)
+                   and (b_new <= b_old or old._text_area_status.text != new._text_area_status.text))
+        if not step_ok:
+            failed.append(name.strip())
+        ok = ok and step_ok
+        if args.png:
+            file_name = f"{n:02d}-{name.strip().replace(',', '').replace(' ', '-')}.png"
+            new._display.save_png(os.path.join(args.png, file_name))
+        print(f"  {name:26} {f_old:7} {f_new:7} {p_old / 1000:7.1f} {p_new / 1000:7.1f}"
+              f" {b_old / 1024:7.1f} {b_new / 1024:7.1f} {spi_ms(old, b_old):7.1f} {spi_ms(new, b_new):7.1f}"
+              f" {ms_old:7.1f} {ms_new:7.1f}{'' if step_ok else '   WRONG'}")
+
+    # Hours of it: the same as sim_display_refresh, but drawing every frame.
+    for _, tft in tfts:
+        tft._display.refresh_log.clear()
+    start = time.perf_counter()
+    with quiet():
+        session_ok = sim_display_refresh.simulate((old, new), args.hours)[0]
+    seconds = time.perf_counter() - start
+    print(f"\n{args.hours:g} hours of the receiver's pages ({seconds:.0f} s to run), per frame:")
+    print(f"  {'':10} {'frames/h':>9} {'kpixels':>8} {'KB':>6} {'SPI ms':>7} {'biggest KB':>11}")
+    for name, tft in tfts:
+        log = tft._display.refresh_log
+        frames = max(1, len(log))
+        n_bytes = sum(b for _, b in log)
+        print(f"  {name:10} {len(log) / args.hours:9.0f} {sum(p for p, _ in log) / frames / 1000:8.1f}"
+              f" {n_bytes / frames / 1024:6.1f} {spi_ms(tft, n_bytes / frames):7.1f}"
+              f" {max((b for _, b in log), default=0) / 1024:11.1f}")
+        session_ok = session_ok and tft._display.framebuffer == tft._display.render()
+    session_ok = session_ok and same_picture(old, new)
+    session_ok = session_ok and sum(b for _, b in new._display.refresh_log) < sum(b for _, b in old._display.refresh_log)
+    ok = ok and session_ok
+    if args.png:
+        new._display.save_png(os.path.join(args.png, "session.png"))
+        print(f"  (frames written to {args.png})")
+
+    if failed:
+        print(f"Wrong: {', '.join(failed)}")
+    print("OK" if ok else "WRONG")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,108 @@
+"""
+    Host-side check and benchmark: the big font, as BDF and packed (tools/compile_font.py).
+
+    Checks the packed fonts in fonts/ are up to date, and that every glyph in them is the BDF's,
+    pixel for pixel. Then, for each format: the time from making the display to its first frame,
+    the heap that takes (tracemalloc, under CPython with the stand-ins), and what the font itself
+    holds on the Feather's heap - the glyph bitmaps bitmap_font keeps, 1 bit a pixel, or the packed
+    font's index - after the first frame and after every glyph's been used; and the time to get
+    one glyph that hasn't been, parsing the BDF or seeking and reading the packed font.
+
+        python tools/bench_font.py
+"""
+import os
+import struct
+import sys
+import time
+import tracemalloc
+
+import host
+host.use_standins()
+
+from adafruit_bitmap_font import bitmap_font
+import compile_font
+import tft_22
+
+BDF_PATH = os.path.join(host.REPO_DIR, tft_22.DEFAULT_FONT_PATH)
+PACKED_PATH = compile_font.packed_path(BDF_PATH)
+FIRST_TEXT = "72"
+GLYPH = "8"
+
+
+def font_heap(font):
+    """Bytes the font holds on the Feather's heap, not counting the file."""
+    if isinstance(font, tft_22.PackedFont):
+        return len(font._index) * struct.calcsize(tft_22.PACKED_INDEX)
+    return sum(tft_22.bitmap_bytes(g.width, g.height, 2) for g in font._glyphs.values() if g is not None)
+
+
+def same_glyphs():
+    bdf = bitmap_font.load_font(BDF_PATH)
+    packed = tft_22.PackedFont(PACKED_PATH)
+    if packed.get_bounding_box() != bdf.get_bounding_box():
+        return False
+    for c in tft_22.FONT_CHARACTERS:
+        ours = packed.get_glyph(ord(c))
+        theirs = bdf.get_glyph(ord(c))
+        if (ours is None) != (theirs is None):
+            return False
+        if ours is not None and (ours[2:] != theirs[2:] or (ours.width and ours.bitmap._data != theirs.bitmap._data)):
+            return False
+    return True
+
+
+def boot(packed):
+    """(ms to the first frame, CPython heap KB then, its peak, the font's Feather heap then, and after every glyph)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    tft = tft_22.tft_22(0x000000, font_path=BDF_PATH, packed_font=packed)
+    tft.set_text(FIRST_TEXT)
+    tft.refresh()
+    ms = (time.perf_counter() - start) * 1000
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    font = tft._value_cache._font
+    first = font_heap(font)
+    while tft.warm_up():
+        pass
+    for c in tft_22.FONT_CHARACTERS:
+        font.get_glyph(ord(c))
+    return ms, current / 1024, peak / 1024, first / 1024, font_heap(font) / 1024
+
+
+def glyph_ms(font):
+    start = time.perf_counter()
+    font.get_glyph(ord(GLYPH))
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    ok = True
+    current = open(PACKED_PATH, "rb").read() == compile_font.compile_font(BDF_PATH)[0]
+    same = same_glyphs()
+    print(f"{os.path.relpath(PACKED_PATH)} is up to date: {current}; the same glyphs as the BDF: {same}")
+    ok = ok and current and same
+
+    print(f"\nBoot to the first frame ({FIRST_TEXT!r}), and the heap:")
+    print(f"  {'':7} {'file':>7} {'boot':>7} {'CPython heap KB':>16} {'font on Feather heap KB':>24} {'a glyph':>8}")
+    print(f"  {'':7} {'KB':>7} {'ms':>7} {'then':>7} {'peak':>8} {'first frame':>12} {'all glyphs':>11} {'ms':>8}")
+    results = {}
+    for name, packed, path in (("BDF", False, BDF_PATH), ("packed", True, PACKED_PATH)):
+        ms, heap, peak, first, everything = boot(packed)
+        font = tft_22.PackedFont(PACKED_PATH) if packed else bitmap_font.load_font(BDF_PATH)
+        one = glyph_ms(font)
+        results[name] = (ms, heap, first, everything, one)
+        print(f"  {name:7} {os.path.getsize(path) / 1024:7.0f} {ms:7.0f} {heap:7.0f} {peak:8.0f}"
+              f" {first:12.1f} {everything:11.1f} {one:8.2f}")
+
+    bdf, packed = results["BDF"], results["packed"]
+    ok = ok and packed[0] < bdf[0] and packed[1] < bdf[1] and packed[3] < bdf[3] and packed[4] < bdf[4]
+    print("  (CPython's heap includes the display, stand-in bitmaps at a byte a pixel, and the value cache)")
+
+    print("OK" if ok else "WRONG")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
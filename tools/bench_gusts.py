@@ -0,0 +1,157 @@
+"""
+    Host-side check and microbenchmark: anemom.GustTracker's peak gust.
+
+    Feeds synthetic gust profiles - steady, square gusts, short spikes, a ramp, and turbulent wind
+    from tools/weather_series.py - as GUST_BUCKET_MS bucket counts, with a report (reset) every few
+    seconds, and checks each report's peak against a brute-force rescan of every span.
+    Then the same through anemom.Anemom on a virtual clock, with the stand-in countio counting.
+    Then times add() against rescanning the span for every bucket.
+
+        python tools/bench_gusts.py [buckets per profile]
+"""
+import math
+import random
+import sys
+import time
+
+import host
+host.use_standins()
+
+import anemom
+import board
+import countio
+import supervisor
+import weather_series
+
+PULSES_PER_MPH = 5 # per second; calibration.DEFAULT_POINTS is 0.2 mph per pulse per second
+BUCKETS_PER_SECOND = 1000 // anemom.GUST_BUCKET_MS
+REPORT_BUCKETS = (8, 12, 60) # report (and reset) this often, in turn
+BENCH_GUST_SECONDS = (3, 60, 600)
+
+
+def mph_to_count(mph, rng):
+    """Pulses in one bucket at this wind - with the fraction carried at random."""
+    pulses = mph * PULSES_PER_MPH / BUCKETS_PER_SECOND
+    return int(pulses) + (1 if rng.random() < pulses - int(pulses) else 0)
+
+
+def profiles(n, seed=1):
+    """{name: [bucket counts]}"""
+    rng = random.Random(seed)
+    turbulent = weather_series.wind_series(n // BUCKETS_PER_SECOND + 1, seed)
+    return {
+        "steady 10 mph": [mph_to_count(10, rng) for _ in range(n)],
+        "square gusts": [mph_to_count(25 if (i // (4 * BUCKETS_PER_SECOND)) % 5 == 0 else 8, rng) for i in range(n)],
+        "1 s spikes": [mph_to_count(40 if i % (10 * BUCKETS_PER_SECOND) < BUCKETS_PER_SECOND else 5, rng)
+                       for i in range(n)],
+        "ramp 0-50 mph": [mph_to_count(50 * i / n, rng) for i in range(n)],
+        "turbulent": [mph_to_count(max(0, turbulent[i // BUCKETS_PER_SECOND] * (1 + 0.4 * math.sin(i * 0.9))
+                                       + rng.gauss(0, 3)), rng) for i in range(n)],
+        }
+
+
+def brute_force(counts, span, report_buckets):
+    """The peak for each report, by summing every whole span that ends in the interval."""
+    reports = []
+    peak = -1
+    for i in range(len(counts)):
+        if i + 1 >= span:
+            peak = max(peak, sum(counts[i + 1 - span:i + 1]))
+        if (i + 1) % report_buckets == 0:
+            reports.append(peak)
+            peak = -1
+    return reports
+
+
+def tracked(counts, report_buckets):
+    gusts = anemom.GustTracker()
+    reports = []
+    for i, count in enumerate(counts):
+        gusts.add(count)
+        if (i + 1) % report_buckets == 0:
+            reports.append(gusts.peak)
+            gusts.reset()
+    return reports
+
+
+def through_anemom(counts, report_buckets):
+    """The same, counted by Anemom from a stand-in countio, on a virtual clock across the ticks_ms() wrap."""
+    start = anemom.TICKS_PERIOD - 1000
+    supervisor.set_ticks(start)
+    anemometer = anemom.Anemom(board.D12, 0, counter=anemom.CountioCounter(board.D12))
+    hardware = countio.counters[-1]
+    anemometer.start_windows(anemom.GUST_BUCKET_MS / 1000)
+
+    reports = []
+    for i, count in enumerate(counts):
+        hardware.count += count
+        t = start + (i + 1) * anemom.GUST_BUCKET_MS
+        supervisor.set_ticks(t)
+        anemometer.poll_windows(supervisor.ticks_ms())
+        if (i + 1) % report_buckets == 0:
+            reports.append(anemometer.gusts.peak)
+            anemometer.gusts.reset()
+    anemometer.counter.deinit()
+    supervisor.set_ticks(None)
+    return reports
+
+
+def rescan_per_bucket(counts, span):
+    """What we'd do without the running sum: add up the span again for every bucket."""
+    ring = [0] * span
+    peak = -1
+    for i, count in enumerate(counts):
+        ring[i % span] = count
+        total = sum(ring)
+        if total > peak:
+            peak = total
+    return peak
+
+
+def best_time(f, *args, repeats=5):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        f(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    span = anemom.GustTracker().span_buckets
+    print(f"{n} buckets of {anemom.GUST_BUCKET_MS} ms per profile, {span}-bucket ({anemom.GUST_SECONDS} s) gusts; "
+          f"reports every {', '.join(str(r) for r in REPORT_BUCKETS)} buckets")
+
+    ok = True
+    print(f"  {'profile':<16} {'reports':>7} {'wrong':>5} {'via Anemom':>10}   {'max gust':>8} (mph)")
+    for name, counts in profiles(n).items():
+        n_reports = n_wrong = n_wrong_anemom = 0
+        for report_buckets in REPORT_BUCKETS:
+            expected = brute_force(counts, span, report_buckets)
+            n_reports += len(expected)
+            n_wrong += sum(1 for a, b in zip(tracked(counts, report_buckets), expected) if a != b)
+            n_wrong_anemom += sum(1 for a, b in zip(through_anemom(counts, report_buckets), expected) if a != b)
+        peaks = [p for p in expected if p >= 0]
+        scale = PULSES_PER_MPH * anemom.GUST_SECONDS
+        print(f"  {name:<16} {n_reports:7} {n_wrong:5} {n_wrong_anemom:10}   "
+              f"{max(peaks) / scale:8.1f}")
+        ok = ok and n_wrong == 0 and n_wrong_anemom == 0
+
+    # add() costs the same whatever the span; rescanning grows with it.
+    counts = profiles(n)["turbulent"]
+    print(f"  per bucket, CPython (the Feather's a few hundred times slower, but it's only 4 a second):")
+    for gust_seconds in BENCH_GUST_SECONDS:
+        gusts = anemom.GustTracker(gust_seconds=gust_seconds)
+        tracker_s = best_time(lambda: [gusts.add(c) for c in counts])
+        rescan_s = best_time(rescan_per_bucket, counts, gusts.span_buckets)
+        print(f"    {gust_seconds:4} s span: add() {tracker_s / n * 1e6:6.2f} us, "
+              f"rescanning the span {rescan_s / n * 1e6:6.2f} us")
+
+    print("OK" if ok else "WRONG")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
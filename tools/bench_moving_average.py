@@ -0,0 +1,227 @@
+"""
+    Host-side check and benchmark: moving_average.py.
+
+    Checks each mode against working it out the long way, on random winds with missed (None) readings:
+    the window mode against the mean of the last n readings that aren't None; EWMA against its formula;
+    and the time-weighted mode, with readings at irregular times, against its formula - and that
+    a reading after a gap counts for more. And that the receiver (piwx_rx.update_wind_average), in the
+    time-weighted mode, gives batched and backfilled readings their own times: the same average as
+    having had every reading as it happened.
+    Then times an update, for windows of 5 to 10,000 readings, against the old list-slicing version.
+
+        python tools/bench_moving_average.py
+"""
+import contextlib
+import io
+import math
+import random
+import sys
+import time
+
+import host
+host.use_standins()
+
+import moving_average
+import piwx_constants
+import piwx_packet
+import piwx_rx
+
+SIZES = (5, 10, 100, 1000, 10000)
+N_CHECK = 20000
+MISSED = 0.1 # fraction of readings that are None
+
+
+class OldMovingAverage():
+    """The old moving_average, minus its print."""
+    def __init__(self, n_datapoints):
+        self._n_datapoints = n_datapoints
+        self._moving_average_data = []
+
+    def update_moving_average(self, new_data_point):
+        if len(self._moving_average_data) == self._n_datapoints:
+            self._moving_average_data = self._moving_average_data[1:]
+        self._moving_average_data.append(new_data_point)
+        return sum(self._moving_average_data) / len(self._moving_average_data)
+
+
+def readings(n, seed=1):
+    rng = random.Random(seed)
+    return [None if rng.random() < MISSED else round(rng.uniform(0, 40), 1) for _ in range(n)]
+
+
+def check_window(n):
+    """Worst difference from the mean of the last n readings that aren't None."""
+    ma = moving_average.moving_average(n)
+    data = readings(N_CHECK)
+    worst = 0.0
+    for i, x in enumerate(data):
+        got = ma.update_moving_average(x)
+        window = [v for v in data[max(0, i + 1 - n):i + 1] if v is not None]
+        if not window:
+            if got is not None:
+                return math.inf
+            continue
+        worst = max(worst, abs(got - sum(window) / len(window)))
+    return worst
+
+
+def check_ewma(n):
+    ma = moving_average.moving_average(n, moving_average.MODE_EWMA)
+    alpha = 2 / (n + 1)
+    expected = None
+    worst = 0.0
+    for x in readings(N_CHECK):
+        got = ma.update_moving_average(x)
+        if x is not None:
+            expected = x if expected is None else expected + (x - expected) * alpha
+        worst = max(worst, abs(got - expected)) if expected is not None else worst
+    return worst
+
+
+def check_time_weighted(time_constant):
+    rng = random.Random(2)
+    ma = moving_average.moving_average(5, moving_average.MODE_TIME_WEIGHTED, time_constant)
+    expected = last = None
+    t = 0.0
+    worst = 0.0
+    for x in readings(N_CHECK):
+        t += rng.choice((2, 2, 2, 5, 15, 60)) # an adaptive cadence, and some missed packets
+        got = ma.update_moving_average(x, now=t)
+        if x is not None:
+            if expected is None:
+                expected = x
+            else:
+                expected += (x - expected) * (1 - math.exp(-(t - last) / time_constant))
+            last = t
+        worst = max(worst, abs(got - expected)) if expected is not None else worst
+
+    # After a long gap, a new reading is most of the average; after a short one, little of it.
+    short = moving_average.moving_average(5, moving_average.MODE_TIME_WEIGHTED, time_constant)
+    short.update_moving_average(0, now=0)
+    long = moving_average.moving_average(5, moving_average.MODE_TIME_WEIGHTED, time_constant)
+    long.update_moving_average(0, now=0)
+    gap_ok = (short.update_moving_average(10, now=1) < 10 / 2 < long.update_moving_average(10, now=time_constant * 3))
+    return worst, gap_ok
+
+
+class AtPacketTime():
+    """A time-weighted average that gets every reading at the time its packet came in - as the receiver used to."""
+    def __init__(self, time_constant):
+        self.ma = moving_average.moving_average(5, moving_average.MODE_TIME_WEIGHTED, time_constant)
+        self.now = None
+
+    def update_moving_average(self, new_data_point, now=None):
+        return self.ma.update_moving_average(new_data_point, self.now)
+
+
+class Receiver():
+    """Both ways, a packet at a time."""
+    def __init__(self, time_constant):
+        self.ma = moving_average.moving_average(5, moving_average.MODE_TIME_WEIGHTED, time_constant)
+        self.old = AtPacketTime(time_constant)
+        self.decoder = piwx_packet.DeltaDecoder()
+        self.sequence = self.old_sequence = self.time = None
+
+    def receive(self, packet, now):
+        """(the average, and the old way)"""
+        frame = self.decoder.decode(packet)
+        data_dict = piwx_rx.initial_dict()
+        self.old.now = now
+        with contextlib.redirect_stdout(io.StringIO()):
+            piwx_rx.apply_frame(self.decoder, frame, data_dict)
+            avg, self.sequence = piwx_rx.update_wind_average(self.ma, frame, data_dict, self.sequence, now, self.time)
+            old, self.old_sequence = piwx_rx.update_wind_average(self.old, frame, data_dict, self.old_sequence)
+        self.time = now
+        return avg, old
+
+
+def check_receiver(time_constant):
+    """(worst difference from having every reading as it happened, the least the old way was off),
+    for a gap backfilled from history, and a batch packet."""
+    interval = 3
+    winds = [8.0, 10.0, 12.0, 6.0, 14.0, 20.0, 4.0, 10.0, 16.0, 8.0, 12.0]
+    lost = (3, 4, 5)
+    truth = moving_average.moving_average(5, moving_average.MODE_TIME_WEIGHTED, time_constant)
+    after_gap = None
+    for i, wind in enumerate(winds):
+        expected = truth.update_moving_average(wind, now=i * interval)
+        if i == lost[-1] + 1:
+            after_gap = expected
+
+    # History packets, three in a row lost; compared just after the gap.
+    receiver = Receiver(time_constant)
+    encoder = piwx_packet.DeltaEncoder(10)
+    history = piwx_packet.WindHistory(4)
+    for i, wind in enumerate(winds):
+        packet = encoder.encode({piwx_constants.DICT_KEY_WIND: wind}, history, sequence=i)
+        history.add(wind)
+        if i not in lost:
+            averages = receiver.receive(packet, i * interval)
+        if i == lost[-1] + 1:
+            backfilled, old_backfilled = averages
+
+    # All of them in one batch packet.
+    receiver = Receiver(time_constant)
+    batch = piwx_packet.SampleBatch(len(winds))
+    for i, wind in enumerate(winds):
+        batch.add(i * interval * 1000, wind, None)
+    packet = piwx_packet.encode({piwx_constants.DICT_KEY_WIND: winds[-1]}, samples=batch)
+    batched, old_batched = receiver.receive(packet, (len(winds) - 1) * interval)
+
+    worst = max(abs(backfilled - after_gap), abs(batched - expected))
+    old_off = min(abs(old_backfilled - after_gap), abs(old_batched - expected))
+    return worst, old_off
+
+
+def per_update_us(ma, data, now=False):
+    start = time.perf_counter()
+    if now:
+        t = 0
+        for x in data:
+            t += 2
+            ma.update_moving_average(x, t)
+    else:
+        for x in data:
+            ma.update_moving_average(x)
+    return (time.perf_counter() - start) / len(data) * 1e6
+
+
+def main():
+    ok = True
+    print("Checks (worst difference from working it out the long way):")
+    for n in SIZES[:4]:
+        window = check_window(n)
+        ewma = check_ewma(n)
+        print(f"  n={n:<5} window {window:.2e}   EWMA {ewma:.2e}")
+        ok = ok and window < 0.005 + 1e-9 and ewma < 1e-9
+    weighted, gap_ok = check_time_weighted(15)
+    print(f"  time-weighted, 15 s, readings 2-60 s apart: {weighted:.2e}; a gap counts for more: {gap_ok}")
+    ok = ok and weighted < 1e-9 and gap_ok
+    worst, old_off = check_receiver(15)
+    print(f"  the receiver, time-weighted, with a backfilled gap and a batch: {worst:.2e} "
+          f"(giving them all the packet's time, as it did: {old_off:.2f} MPH off, or more)")
+    ok = ok and worst < 1e-9 and old_off > 0.1
+
+    print("\nPer update, us (CPython):")
+    print(f"  {'n':>6} {'old':>9} {'window':>9} {'EWMA':>9} {'time-wtd':>9}")
+    data = [x if x is not None else 0.0 for x in readings(20000)]
+    for n in SIZES:
+        warm = data[:n] # fill it first, so we time the steady state
+        old = OldMovingAverage(n)
+        for x in warm:
+            old.update_moving_average(x)
+        old_us = per_update_us(old, data[:max(200, 200000 // n)])
+        row = [old_us]
+        for mode in (moving_average.MODE_WINDOW, moving_average.MODE_EWMA, moving_average.MODE_TIME_WEIGHTED):
+            ma = moving_average.moving_average(n, mode)
+            for x in warm:
+                ma.update_moving_average(x, 0)
+            row.append(per_update_us(ma, data, now=mode == moving_average.MODE_TIME_WEIGHTED))
+        print(f"  {n:6} " + " ".join(f"{us:9.2f}" for us in row))
+
+    print("OK" if ok else "WRONG")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
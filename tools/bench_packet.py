@@ -0,0 +1,79 @@
+"""
+    Host-side benchmark: the binary packet codec vs. the old JSON packets.
+
+    Run from the repo root on a PC, not the Feather:
+        python tools/bench_packet.py [iterations]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import piwx_constants
+import piwx_packet
+
+# piwx_tx.MAX_RFM_MSG_LEN; we can't import piwx_tx on a PC.
+MAX_RFM_MSG_LEN = 60
+
+# A full packet: everything the format knows about.
+SAMPLE = {
+    piwx_constants.DICT_KEY_TEMPERATURE: 72.4,
+    piwx_constants.DICT_KEY_WIND:        12.6,
+    piwx_constants.DICT_KEY_GUST:        21.8,
+    piwx_constants.DICT_KEY_PRESSURE:    1013.2,
+    piwx_constants.DICT_KEY_HUMIDITY:    64.5,
+    piwx_constants.DICT_KEY_UPTIME:      123456,
+    }
+
+
+def json_encode(data_dict):
+    """What piwx_tx used to do: display strings, JSON, spaces squeezed out."""
+    strings = {}
+    for k, v in data_dict.items():
+        strings[k] = v if k == piwx_constants.DICT_KEY_UPTIME else f"{v:2.1f}"
+    return json.dumps(strings).replace(" ", "").encode("utf8")
+
+
+def json_decode(packet):
+    return json.loads(packet.decode("utf8"))
+
+
+def time_us(fn, arg, iterations):
+    """Mean microseconds per call."""
+    t_start = time.perf_counter_ns()
+    for _ in range(iterations):
+        fn(arg)
+    return (time.perf_counter_ns() - t_start) / iterations / 1000
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    json_packet = json_encode(SAMPLE)
+    binary_packet = piwx_packet.encode(SAMPLE)
+
+    print(f"Full packet, {len(SAMPLE)} fields, {iterations} iterations")
+    print(f"  JSON:   {len(json_packet):3} bytes  {json_packet}")
+    print(f"  binary: {len(binary_packet):3} bytes  {bytes(binary_packet).hex()}")
+    print(f"  (hardware limit is {MAX_RFM_MSG_LEN} bytes)")
+    print()
+    print(f"  {'':8} {'encode us':>10} {'decode us':>10}")
+    print(f"  {'JSON':8} {time_us(json_encode, SAMPLE, iterations):10.2f} "
+          f"{time_us(json_decode, json_packet, iterations):10.2f}")
+    print(f"  {'binary':8} {time_us(piwx_packet.encode, SAMPLE, iterations):10.2f} "
+          f"{time_us(piwx_packet.decode, binary_packet, iterations):10.2f}")
+
+    # What the two sides actually do: encode into a reused buffer, decode into a reused Frame.
+    buffer = piwx_packet.PacketBuffer(MAX_RFM_MSG_LEN)
+    decoder = piwx_packet.PacketDecoder()
+    print(f"  {'reused':8} {time_us(lambda d: piwx_packet.encode_into(buffer.buffer, d), SAMPLE, iterations):10.2f} "
+          f"{time_us(decoder.decode, binary_packet, iterations):10.2f}")
+
+    print()
+    print(f"Round trip: {piwx_packet.decode(binary_packet)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+    Host-side check and benchmark: anemom's period-mode wind estimate vs. plain counting.
+
+    Feeds steady synthetic pulse trains - each period +/-PERIOD_JITTER - from 0.1 to 100 mph
+    to an anemom.Anemom with each counter backend, on a virtual millisecond clock, like
+    tools/sim_pulse_counter.py (keypad scanning every KEYPAD_SCAN_INTERVAL; countio counting
+    every edge, with the edge times only as good as the polling). Every window's rate is compared
+    with the train's: counting only (PERIOD_MODE_BELOW_HZ = 0), and with the period estimator.
+    Also reports the CPU time poll_windows() takes per window, both ways.
+
+        python tools/bench_period.py [seconds per speed]
+"""
+import random
+import sys
+import time
+
+import host
+host.use_standins()
+
+import anemom
+import board
+import countio
+import keypad
+import supervisor
+
+SPEEDS_MPH = (0.1, 0.2, 0.5, 1, 2, 3, 5, 10, 20, 50, 100)
+PULSES_PER_MPH = 5 # per second; calibration.DEFAULT_POINTS is 0.2 mph per pulse per second
+PERIOD_JITTER = 0.05
+WINDOW_SECONDS = 1
+STALL_CHANCE = 0.02 # per poll
+STALL_MS = (20, 100)
+
+
+def pulse_falls(rate, seconds, rng):
+    """Times (ms) the pin goes low, and (ms) it goes high again - half a period later."""
+    pulses = []
+    t = rng.uniform(0, 1000 / rate)
+    while t < seconds * 1000:
+        period = 1000 / rate * (1 + rng.uniform(-PERIOD_JITTER, PERIOD_JITTER))
+        pulses.append((t, t + period / 2))
+        t += period
+    return pulses
+
+
+def simulate(backend, mph, seconds, period_mode, seed=1):
+    """Return ([window rates, pulses per second], seconds spent in poll_windows())."""
+
+    rng = random.Random(seed)
+    pulses = pulse_falls(mph * PULSES_PER_MPH, seconds, rng)
+
+    saved = anemom.PERIOD_MODE_BELOW_HZ
+    if not period_mode:
+        anemom.PERIOD_MODE_BELOW_HZ = 0
+    supervisor.set_ticks(0)
+    if backend == "countio":
+        counter = anemom.CountioCounter(board.D12)
+        hardware = countio.counters[-1]
+    else:
+        counter = anemom.KeypadCounter(board.D12)
+        hardware = keypad.scanners[-1]
+    anemometer = anemom.Anemom(board.D12, 0, counter=counter)
+    windows = anemom.PulseWindows(size=seconds // WINDOW_SECONDS + 1)
+    anemometer.start_windows(WINDOW_SECONDS, windows)
+
+    scan_ms = max(1, round(anemom.KEYPAD_SCAN_INTERVAL * 1000))
+    poll_ms = round(anemom.POLL_SECONDS * 1000)
+    pin_low = False
+    next_edge = 0
+    next_poll = 0
+    cpu = 0.0
+    for t in range(seconds * 1000 + 1):
+        supervisor.set_ticks(t)
+        if backend == "countio":
+            while next_edge < len(pulses) and pulses[next_edge][0] <= t:
+                hardware.count += 1
+                next_edge += 1
+        elif t % scan_ms == 0:
+            while next_edge < len(pulses) and pulses[next_edge][1] <= t:
+                next_edge += 1
+            low = next_edge < len(pulses) and pulses[next_edge][0] <= t
+            if low != pin_low:
+                pin_low = low
+                hardware.events.put(keypad.Event(0, low, t))
+
+        if t >= next_poll:
+            start = time.perf_counter()
+            anemometer.poll_windows(t)
+            cpu += time.perf_counter() - start
+            next_poll = t + poll_ms
+            if rng.random() < STALL_CHANCE:
+                next_poll += rng.randint(*STALL_MS)
+
+    counter.deinit()
+    supervisor.set_ticks(None)
+    anemom.PERIOD_MODE_BELOW_HZ = saved
+
+    rates = [windows._rates[(windows._head + i) % windows._size] for i in range(len(windows))]
+    return rates, cpu / max(len(rates), 1)
+
+
+def error_mph(rates, mph):
+    """Mean absolute error, after the estimator's had PERIOD_SPAN_MS to fill up."""
+    skip = anemom.PERIOD_SPAN_MS // 1000 // WINDOW_SECONDS + 1
+    errors = [abs(rate / PULSES_PER_MPH - mph) for rate in rates[skip:]]
+    return sum(errors) / len(errors)
+
+
+def main():
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    print(f"{seconds}s per speed, {WINDOW_SECONDS}s windows, periods +/-{PERIOD_JITTER:.0%}; "
+          f"period mode below {anemom.PERIOD_MODE_BELOW_HZ} Hz ({anemom.PERIOD_MODE_BELOW_HZ / PULSES_PER_MPH:g} mph)")
+    print(f"  mean error per window, mph (and CPU per window, us)")
+    print(f"  {'speed':>9}  {'countio: counting':>23} {'period':>15}   {'keypad: counting':>22} {'period':>15}")
+
+    ok = True
+    for mph in SPEEDS_MPH:
+        row = f"  {mph:5}mph"
+        for backend in ("countio", "keypad"):
+            counted, counted_cpu = simulate(backend, mph, seconds, False)
+            estimated, estimated_cpu = simulate(backend, mph, seconds, True)
+            counted_error = error_mph(counted, mph)
+            estimated_error = error_mph(estimated, mph)
+            row += (f"  {counted_error:8.3f} ({counted_cpu * 1e6:5.1f}us)"
+                    f" {estimated_error:6.3f} ({estimated_cpu * 1e6:5.1f}us)")
+            # The estimate should never be worse than counting, give or take.
+            ok = ok and estimated_error <= counted_error * 1.1 + 0.01
+        print(row)
+
+    print("OK" if ok else "PERIOD MODE WORSE")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,147 @@
+"""
+    Host-side check and benchmark: rolling_stats.py.
+
+    Feeds a few days of packets - temperature, wind, gust, pressure, humidity from
+    tools/weather_series.py, 2 to 15 seconds apart with the odd long gap - to a RollingStats,
+    and now and then checks every window of every field against working it out from the raw
+    readings in the window. Then the link going quiet: wind stops coming while the temperature
+    goes on, then nothing at all, and every window should empty out on time rather than hang on
+    to its last figures. Then reports the fixed memory it takes, and the time per packet
+    (all fields, all windows) and per query.
+
+        python tools/bench_rolling_stats.py [hours]
+"""
+import math
+import random
+import sys
+import time
+
+import host
+host.use_standins()
+
+import piwx_constants
+import rolling_stats
+import weather_series
+
+CHECK_EVERY = 97 # packets
+TOLERANCE = 1e-4 # relative; slots are stored as 32-bit floats
+
+
+def packets(hours, seed=1):
+    """[(time, data_dict)]"""
+    rng = random.Random(seed)
+    n = int(hours * 3600 / 5)
+    winds = weather_series.wind_series(n, seed)
+    result = []
+    t = 1000.0
+    for i in range(n):
+        t += rng.choice((2, 2, 3, 5, 15)) if rng.random() > 0.002 else rng.uniform(60, 1800)
+        result.append((t, {
+            piwx_constants.DICT_KEY_TEMPERATURE: 60 + 10 * math.sin(t / 86400 * 2 * math.pi) + rng.gauss(0, 0.2),
+            piwx_constants.DICT_KEY_WIND: winds[i],
+            piwx_constants.DICT_KEY_GUST: winds[i] * rng.uniform(1.0, 1.6),
+            piwx_constants.DICT_KEY_PRESSURE: 1013 + 5 * math.sin(t / 300000),
+            piwx_constants.DICT_KEY_HUMIDITY: 50 + rng.uniform(-5, 5),
+            }))
+    return result
+
+
+def close(a, b):
+    return abs(a - b) <= TOLERANCE * max(1.0, abs(a), abs(b))
+
+
+def check(stats, history, now):
+    """Number of (field, window) that don't match the raw readings in their windows."""
+    wrong = 0
+    for i, seconds in enumerate(stats.windows_s):
+        slot_s = seconds / rolling_stats.SLOTS
+        first_slot = int(now // slot_s) - rolling_stats.SLOTS + 1
+        recent = [d for t, d in history if int(t // slot_s) >= first_slot]
+        for field in stats.fields:
+            window = stats.window(field, i)
+            values = [d[field] for d in recent]
+            mean = sum(values) / len(values)
+            stddev = math.sqrt(sum((v - mean) ** 2 for v in values) / len(values))
+            if not (window.count() == len(values) and close(window.mean(), mean)
+                    and abs(window.stddev() - stddev) <= TOLERANCE * max(1.0, abs(mean))
+                    and close(window.min(), min(values)) and close(window.max(), max(values))):
+                wrong += 1
+    return wrong
+
+
+def stale_link(data):
+    """After the packets: wind goes missing for a few minutes, then the link goes quiet. True if it all ages out."""
+    stats = rolling_stats.RollingStats()
+    for t, d in data:
+        stats.update(d, t)
+    t = data[-1][0]
+    wind = piwx_constants.DICT_KEY_WIND
+    temperature = piwx_constants.DICT_KEY_TEMPERATURE
+    no_wind = dict(data[-1][1])
+    no_wind[wind] = "--"
+    for k in range(60):
+        stats.update(no_wind, t + 5 * (k + 1))
+    t += 300
+    ok = stats.window(wind, 0).count() == 0 and stats.window(wind, 1).count() > 0
+    ok = ok and stats.window(temperature, 0).count() > 0
+    ok = ok and stats.summary_text(wind, 0, "Wind", t).endswith("no data")
+
+    # Then nothing: each window empty by its length (and a slot) after the last packet.
+    for i, seconds in enumerate(stats.windows_s):
+        later = t + seconds + seconds / rolling_stats.SLOTS
+        ok = ok and stats.summary_text(temperature, i, "Temp", later).endswith("no data")
+        ok = ok and all(stats.window(temperature, j).count() > 0 for j in range(i + 1, len(stats.windows_s)))
+    stats.expire(t + 2 * max(stats.windows_s))
+    ok = ok and all(stats.window(field, i).count() == 0
+                    for field in stats.fields for i in range(len(stats.windows_s)))
+    print(f"  wind missing 5 minutes, then a quiet link: every window empties on time: {ok}")
+    return ok
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 72
+    data = packets(hours)
+    stats = rolling_stats.RollingStats()
+    longest = max(stats.windows_s)
+
+    history = []
+    checks = wrong = 0
+    for k, (t, d) in enumerate(data):
+        stats.update(d, t)
+        history.append((t, d))
+        if k % CHECK_EVERY == 0:
+            while history and history[0][0] < t - 2 * longest:
+                history.pop(0)
+            wrong += check(stats, history, t)
+            checks += len(stats.fields) * len(stats.windows_s)
+
+    print(f"{hours:g} hours, {len(data)} packets; {len(stats.fields)} fields x windows of "
+          f"{', '.join(str(s) for s in stats.windows_s)} s, {rolling_stats.SLOTS} slots each")
+    print(f"  checked {checks} windows against the raw readings: {wrong} wrong")
+    stale_ok = stale_link(data)
+    print(f"  memory: {stats.memory_bytes()} bytes of arrays (on the RP2040; 'i' and 'f' are 4 bytes there too)")
+
+    timed = rolling_stats.RollingStats()
+    start = time.perf_counter()
+    for t, d in data:
+        timed.update(d, t)
+    update_us = (time.perf_counter() - start) / len(data) * 1e6
+    start = time.perf_counter()
+    n_queries = 0
+    for _ in range(1000):
+        for field in timed.fields:
+            for i in range(len(timed.windows_s)):
+                window = timed.window(field, i)
+                window.min(); window.max(); window.mean(); window.stddev()
+                n_queries += 1
+    query_us = (time.perf_counter() - start) / n_queries * 1e6
+    print(f"  per packet, all fields and windows: {update_us:.1f} us; per window queried (min, max, mean, sd): "
+          f"{query_us:.1f} us (CPython)")
+
+    ok = wrong == 0 and stale_ok
+    print("OK" if ok else "WRONG")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
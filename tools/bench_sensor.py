@@ -0,0 +1,148 @@
+"""
+    Host-side check and benchmark: the forced-mode BME280 reads in sensors.py.
+
+    Runs against the simulated BME280 on the stand-in I2C bus (tools/standins/sim_bme280.py), which
+    turns the air's temperature, pressure and humidity into raw readings with Bosch's compensation
+    run backwards. Checks the driver gets them back, over a range of weather, and that skipped
+    measurements come back as None. Then, for each profile in sensors.PROFILES:
+    I2C transactions per read (vs. the Adafruit library's three properties), how long the sensor is
+    awake per minute at piwx_tx's temperature sampling period (vs. the library's continuous normal mode), the
+    noise in the readings, and how many reads the IIR filter takes to follow a 1 C step.
+
+        python tools/bench_sensor.py
+"""
+import statistics
+import sys
+import time
+
+import host
+host.use_standins()
+
+import adafruit_bme280.advanced
+import board
+import piwx_constants
+import piwx_tx
+import sensors
+
+N_NOISE = 300
+
+# The Adafruit library's defaults: normal mode, temperature and humidity 1x, pressure 16x, 125 ms standby.
+OLD_PROFILE = (1, 16, 1, 0)
+OLD_STANDBY_MS = 125
+
+
+def read(bme):
+    """bme.read(), without waiting: the simulated sensor measures at once."""
+    bme.start()
+    return bme.finish()
+
+
+def check_compensation(bus, model):
+    """Worst errors, (C, hPa, %), reading back known air."""
+    bme = sensors.BME280Forced(bus, profile="low power")
+    model.noise = False
+    worst = [0.0, 0.0, 0.0]
+    for temperature in range(-30, 50, 5):
+        for pressure in range(900, 1090, 15):
+            for humidity in range(5, 100, 15):
+                model.temperature, model.pressure, model.humidity = temperature, pressure, humidity
+                reading = read(bme)
+                worst[0] = max(worst[0], abs(reading.temperature - temperature))
+                worst[1] = max(worst[1], abs(reading.pressure - pressure))
+                worst[2] = max(worst[2], abs(reading.humidity - humidity))
+    model.noise = True
+    model.temperature, model.pressure, model.humidity = 21.0, 1013.0, 55.0
+    return worst
+
+
+def check_skipped(bus):
+    bme = sensors.BME280Forced(bus, profile=(1, 0, 0, 0))
+    reading = read(bme)
+    return reading.temperature is not None and reading.pressure is None and reading.humidity is None
+
+
+def transactions(bus, read):
+    before = bus.transactions
+    read()
+    return bus.transactions - before
+
+
+def old_library_read(old):
+    return old.temperature, old.pressure, old.humidity
+
+
+def awake_ms_per_minute(profile, seconds_between):
+    return sensors.measure_seconds(profile) * 1000 * 60 / seconds_between
+
+
+def steps_to_follow(bme, model):
+    """Reads until a 1 C step shows 90% of the way."""
+    model.noise = False
+    for _ in range(50):
+        read(bme)
+    model.temperature += 1.0
+    steps = 0
+    while read(bme).temperature < model.temperature - 0.1 and steps < 100:
+        steps += 1
+    model.temperature -= 1.0
+    model.noise = True
+    return steps + 1
+
+
+def main():
+    bus = board.I2C()
+    model = bus.devices[sensors.BME280_ADDRESS]
+    ok = True
+
+    worst = check_compensation(bus, model)
+    skipped_ok = check_skipped(bus)
+    print("Compensation, worst error reading back -30..45 C, 900..1080 hPa, 5..95 %: "
+          f"{worst[0]:.4f} C, {worst[1]:.4f} hPa, {worst[2]:.3f} %")
+    print(f"  skipped measurements come back as None: {skipped_ok}")
+    ok = ok and worst[0] < 0.01 and worst[1] < 0.01 and worst[2] < 0.05 and skipped_ok
+
+    old = adafruit_bme280.advanced.Adafruit_BME280_I2C(bus)
+    old_transactions = transactions(bus, lambda: old_library_read(old))
+    old_cycle_ms = sensors.measure_seconds(OLD_PROFILE) * 1000 + OLD_STANDBY_MS
+    old_awake = sensors.measure_seconds(OLD_PROFILE) * 1000 / old_cycle_ms * 60000
+    interval = piwx_tx.SAMPLE_PERIODS[piwx_constants.DICT_KEY_TEMPERATURE][0]
+    print(f"\nOne reading of T, P and H, reading every {interval} s:")
+    print(f"  {'':16} {'I2C':>4} {'measure':>8} {'awake':>9} {'noise':>7} {'noise':>7} {'reads to':>9} {'CPU':>7}")
+    print(f"  {'':16} {'txns':>4} {'ms':>8} {'ms/min':>9} {'C':>7} {'hPa':>7} {'follow':>9} {'us':>7}")
+    print(f"  {'Adafruit library':16} {old_transactions:4} {old_cycle_ms - OLD_STANDBY_MS:8.1f} {old_awake:9.0f}"
+          f" {'':>7} {'':>7} {'':>9} {'':>7}   (normal mode, all the time)")
+
+    for name, profile in sensors.PROFILES.items():
+        bme = sensors.BME280Forced(bus, profile=name)
+        n_transactions = transactions(bus, lambda: read(bme))
+        reading = read(bme)
+        same_reading = reading is read(bme)
+        temperatures = []
+        pressures = []
+        for _ in range(N_NOISE):
+            reading = read(bme)
+            temperatures.append(reading.temperature)
+            pressures.append(reading.pressure)
+        follow = steps_to_follow(bme, model)
+        bme.start()
+        start = time.perf_counter()
+        for _ in range(10000):
+            bme.finish()
+        cpu_us = (time.perf_counter() - start) / 10000 * 1e6
+        print(f"  {name:16} {n_transactions:4} {bme.measure_seconds * 1000:8.1f}"
+              f" {awake_ms_per_minute(profile, interval):9.1f}"
+              f" {statistics.pstdev(temperatures):7.4f} {statistics.pstdev(pressures):7.4f} {follow:9} {cpu_us:7.1f}")
+        ok = ok and n_transactions == 2 and same_reading
+
+    sensor = sensors.Sensor()
+    n_transactions = transactions(bus, sensor.read)
+    print(f"\nsensors.Sensor().read(): {n_transactions} transactions; the same Reading every time: "
+          f"{sensor.read() is sensor.read()}; {model.measurements} forced measurements in all")
+    ok = ok and n_transactions == 2
+
+    print("OK" if ok else "WRONG")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
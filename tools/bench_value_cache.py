@@ -0,0 +1,149 @@
+"""
+    Host-side check and benchmark: tft_22's cache of rendered values.
+
+    Checks ValueCache draws the same pixels bitmap_label does, for a range of values, from the BDF font. Then times
+    showing a value cold - the font's glyphs not loaded yet, so they're parsed out of the BDF -
+    with the glyphs loaded but the value not rendered yet, and warm, from the cache; next to
+    bitmap_label, which rebuilds its bitmap every time. Then boot to the first frame, with and
+    without the old pre-loading loop. Last, hours of the receiver's display pages
+    (tools/sim_display_refresh.py) at a few cache sizes: how often a value had to be rendered
+    while it was being shown - a visible stall - and how often warm_up() had it ready.
+
+    The times are the stand-ins' under CPython, not the Feather's; the KB of BDF parsed are the same.
+
+        python tools/bench_value_cache.py [hours]
+"""
+import contextlib
+import io
+import sys
+import time
+
+import host
+host.use_standins()
+
+from adafruit_bitmap_font import bitmap_font
+from adafruit_display_text import bitmap_label
+import tft_22
+import sim_display_refresh
+
+FONT_PATH = host.REPO_DIR + "/" + tft_22.DEFAULT_FONT_PATH
+CHECK_VALUES = (" 0", " 9", "10", "47", "72", "88", "-3", "100", "T?", "W?", "M")
+TIME_VALUES = (" 9", "72", "T?")
+CACHE_SIZES = (16 * 1024, 32 * 1024, 64 * 1024, 128 * 1024)
+MAX_COLD = 2 # values shown before warm_up() has loaded the glyphs: the first one, maybe the second
+
+
+def new_cache(font=None, max_bytes=tft_22.VALUE_CACHE_BYTES):
+    font = font or bitmap_font.load_font(FONT_PATH)
+    return tft_22.ValueCache(font, tft_22.DISPLAY_WIDTH + 5, tft_22.DISPLAY_HEIGHT, max_bytes)
+
+
+def same_pixels(value):
+    """Does the cache draw what bitmap_label does, where it's on the screen?"""
+    cache = new_cache()
+    label = bitmap_label.Label(cache._font, text=value)
+    ours = cache.get(value)
+    theirs = label.bitmap
+    if ours.height != theirs.height:
+        return False
+    width = min(ours.width, theirs.width)
+    for y in range(ours.height):
+        if ours._data[y * ours.width:y * ours.width + width] != theirs._data[y * theirs.width:y * theirs.width + width]:
+            return False
+        if any(ours._data[y * ours.width + width:(y + 1) * ours.width]): # past the end of bitmap_label's
+            return False
+    return True
+
+
+def timed(f):
+    start = time.perf_counter()
+    f()
+    return (time.perf_counter() - start) * 1000
+
+
+def time_value(value):
+    """(ms, BDF KB) to show it: cold, composed, warm; bitmap_label cold, and again."""
+    cache = new_cache()
+    font = cache._font
+    before = font.bytes_read
+    cold = timed(lambda: cache.get(value))
+    cold_kb = (font.bytes_read - before) / 1024
+    composed = timed(lambda: new_cache(font).get(value))
+    warm = timed(lambda: cache.get(value))
+
+    font = bitmap_font.load_font(FONT_PATH)
+    label = bitmap_label.Label(font)
+    label_cold = timed(lambda: setattr(label, "text", value))
+    label_again = timed(lambda: setattr(label, "text", value))
+    return cold, cold_kb, composed, warm, label_cold, label_again
+
+
+def boot(value_cache, preload, packed):
+    """(ms, BDF KB) from making the display to its first frame."""
+    start = time.perf_counter()
+    tft = tft_22.tft_22(0x000000, font_path=FONT_PATH, value_cache=value_cache, packed_font=packed)
+    if preload: # what init_hardware() used to do, commented out
+        for i in range(10):
+            tft.set_text(str(i))
+    tft.set_text("72")
+    tft.refresh()
+    ms = (time.perf_counter() - start) * 1000
+    font = tft._value_cache._font if value_cache else tft._text_area.font
+    return ms, getattr(font, "bytes_read", 0) / 1024
+
+
+def session(hours, max_bytes):
+    tft_22.VALUE_CACHE_BYTES = max_bytes
+    tft = tft_22.tft_22(0x000000, font_path=FONT_PATH, packed_font=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ok = sim_display_refresh.simulate((tft,), hours)[0]
+    return ok, tft, tft._value_cache
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    ok = True
+
+    bad = [value for value in CHECK_VALUES if not same_pixels(value)]
+    print(f"The cache draws the same pixels as bitmap_label for {len(CHECK_VALUES) - len(bad)} of "
+          f"{len(CHECK_VALUES)} values{'; not ' + repr(bad) if bad else ''}")
+    ok = ok and not bad
+
+    cache = new_cache()
+    print(f"A value's bitmap: {cache.width}x{cache.height}, {cache.entry_bytes} bytes; "
+          f"{tft_22.VALUE_CACHE_BYTES // 1024} KB holds {cache.max_entries}")
+    print(f"\nShowing a value, ms (stand-ins, CPython):")
+    print(f"  {'value':>6} {'cold':>7} {'BDF KB':>7} {'glyphs in':>10} {'cached':>7}   {'bitmap_label':>12} {'again':>7}")
+    for value in TIME_VALUES:
+        cold, cold_kb, composed, warm, label_cold, label_again = time_value(value)
+        print(f"  {value!r:>6} {cold:7.1f} {cold_kb:7.0f} {composed:10.2f} {warm:7.3f}   {label_cold:12.1f} {label_again:7.2f}")
+        ok = ok and warm < composed < cold
+
+    print(f"\nBoot to the first frame:")
+    for name, value_cache, preload, packed in (("bitmap_label", False, False, False),
+                                               ("bitmap_label, pre-loading 0-9", False, True, False),
+                                               ("value cache", True, False, False),
+                                               ("value cache, packed font", True, False, True)):
+        ms, kb = boot(value_cache, preload, packed)
+        print(f"  {name:30} {ms:7.0f} ms {kb:5.0f} KB of BDF parsed")
+
+    print(f"\n{hours:g} hours of the receiver's display pages:")
+    print(f"  {'cache':>6} {'values':>7} {'shown':>7} {'rendered':>9} {'loading':>8} {'warmed':>7} {'thrown':>7} {'KB':>5}")
+    print(f"  {'KB':>6} {'':>7} {'/h':>7} {'showing/h':>9} {'glyphs':>8} {'/h':>7} {'out/h':>7} {'used':>5}")
+    for max_bytes in CACHE_SIZES:
+        session_ok, tft, cache = session(hours, max_bytes)
+        shown = cache.hits + cache.misses
+        print(f"  {max_bytes // 1024:6} {cache.max_entries:7} {shown / hours:7.0f} {cache.misses / hours:9.1f}"
+              f" {cache.cold_misses:8} {cache.warmed / hours:7.1f} {cache.evictions / hours:7.1f}"
+              f" {cache.memory_bytes() / 1024:5.0f}")
+        ok = ok and session_ok and cache.cold_misses <= MAX_COLD
+    tft_22.VALUE_CACHE_BYTES = CACHE_SIZES[2]
+    print("  ('loading glyphs': values shown that had to wait for glyphs, in all; bitmap_label renders"
+          " every value it's given, as it's shown, and loads glyphs as they come up)")
+
+    print("OK" if ok else "WRONG")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,127 @@
+"""
+    Host-side checks: calibration.py's curve parsing, its lookup table's accuracy, and the fitter.
+
+      - both ways of writing a curve (settings.toml's one line, and the file) parse the same
+      - the table agrees with the exact piecewise-linear curve to within half a step, at every rate
+        from 0 to past the end of the table, for a few curves - one steep enough to go off the top
+        of the table's hundredths of MPH long before MAX_HZ
+      - the default matches the old 0.2 mph per pulse per second
+      - bad curves are refused, and load() falls back to the default
+      - tools/fit_calibration.py gets back a curve it made the readings from
+    and times a table lookup against interpolating.
+
+        python tools/check_calibration.py
+"""
+import os
+import sys
+import time
+
+import host
+host.use_standins()
+
+import calibration
+import fit_calibration
+
+CURVES = {
+    "default": calibration.DEFAULT_POINTS,
+    "start-up offset": ((0, 0.0), (0.5, 1.1), (2, 1.6), (100, 20.3)),
+    "steep": ((0, 0.0), (0.1, 3.0), (1, 4.0), (10, 6.0), (300, 70.0)),
+    "off the table": ((0, 0.0), (1, 2.6)),
+}
+STEEP_TEXT = "0:0, 1:2.6"
+SETTING_TEXT = "0:0, 0.5:1.1, 2:1.6, 100:20.3"
+FILE_TEXT = """# pulses per second, mph
+0 0
+0.5 1.1   # start-up
+2 1.6
+100 20.3
+"""
+
+
+def table_error_bound(curve):
+    """Half a step along the steepest segment, plus the rounding to hundredths."""
+    points = curve.points
+    steepest = max(abs((points[i][1] - points[i - 1][1]) / (points[i][0] - points[i - 1][0]))
+                   for i in range(1, len(points)))
+    return steepest * 0.5 / calibration.STEPS_PER_HZ + 0.005 + 1e-9
+
+
+def check_table(name, points):
+    curve = calibration.Calibration(points)
+    bound = table_error_bound(curve)
+    worst = 0.0
+    for i in range(int(calibration.MAX_HZ * 1.2 * 100)):
+        rate = i / 100
+        worst = max(worst, abs(curve.mph(rate) - max(0.0, curve.exact_mph(rate))))
+    ok = worst <= bound
+    print(f"  {name:<16} worst table error {worst:.4f} mph (allowed {bound:.4f})  {'ok' if ok else 'WRONG'}")
+    return ok
+
+
+def check_refused(points):
+    try:
+        calibration.Calibration(points)
+    except ValueError:
+        return True
+    return False
+
+
+def main():
+    ok = True
+
+    same = calibration.parse_points(SETTING_TEXT) == calibration.parse_points(FILE_TEXT)
+    print(f"  setting and file formats parse the same: {same}")
+    ok = ok and same
+
+    for name, points in CURVES.items():
+        ok = check_table(name, points) and ok
+
+    default = calibration.Calibration(calibration.DEFAULT_POINTS)
+    worst = max(abs(default.mph(r / 10) - r / 10 * 0.2) for r in range(0, 5000))
+    print(f"  default vs. 0.2 mph per Hz, 0-500 Hz: worst {worst:.4f} mph")
+    ok = ok and worst <= table_error_bound(default)
+    negative = all(default.mph(rate) == default.mph(0) for rate in (-0.01, -1, -1000))
+    print(f"  a negative rate is the same as 0: {negative}")
+    ok = ok and negative
+
+    refused = all(check_refused(points) for points in (
+        ((0, 0),), ((0, 0), (2, 1), (1, 2)), ((0, 0), (1, 1), (1, 2)), ((1, 0), (2, 1))))
+    os.environ[calibration.CALIBRATION_SETTING] = "0:0, 2:1, 1:3"
+    fell_back = calibration.load().points == tuple(calibration.DEFAULT_POINTS)
+    os.environ[calibration.CALIBRATION_SETTING] = "0 0, 1"
+    fell_back = fell_back and calibration.load().points == tuple(calibration.DEFAULT_POINTS)
+    os.environ[calibration.CALIBRATION_SETTING] = SETTING_TEXT
+    loaded = calibration.load().points == tuple(calibration.parse_points(SETTING_TEXT))
+    os.environ[calibration.CALIBRATION_SETTING] = STEEP_TEXT
+    loaded = loaded and calibration.load().points == tuple(calibration.parse_points(STEEP_TEXT))
+    del os.environ[calibration.CALIBRATION_SETTING]
+    print(f"  bad curves refused: {refused}; load() falls back: {fell_back}; loads the setting: {loaded}")
+    ok = ok and refused and fell_back and loaded
+
+    # Readings exactly on a known curve, at plenty of rates; the fit should land on it.
+    true_curve = calibration.Calibration(CURVES["start-up offset"])
+    readings = [(r / 8, true_curve.exact_mph(r / 8)) for r in range(0, 8 * 150)]
+    fitted = fit_calibration.fit(readings, [hz for hz, _ in true_curve.points])
+    worst = max(abs(mph - true_mph) for (_, mph), (_, true_mph) in zip(fitted, true_curve.points))
+    print(f"  fit of readings on a known curve: worst knot off by {worst:.5f} mph")
+    ok = ok and worst < 0.001
+
+    curve = calibration.Calibration(CURVES["steep"])
+    rates = [i / 7 for i in range(1000)]
+    start = time.perf_counter()
+    for rate in rates:
+        curve.mph(rate)
+    table_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for rate in rates:
+        curve.exact_mph(rate)
+    exact_s = time.perf_counter() - start
+    print(f"  per conversion (CPython): table {table_s / len(rates) * 1e6:.2f} us, "
+          f"interpolating {exact_s / len(rates) * 1e6:.2f} us")
+
+    print("OK" if ok else "WRONG")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,118 @@
+"""
+    Host-side build tool: compile the BDF fonts in fonts/ into packed binary fonts for tft_22.
+
+    Keeps just the glyphs the station shows (tft_22.FONT_CHARACTERS), and writes them in the
+    format tft_22.PackedFont reads: a header, an index of the glyphs by code point, and each
+    glyph's bitmap - BDF's rows, as bytes rather than hex. Each font goes next to its BDF, as .pbf;
+    copy it to the Feather's fonts/ with the BDF. With --check, just says if any .pbf is out of date.
+
+        python tools/compile_font.py [--check] [font.bdf ...]
+"""
+import argparse
+import glob
+import os
+import struct
+import sys
+
+import host
+host.use_standins()
+
+import tft_22
+
+
+class BDFGlyph():
+    def __init__(self, code_point):
+        self.code_point = code_point
+        self.width = self.height = self.dx = self.dy = self.shift_x = 0
+        self.rows = []
+
+
+def read_bdf(path):
+    """(bounding box, ascent, descent, {code point: BDFGlyph})"""
+    bounding_box = (0, 0, 0, 0)
+    ascent = descent = 0
+    glyphs = {}
+    glyph = None
+    in_bitmap = False
+    with open(path) as f:
+        for line in f:
+            words = line.split()
+            if not words:
+                continue
+            keyword = words[0]
+            if glyph is None:
+                if keyword == "FONTBOUNDINGBOX":
+                    bounding_box = tuple(int(v) for v in words[1:5])
+                elif keyword == "FONT_ASCENT":
+                    ascent = int(words[1])
+                elif keyword == "FONT_DESCENT":
+                    descent = int(words[1])
+                elif keyword == "ENCODING":
+                    glyph = BDFGlyph(int(words[1]))
+            elif keyword == "ENDCHAR":
+                glyphs[glyph.code_point] = glyph
+                glyph = None
+                in_bitmap = False
+            elif in_bitmap:
+                glyph.rows.append(bytes.fromhex(words[0])[:(glyph.width + 7) // 8])
+            elif keyword == "DWIDTH":
+                glyph.shift_x = int(words[1])
+            elif keyword == "BBX":
+                glyph.width, glyph.height, glyph.dx, glyph.dy = (int(v) for v in words[1:5])
+            elif keyword == "BITMAP":
+                in_bitmap = True
+    return bounding_box, ascent, descent, glyphs
+
+
+def compile_font(path, characters=tft_22.FONT_CHARACTERS):
+    """The packed font, as bytes; and the code points it didn't have."""
+    bounding_box, ascent, descent, glyphs = read_bdf(path)
+    wanted = sorted(set(ord(c) for c in characters))
+    missing = [cp for cp in wanted if cp not in glyphs]
+    kept = [glyphs[cp] for cp in wanted if cp in glyphs]
+
+    header_size = struct.calcsize(tft_22.PACKED_HEADER)
+    offset = header_size + len(kept) * struct.calcsize(tft_22.PACKED_INDEX)
+    index = b""
+    bitmaps = b""
+    for glyph in kept:
+        data = b"".join(glyph.rows)
+        if len(glyph.rows) != glyph.height or len(data) != glyph.height * ((glyph.width + 7) // 8):
+            raise ValueError(f"{path}: glyph {glyph.code_point} has the wrong number of rows or bytes")
+        index += struct.pack(tft_22.PACKED_INDEX, glyph.code_point, glyph.width, glyph.height,
+                             glyph.dx, glyph.dy, glyph.shift_x, offset + len(bitmaps))
+        bitmaps += data
+    header = struct.pack(tft_22.PACKED_HEADER, tft_22.PACKED_MAGIC, tft_22.PACKED_VERSION, 0, len(kept),
+                         *bounding_box, ascent, descent)
+    return header + index + bitmaps, missing
+
+
+def packed_path(path):
+    return os.path.splitext(path)[0] + ".pbf"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile BDF fonts into tft_22's packed format.")
+    parser.add_argument("fonts", nargs="*", help="BDF files (default: all of fonts/*.bdf)")
+    parser.add_argument("--check", action="store_true", help="don't write anything; fail if a .pbf is out of date")
+    args = parser.parse_args()
+
+    paths = args.fonts or sorted(glob.glob(os.path.join(host.REPO_DIR, "fonts", "*.bdf")))
+    ok = True
+    for path in paths:
+        packed, missing = compile_font(path)
+        out = packed_path(path)
+        note = f"; not in it: {''.join(chr(cp) for cp in missing)!r}" if missing else ""
+        if args.check:
+            current = os.path.exists(out) and open(out, "rb").read() == packed
+            print(f"{os.path.relpath(out)}: {'up to date' if current else 'OUT OF DATE'}")
+            ok = ok and current
+        else:
+            with open(out, "wb") as f:
+                f.write(packed)
+            print(f"{os.path.relpath(path)}: {os.path.getsize(path)} bytes -> {os.path.relpath(out)}: {len(packed)} bytes{note}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
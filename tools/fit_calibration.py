@@ -0,0 +1,160 @@
+"""
+    Host-side CLI: fit an anemometer calibration curve for calibration.py.
+
+    Give it readings taken with our anemometer next to a reference one - a file of
+    'pulses_per_second reference_mph' pairs, one per line (commas or spaces; # comments) -
+    and it fits a piecewise-linear curve with knots at 0 and at quantiles of the readings,
+    by least squares, and prints it for settings.toml. With -o it also writes it as a
+    calibration file (calibration.CALIBRATION_FILE on the Feather).
+
+        python tools/fit_calibration.py readings.txt [--knots 6] [-o anemometer_calibration.txt]
+        python tools/fit_calibration.py --synthetic 2000     # try it on made-up readings
+"""
+import argparse
+import random
+
+import host
+host.use_standins()
+
+import calibration
+
+SYNTHETIC_START_MPH = 1.0  # a made-up anemometer that doesn't turn below this
+SYNTHETIC_NOISE_MPH = 0.3  # and a reference that's this noisy
+
+
+def synthetic_truth(rate):
+    """The made-up anemometer's true curve: a start-up offset, then a little less than linear."""
+    if rate <= 0:
+        return SYNTHETIC_START_MPH / 2 # somewhere below start-up, on average
+    return SYNTHETIC_START_MPH + 0.19 * rate - 0.00005 * rate * rate
+
+
+def synthetic_readings(n, seed=1):
+    """[(pulses per second, reference mph)], over 0-60 mph, more of them in light wind."""
+    rng = random.Random(seed)
+    readings = []
+    for _ in range(n):
+        rate = 0 if rng.random() < 0.1 else rng.expovariate(1 / 40)
+        mph = synthetic_truth(rate) + rng.gauss(0, SYNTHETIC_NOISE_MPH)
+        if rate == 0:
+            mph = rng.uniform(0, SYNTHETIC_START_MPH)
+        readings.append((rate, max(0.0, mph)))
+    return readings
+
+
+def read_readings(path):
+    readings = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#")[0].replace(",", " ").split()
+            if line:
+                readings.append((float(line[0]), float(line[1])))
+    return readings
+
+
+def choose_knots(readings, n_knots):
+    """0, then quantiles of the (non-zero) rates, ending at the biggest - with more in between
+    wherever that leaves a gap of more than a quarter of the range."""
+    rates = sorted(rate for rate, _ in readings if rate > 0)
+    knots = [0.0]
+    for k in range(1, n_knots):
+        rate = rates[min(len(rates) - 1, round(k * (len(rates) - 1) / (n_knots - 1)))]
+        if rate > knots[-1]:
+            knots.append(rate)
+    max_gap = knots[-1] / 4
+    split = [knots[0]]
+    for knot in knots[1:]:
+        n = int((knot - split[-1]) / max_gap) + 1
+        start = split[-1]
+        for j in range(1, n + 1):
+            split.append(start + (knot - start) * j / n)
+    return split
+
+
+def hat_weights(knots, rate):
+    """(i, w): rate is w of the way from knot i to knot i+1 - or past the end, along the last segment."""
+    for i in range(1, len(knots) - 1):
+        if rate < knots[i]:
+            break
+    else:
+        i = len(knots) - 1
+    return i - 1, (rate - knots[i - 1]) / (knots[i] - knots[i - 1])
+
+
+def fit(readings, knots, ridge=1e-9):
+    """Least-squares MPH at each knot, for a curve linear in between. Returns [(hz, mph)]."""
+    n = len(knots)
+    ata = [[0.0] * n for _ in range(n)]
+    atb = [0.0] * n
+    for rate, mph in readings:
+        i, w = hat_weights(knots, rate)
+        row = ((i, 1 - w), (i + 1, w))
+        for a, wa in row:
+            atb[a] += wa * mph
+            for b, wb in row:
+                ata[a][b] += wa * wb
+    for a in range(n):
+        ata[a][a] += ridge
+
+    # Gaussian elimination; it's small.
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(ata[r][col]))
+        ata[col], ata[pivot] = ata[pivot], ata[col]
+        atb[col], atb[pivot] = atb[pivot], atb[col]
+        for r in range(col + 1, n):
+            f = ata[r][col] / ata[col][col]
+            for c in range(col, n):
+                ata[r][c] -= f * ata[col][c]
+            atb[r] -= f * atb[col]
+    values = [0.0] * n
+    for r in range(n - 1, -1, -1):
+        values[r] = (atb[r] - sum(ata[r][c] * values[c] for c in range(r + 1, n))) / ata[r][r]
+    return [(knots[i], max(0.0, values[i])) for i in range(n)]
+
+
+def rms_error(readings, to_mph):
+    return (sum((to_mph(rate) - mph) ** 2 for rate, mph in readings) / len(readings)) ** 0.5
+
+
+def setting_text(points):
+    return ", ".join(f"{hz:g}:{mph:.2f}" for hz, mph in points)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit an anemometer calibration curve from reference readings.")
+    parser.add_argument("readings", nargs="?", help="file of 'pulses_per_second reference_mph' lines")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="use N made-up readings instead")
+    parser.add_argument("--knots", type=int, default=6)
+    parser.add_argument("-o", "--output", help="also write the curve to this calibration file")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        readings = synthetic_readings(args.synthetic)
+    elif args.readings:
+        readings = read_readings(args.readings)
+    else:
+        parser.error("give a readings file, or --synthetic N")
+
+    points = fit(readings, choose_knots(readings, args.knots))
+    curve = calibration.Calibration(points)
+    default = calibration.Calibration(calibration.DEFAULT_POINTS)
+
+    print(f"{len(readings)} readings, {len(points)} knots")
+    print(f"  rms error vs. reference: fitted {rms_error(readings, curve.mph):.3f} mph, "
+          f"default {rms_error(readings, default.mph):.3f} mph")
+    if args.synthetic:
+        worst = max(abs(curve.mph(r / 4) - synthetic_truth(r / 4)) for r in range(4, 4 * 200))
+        print(f"  worst error vs. the made-up anemometer's true curve, 1-200 Hz: {worst:.3f} mph")
+    print("\nFor settings.toml:")
+    print(f'{calibration.CALIBRATION_SETTING} = "{setting_text(points)}"')
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(f"# pulses per second, mph - fitted by tools/fit_calibration.py from {len(readings)} readings\n")
+            for hz, mph in points:
+                f.write(f"{hz:g} {mph:.2f}\n")
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+    Host-side fuzz test and throughput benchmark for the receiver's packet decoder.
+
+    Builds a pool of packets - good ones of every kind, good ones with bits flipped, truncated or padded,
+    and plain random bytes (what a packet under someone else's encryption key decrypts to) -
+    and feeds them through piwx_packet.DeltaDecoder over and over. The decoder must never raise,
+    must accept every good packet with the right values, and should accept almost nothing else.
+
+        python tools/fuzz_packet.py [packets] [seed]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import piwx_constants
+import piwx_packet
+
+
+POOL_SIZE = 100_000
+
+
+def random_reading(rng):
+    """A data dict with a random selection of fields, and random values in their ranges."""
+    data = {}
+    for key, fmt, scale in piwx_constants.PACKET_FIELDS:
+        if rng.random() < 0.7:
+            lo, hi = piwx_packet._FORMAT_LIMITS[fmt]
+            data[key] = rng.randint(lo, hi) / scale
+    data[piwx_constants.DICT_KEY_WIND] = rng.randint(0, 600) / 10
+    return data
+
+
+def good_packet(rng, encoder, history):
+    """A valid packet of a random kind."""
+    data = random_reading(rng)
+    kind = rng.randrange(4)
+    sequence = rng.randrange(piwx_packet.SEQUENCE_MODULUS)
+    if kind == 0:
+        if rng.random() < 0.5:
+            return piwx_packet.encode(data, sequence=sequence, tx_ticks=rng.randrange(1 << 29),
+                                      next_send_ms=rng.randrange(65536))
+        return piwx_packet.encode(data, sequence=sequence)
+    if kind == 1:
+        batch = piwx_packet.SampleBatch(rng.randint(1, piwx_packet.batch_size_limit(60)))
+        while not batch.is_full():
+            batch.add(rng.randrange(1 << 29), rng.randint(0, 600) / 10,
+                      None if rng.random() < 0.2 else rng.randint(-400, 1200) / 10)
+        return piwx_packet.encode(data, samples=batch, sequence=sequence)
+    packet = encoder.encode(data, history if kind == 3 else None, sequence)
+    history.add(data[piwx_constants.DICT_KEY_WIND])
+    return packet
+
+
+def corrupt(rng, packet):
+    """The packet with one kind of damage."""
+    packet = bytearray(packet)
+    kind = rng.randrange(4)
+    if kind == 0:
+        for _ in range(rng.randint(1, 3)):
+            packet[rng.randrange(len(packet))] ^= 1 << rng.randrange(8)
+    elif kind == 1:
+        del packet[rng.randrange(len(packet)):]
+    elif kind == 2:
+        packet += bytes(rng.randrange(256) for _ in range(rng.randint(1, 8)))
+    else:
+        packet[rng.randrange(len(packet))] = rng.randrange(256)
+    return packet
+
+
+def make_pool(rng):
+    """Return a list of (packet, expected Frame as a dict, or None if it should be rejected)."""
+
+    encoder = piwx_packet.DeltaEncoder(10)
+    history = piwx_packet.WindHistory(4)
+    pool = []
+    while len(pool) < POOL_SIZE:
+        choice = rng.random()
+        if choice < 0.3:
+            packet = good_packet(rng, encoder, history)
+            pool.append((bytearray(packet), piwx_packet.decode(packet)))
+        elif choice < 0.7:
+            original = good_packet(rng, encoder, history)
+            damaged = corrupt(rng, original)
+            pool.append((damaged, None if damaged != original else piwx_packet.decode(original)))
+        else:
+            length = rng.randint(0, 70)
+            pool.append((bytearray(rng.randrange(256) for _ in range(length)), None))
+    return pool
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    rng = random.Random(seed)
+
+    print(f"Building a pool of {POOL_SIZE} packets...")
+    pool = make_pool(rng)
+    n_good = sum(1 for _, expected in pool if expected is not None)
+    print(f"  {n_good} good, {len(pool) - n_good} damaged or random")
+
+    # Correctness, once through the pool.
+    decoder = piwx_packet.DeltaDecoder()
+    wrong = 0
+    false_accepts = 0
+    for packet, expected in pool:
+        frame = decoder.decode(packet)
+        if expected is None:
+            if frame is not None:
+                false_accepts += 1
+        elif frame is None or frame.to_dict() != expected:
+            wrong += 1
+    print(f"  good packets decoded wrong or rejected: {wrong}")
+    print(f"  bad packets accepted: {false_accepts} ({false_accepts / (len(pool) - n_good):.3%})")
+    print(f"  rejected: length {decoder.bad_length}, checksum {decoder.bad_checksum}, "
+          f"version {decoder.bad_version}, layout {decoder.bad_layout}")
+
+    # Throughput: n packets, round and round the pool. Any exception here is a failure.
+    print(f"Decoding {n} packets...")
+    decode = piwx_packet.DeltaDecoder().decode
+    packets = [packet for packet, _ in pool]
+    accepted = 0
+    t_start = time.perf_counter()
+    for i in range(n):
+        if decode(packets[i % POOL_SIZE]) is not None:
+            accepted += 1
+    elapsed = time.perf_counter() - t_start
+    print(f"  {n / elapsed:,.0f} packets/s, {elapsed / n * 1e6:.2f} us/packet, {accepted} accepted, no exceptions")
+
+    if wrong:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""
+    Lets the host-side tools import the Feather code under CPython.
+
+    The modules in tools/standins stand in for the CircuitPython built-ins and Adafruit libraries
+    the Feather code imports (board, digitalio, adafruit_rfm69, ...), just enough to run it on a PC.
+    Call use_standins() before importing any of the Feather code.
+"""
+import os
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TOOLS_DIR)
+STANDINS_DIR = os.path.join(TOOLS_DIR, "standins")
+
+
+def use_standins():
+    """Put the repo and the stand-in modules on the import path."""
+    for path in (STANDINS_DIR, REPO_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
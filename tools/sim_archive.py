@@ -0,0 +1,142 @@
+"""
+    Host-side check and benchmark: archive.py.
+
+    Feeds weeks of packets - temperature, wind and gust, from tools/weather_series.py, 2 to 15
+    seconds apart with the odd gap, and a few hours' outage now and then - to an archive.Archive,
+    and every so often asks it about the last hour, the last 24 hours, the last week and some
+    random stretch - as of the last packet, or of some time after it, as if the link had gone
+    quiet - checking each answer against working it out from the raw readings in the same
+    buckets. And that a day after the last packet, the last 24 hours is empty. Then reports the
+    fixed memory it takes, and the time per insert and per query.
+
+        python tools/sim_archive.py [weeks]
+"""
+import bisect
+import math
+import random
+import sys
+import time
+
+import host
+host.use_standins()
+
+import archive
+import piwx_constants
+import weather_series
+
+CHECK_EVERY = 9973 # packets
+OUTAGE_CHANCE = 0.00005 # per packet
+TOLERANCE = 0.5 / archive.SCALE + 1e-6 # buckets are stored rounded
+
+FIELDS = archive.FIELDS
+
+# How long after the last packet the checks ask, as if the link had gone quiet; seconds.
+QUIET = (0, 0, 0, 90, 3 * 3600, 20 * 3600, 30 * 3600)
+
+
+def packets(weeks, seed=1):
+    """Yields (time, data_dict)."""
+    rng = random.Random(seed)
+    end = weeks * 7 * 86400
+    winds = weather_series.wind_series(int(end / 4), seed)
+    t = 0.0
+    for i in range(len(winds)):
+        if rng.random() < OUTAGE_CHANCE:
+            t += rng.uniform(3600, 4 * 3600)
+        t += rng.choice((2, 2, 3, 5, 15)) if rng.random() > 0.002 else rng.uniform(60, 1800)
+        yield t, {
+            piwx_constants.DICT_KEY_TEMPERATURE: 60 + 10 * math.sin(t / 86400 * 2 * math.pi) + rng.gauss(0, 0.5),
+            piwx_constants.DICT_KEY_WIND: winds[i],
+            piwx_constants.DICT_KEY_GUST: winds[i] * rng.uniform(1.0, 1.6),
+            }
+        if t > end:
+            return
+
+
+def expected(times, values, tier, start, end):
+    """(low, high, mean of bucket means) from the raw readings, bucketed like 'tier'; or None."""
+    first = max(int(start // tier.seconds), tier.oldest_id())
+    last = int(end // tier.seconds)
+    lo = bisect.bisect_left(times, first * tier.seconds)
+    hi = bisect.bisect_left(times, (last + 1) * tier.seconds)
+    buckets = {}
+    for i in range(lo, hi):
+        buckets.setdefault(int(times[i] // tier.seconds), []).append(values[i])
+    if not buckets:
+        return None
+    means = [sum(b) / len(b) for b in buckets.values()]
+    return (min(min(b) for b in buckets.values()), max(max(b) for b in buckets.values()),
+            sum(means) / len(means))
+
+
+def check(arch, times, history, rng):
+    """Number of wrong answers, and the number of queries."""
+    now = arch.last_time + rng.choice(QUIET)
+    ranges = [(now - 3600, now), (now - 86400, now), (now - 7 * 86400, now)]
+    start = rng.uniform(now - 14 * 86400, now)
+    ranges.append((start, rng.uniform(start, now)))
+    wrong = queries = 0
+    for start, end in ranges:
+        tier = arch.tier_for(start)
+        for f, field in enumerate(FIELDS):
+            got = arch.query(field, start, end)
+            want = expected(times, history[f], tier, start, end)
+            queries += 1
+            if got is None or want is None:
+                wrong += (got is None) != (want is None)
+            elif any(abs(g - w) > TOLERANCE for g, w in zip(got, want)):
+                wrong += 1
+    return wrong, queries
+
+
+def main():
+    weeks = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    rng = random.Random(2)
+    arch = archive.Archive()
+    times = []
+    history = [[] for _ in FIELDS]
+    wrong = queries = n = 0
+    for t, d in packets(weeks):
+        arch.add(d, t)
+        times.append(t)
+        for f, field in enumerate(FIELDS):
+            history[f].append(d[field])
+        n += 1
+        if n % CHECK_EVERY == 0:
+            w, q = check(arch, times, history, rng)
+            wrong += w
+            queries += q
+
+    tiers = ", ".join(f"{tier.size} x {tier.seconds // 60} min" for tier in arch.tiers)
+    print(f"{weeks:g} weeks, {n} packets ({(times[-1] - times[0]) / 86400:.1f} days); {len(FIELDS)} fields; {tiers}")
+    print(f"  checked {queries} range queries against the raw readings: {wrong} wrong")
+    print(f"  memory: {arch.memory_bytes()} bytes of arrays, however long it runs")
+    print(f"  {arch.summary_text(times[-1])}")
+    quiet = arch.summary_text(times[-1] + 24 * 3600 + 60)
+    stale_ok = quiet == "24h: no temperature, no wind"
+    print(f"  a day after the last packet: '{quiet}'  {'ok' if stale_ok else 'WRONG'}")
+
+    timed = archive.Archive()
+    data = list(packets(min(weeks, 1), seed=3))
+    start = time.perf_counter()
+    for t, d in data:
+        timed.add(d, t)
+    insert_us = (time.perf_counter() - start) / len(data) * 1e6
+    start = time.perf_counter()
+    for _ in range(100):
+        timed.last_24h(piwx_constants.DICT_KEY_TEMPERATURE, timed.last_time)
+    day_us = (time.perf_counter() - start) / 100 * 1e6
+    start = time.perf_counter()
+    for _ in range(100):
+        timed.query(piwx_constants.DICT_KEY_GUST, timed.last_time - 14 * 86400, timed.last_time)
+    fortnight_us = (time.perf_counter() - start) / 100 * 1e6
+    print(f"  per insert, all fields and tiers: {insert_us:.1f} us; per query: last 24 h {day_us:.0f} us "
+          f"(144 buckets), 2 weeks {fortnight_us:.0f} us (336 buckets) (CPython)")
+
+    ok = wrong == 0 and stale_ok
+    print("OK" if ok else "WRONG")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
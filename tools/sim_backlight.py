@@ -0,0 +1,169 @@
+"""
+    Host-side check and benchmark: the receiver's backlight control (backlight.py).
+
+    Makes a day of light at the receiver, a reading a second: daylight through a window, clouds
+    drifting over - dimming it in a few seconds and clearing as fast - people walking past the
+    sensor, a lamp on in the evening, and sensor noise. Runs it, on a virtual clock, through
+    BacklightController driving the real tft_22's backlight PWM (the stand-in counts the writes and
+    the light sensor's I2C reads), and through the old way: read the sensor and set the backlight
+    every BRIGHTNESS_INTERVAL. Reports reads and writes per hour, the biggest single step, how often
+    the brightness turned around (flicker), and how long each took to follow the lamp coming on.
+
+        python tools/sim_backlight.py [hours]
+"""
+import contextlib
+import io
+import math
+import os
+import random
+import sys
+
+import host
+host.use_standins()
+
+import adafruit_vcnl4020
+import backlight
+import pwmio
+import tft_22
+
+FONT_PATH = os.path.join(host.REPO_DIR, tft_22.DEFAULT_FONT_PATH) # so we can run from anywhere
+BRIGHTNESS_INTERVAL = 1 # seconds; what the receiver's brightness task used
+DAYLIGHT_LUX = 250      # at noon, through the window
+LAMP_LUX = 60
+LAMP_ON = (18 * 3600, 23 * 3600)
+NOISE = 0.03            # of the reading
+SETTLED_PERCENT = 5     # following the lamp: to within this of where it ends up
+
+
+def light_trace(seconds, seed=1):
+    """Lux, a value a second."""
+    rng = random.Random(seed)
+    cloud = [1.0] * seconds
+    t = 0
+    while t < seconds:
+        t += int(rng.expovariate(1 / 600))
+        length = rng.randint(20, 300)
+        depth = rng.uniform(0.3, 0.8)
+        for i in range(length):
+            if t + i < seconds:
+                edge = min(1, i / 5, (length - i) / 5) # a few seconds to come and go
+                cloud[t + i] = min(cloud[t + i], 1 - depth * edge)
+        t += length
+
+    trace = []
+    for t in range(seconds):
+        day = (t % 86400) / 86400
+        daylight = DAYLIGHT_LUX * max(0.0, math.sin(math.pi * (day - 0.25) / 0.5)) if 0.25 < day < 0.75 else 0.0
+        lux = daylight * cloud[t]
+        if LAMP_ON[0] <= t % 86400 < LAMP_ON[1]:
+            lux += LAMP_LUX
+        if rng.random() < 1 / 900: # someone walks past
+            lux *= 0.3
+        trace.append(max(0.0, lux * (1 + rng.gauss(0, NOISE))))
+    return trace
+
+
+def old_brightness(tft, sensor):
+    """What piwx_rx.set_brightness_value() did, without the printing."""
+    percent = max(20, int(100 * min(sensor.lux / 100, 1)))
+    tft.set_backlight(percent)
+    return percent
+
+
+def summarize(levels):
+    """(biggest step, turnarounds) in a list of (time, percent) writes."""
+    biggest = 0
+    turnarounds = 0
+    direction = 0
+    for (_, a), (_, b) in zip(levels, levels[1:]):
+        biggest = max(biggest, abs(b - a))
+        if b != a:
+            d = 1 if b > a else -1
+            if direction and d != direction:
+                turnarounds += 1
+            direction = d
+    return biggest, turnarounds
+
+
+def follow_time(levels, start, end):
+    """Seconds from 'start' till the backlight's within SETTLED_PERCENT of where it is at 'end' - and stays there."""
+    final = None
+    for t, percent in levels:
+        if t <= end:
+            final = percent
+    settled = start
+    for t, percent in levels:
+        if start <= t <= end and abs(percent - final) > SETTLED_PERCENT:
+            settled = t
+    return settled - start
+
+
+def run_old(trace):
+    sensor = adafruit_vcnl4020.Adafruit_VCNL4020(None)
+    tft = tft_22.tft_22(0x000000, font_path=FONT_PATH)
+    pwm = pwmio.outputs[-1]
+    writes_before = pwm.writes
+    levels = []
+    for t in range(0, len(trace), BRIGHTNESS_INTERVAL):
+        sensor.lux = trace[t]
+        levels.append((t, old_brightness(tft, sensor)))
+    return sensor.reads, pwm.writes - writes_before, levels
+
+
+def run_new(trace):
+    sensor = adafruit_vcnl4020.Adafruit_VCNL4020(None)
+    tft = tft_22.tft_22(0x000000, font_path=FONT_PATH)
+    pwm = pwmio.outputs[-1]
+    writes_before = pwm.writes
+    levels = []
+    controller = backlight.BacklightController(sensor, lambda percent: (tft.set_backlight(percent), levels.append((t, percent))))
+    t = 0.0
+    while t < len(trace):
+        sensor.lux = trace[int(t)]
+        controller.update(t)
+        t = controller.next_update(t)
+    return sensor.reads, pwm.writes - writes_before, levels, controller
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 24
+    seconds = int(hours * 3600)
+    trace = light_trace(seconds)
+    lamp_seen = seconds > LAMP_ON[0] + 120
+
+    print(f"{hours:g} hours of light at the receiver: daylight to {DAYLIGHT_LUX} lux, clouds, people walking past, "
+          f"a {LAMP_LUX} lux lamp from {LAMP_ON[0] // 3600}:00, {NOISE:.0%} noise")
+    print(f"  {'':24} {'I2C reads/h':>12} {'PWM writes/h':>13} {'biggest step':>13} {'turnarounds/h':>14}"
+          f" {'lamp on: settled':>17}")
+
+    results = []
+    old_reads, old_writes, old_levels = run_old(trace)
+    with contextlib.redirect_stdout(io.StringIO()): # the controller's chatter
+        new_reads, new_writes, new_levels, controller = run_new(trace)
+    for name, reads, writes, levels in (("old, every second", old_reads, old_writes, old_levels),
+                                        ("BacklightController", new_reads, new_writes, new_levels)):
+        biggest, turnarounds = summarize(levels)
+        follow = follow_time(levels, LAMP_ON[0], LAMP_ON[0] + 120) if lamp_seen else None
+        results.append((reads, writes, biggest, turnarounds, follow))
+        follow_text = f"{follow:.1f} s" if follow is not None else "-"
+        print(f"  {name:24} {reads / hours:12.0f} {writes / hours:13.0f} {biggest:12}% {turnarounds / hours:14.1f}"
+              f" {follow_text:>17}")
+
+    old, new = results
+    max_step = math.ceil(backlight.RAMP_PERCENT_PER_SECOND * backlight.RAMP_STEP_SECONDS) + 1
+    ok = (new[0] <= hours * 3600 / backlight.LUX_SAMPLE_SECONDS + 1
+          and new[1] <= old[1] / 10
+          and new[2] <= max_step
+          and new[3] <= old[3] / 10)
+    if lamp_seen:
+        ok = ok and new[4] <= 2 * backlight.LUX_SMOOTHING_SECONDS + 100 / backlight.RAMP_PERCENT_PER_SECOND
+    print(f"  (ramping {backlight.RAMP_PERCENT_PER_SECOND}%/s in steps every {backlight.RAMP_STEP_SECONDS} s; "
+          f"smoothing over {backlight.LUX_SMOOTHING_SECONDS} s, {backlight.HYSTERESIS_PERCENT}% hysteresis; "
+          f"{controller.read_failures} failed reads)")
+
+    print("OK" if ok else "WRONG")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
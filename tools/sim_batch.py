@@ -0,0 +1,127 @@
+"""
+    Host-side simulation: radio-on time per hour at different batch sizes.
+
+    Takes an hour of readings at piwx_tx's usual cadence (COLLECTION_TIME + SEND_DELAY),
+    packs them BATCH_SIZE at a time the way piwx_tx does, checks the receiver gets every sample back
+    in order, and totals the transmitter's on-time with tools/radio_model.py. And checks piwx_rx's
+    rolling stats and archive end up the same as if every reading had come in its own packet.
+
+        python tools/sim_batch.py
+"""
+import contextlib
+import io
+import sys
+
+import host
+host.use_standins()
+
+import archive
+import piwx_constants
+import piwx_packet
+import piwx_rx
+import radio_model
+import rolling_stats
+import weather_series
+
+
+# piwx_tx's defaults; we can't import piwx_tx on a PC.
+MAX_RFM_MSG_LEN = 60
+CYCLE_S = 1 + 2 # COLLECTION_TIME + SEND_DELAY
+KEYFRAME_INTERVAL = 10
+
+BATCH_SIZES = (1, 2, 4, 6, 8)
+
+# The sampled fields, which the rolling stats and archive should get every one of.
+SAMPLED = (piwx_constants.DICT_KEY_WIND, piwx_constants.DICT_KEY_TEMPERATURE)
+TOLERANCE = 0.05 + 1e-4 # tenths on the air, rounded a little differently from round(); and 32-bit slots
+
+
+def same_stats(series, n, stats, history):
+    """Did the receiver's rolling stats and archive get the first n readings, just as if each had its own packet?"""
+    want_stats = rolling_stats.RollingStats()
+    want_history = archive.Archive()
+    for i, data in enumerate(series[:n]):
+        sample = {key: round(data[key], 1) for key in SAMPLED}
+        want_stats.update(sample, i * CYCLE_S)
+        want_history.add(sample, i * CYCLE_S)
+
+    now = (n - 1) * CYCLE_S
+    for key in SAMPLED:
+        for i in range(len(stats.windows_s)):
+            got, want = stats.window(key, i), want_stats.window(key, i)
+            if got.count() != want.count():
+                return False
+            if any(abs(a - b) > TOLERANCE for a, b in ((got.mean(), want.mean()), (got.min(), want.min()),
+                                                        (got.max(), want.max()))):
+                return False
+        for start in (now - 3600, now - 600, now - 60):
+            got, want = history.query(key, start, now), want_history.query(key, start, now)
+            if any(abs(a - b) > TOLERANCE for a, b in zip(got, want)):
+                return False
+    return True
+
+
+def simulate(series, batch_size):
+    """Return (packets, total payload bytes, radio-on seconds, stats right) for the series, checking the round trip."""
+
+    encoder = piwx_packet.DeltaEncoder(KEYFRAME_INTERVAL)
+    decoder = piwx_packet.DeltaDecoder()
+    packets = []
+    received_winds = []
+
+    # The receiver's side, at the time of the newest reading in each packet.
+    data_dict = piwx_rx.initial_dict()
+    stats = rolling_stats.RollingStats()
+    history = archive.Archive()
+
+    batch = piwx_packet.SampleBatch(min(batch_size, piwx_packet.batch_size_limit(MAX_RFM_MSG_LEN)))
+    for i, data in enumerate(series):
+        if batch_size == 1:
+            packets.append(encoder.encode(data))
+            frame = decoder.decode(packets[-1])
+            receive(decoder, frame, data_dict, stats, history, i * CYCLE_S)
+            received_winds.append(data_dict[piwx_constants.DICT_KEY_WIND])
+            continue
+
+        batch.add(i * CYCLE_S * 1000, data[piwx_constants.DICT_KEY_WIND], data[piwx_constants.DICT_KEY_TEMPERATURE])
+        if not batch.is_full():
+            continue
+        packets.append(piwx_packet.encode(data, samples=batch))
+        batch.clear()
+        frame = decoder.decode(packets[-1])
+        receive(decoder, frame, data_dict, stats, history, i * CYCLE_S)
+        for k in range(frame.n_samples):
+            received_winds.append(frame.sample(k)[1])
+
+    sent_winds = [round(d[piwx_constants.DICT_KEY_WIND], 1) for d in series[:len(received_winds)]]
+    assert received_winds == sent_winds, "batched samples didn't round-trip in order"
+
+    total_bytes = sum(len(p) for p in packets)
+    on_time = sum(radio_model.radio_on_s(len(p)) for p in packets)
+    return len(packets), total_bytes, on_time, same_stats(series, len(received_winds), stats, history)
+
+
+def receive(decoder, frame, data_dict, stats, history, now):
+    """What piwx_rx does with a packet, without the chatter."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        piwx_rx.apply_frame(decoder, frame, data_dict)
+        piwx_rx.record_frame(frame, data_dict, stats, history, now)
+
+
+def main():
+    series = weather_series.readings(3600 // CYCLE_S, interval_s=CYCLE_S)
+    print(f"One hour, one reading every {CYCLE_S} s ({len(series)} readings)")
+    print(f"  {'batch':>5} {'packets/h':>10} {'bytes/pkt':>10} {'radio-on ms/h':>14} {'mAh/day':>8}  stats & archive")
+    ok = True
+    for batch_size in BATCH_SIZES:
+        n_packets, total_bytes, on_time, stats_ok = simulate(series, batch_size)
+        print(f"  {batch_size:5} {n_packets:10} {total_bytes / n_packets:10.1f} {on_time * 1000:14.1f} "
+              f"{radio_model.charge_mah(on_time) * 24:8.2f}  {'every reading' if stats_ok else 'WRONG'}")
+        ok = ok and stats_ok
+
+    print("OK" if ok else "WRONG")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
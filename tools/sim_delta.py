@@ -0,0 +1,66 @@
+"""
+    Host-side simulation: average packet size, full packets vs. delta packets with keyframes.
+
+    Replays a day of synthetic readings (tools/weather_series.py) through piwx_packet.DeltaEncoder
+    at a few keyframe intervals, and checks the receiver's DeltaDecoder ends up with what was sent.
+
+        python tools/sim_delta.py [packets]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import piwx_constants
+import piwx_packet
+import weather_series
+
+
+KEYFRAME_INTERVALS = (1, 5, 10, 30, 100)
+
+
+def simulate(series, keyframe_interval):
+    """Return (average bytes per packet, keyframes sent, mismatches at the receiver)."""
+
+    encoder = piwx_packet.DeltaEncoder(keyframe_interval)
+    decoder = piwx_packet.DeltaDecoder()
+
+    total_bytes = 0
+    keyframes = 0
+    mismatches = 0
+    for data in series:
+        packet = encoder.encode(data)
+        total_bytes += len(packet)
+        if packet[0] & piwx_packet.FLAG_KEYFRAME:
+            keyframes += 1
+
+        # Everything but the keyframe-only fields should be current at the receiver.
+        received = {}
+        decoder.merge(decoder.decode(packet), received)
+        received = piwx_packet.wire_values(received)
+        sent = piwx_packet.wire_values(data)
+        for key in sent:
+            if key in piwx_constants.PACKET_KEYFRAME_ONLY:
+                continue
+            if received.get(key) != sent[key]:
+                mismatches += 1
+
+    return total_bytes / len(series), keyframes, mismatches
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 28800 # a day at one packet every 3 seconds
+    series = weather_series.readings(n)
+
+    print(f"{n} packets of T/W/P/H/U")
+    print(f"  {'keyframe every':>15} {'avg bytes':>10} {'keyframes':>10} {'vs full':>8} {'errors':>7}")
+    full_bytes = None
+    for interval in KEYFRAME_INTERVALS:
+        avg_bytes, keyframes, mismatches = simulate(series, interval)
+        if full_bytes is None:
+            full_bytes = avg_bytes
+        print(f"  {interval:15} {avg_bytes:10.2f} {keyframes:10} {avg_bytes / full_bytes:7.0%} {mismatches:7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+    Host-side check and benchmark: what the receiver's display pushes over SPI, with and without
+    tft_22's change detection.
+
+    Runs the real tft_22, on the stand-in displayio (tools/standins/displayio.py), which - like the
+    real one - only pushes the areas that changed, and counts them. Feeds the receiver a packet
+    every few seconds of synthetic weather, and on a virtual clock goes through what
+    piwx_rx.display_task() does: a status line and the temperature page, then the wind page,
+    DISPLAY_WAIT seconds each, redrawing whenever a packet comes in - with piwx_rx's own
+    show_status_info(), update_display() and friends.
+    The same thing's done to OldTft, which is tft_22 as it was - setting everything every time, and
+    always refreshing - and the two have to show the same thing all the way through.
+    Reports refreshes, pixels and bytes pushed per hour, and the SPI time that takes (the radio's
+    on the same bus); and checks a change to just the little lines - the status, and the gust under
+    the wind - pushes just the strip at the bottom.
+
+        python tools/sim_display_refresh.py [hours]
+"""
+import contextlib
+import io
+import os
+import sys
+import types
+
+import host
+host.use_standins()
+
+import piwx_constants
+import piwx_packet
+import piwx_rx
+import tft_22
+import adafruit_rfm69
+import weather_series
+
+FONT_PATH = os.path.join(host.REPO_DIR, tft_22.DEFAULT_FONT_PATH) # so we can run from anywhere
+PACKET_SECONDS = 3
+PACKET_PHASE = 1.3 # packets don't come in step with the pages
+STATUS_STRIP = 20 # rows at the bottom the status line is in
+LINES_STRIP = 30  # and the detail line above it
+LINES_ONLY = (tft_22.DIRTY_STATUS, tft_22.DIRTY_DETAIL, tft_22.DIRTY_STATUS | tft_22.DIRTY_DETAIL)
+
+piwx_rx.gc = types.SimpleNamespace(mem_free=lambda: 100_000) # CPython's gc doesn't have this
+
+
+class OldTft(tft_22.tft_22):
+    """tft_22 as it was: sets everything every time, always refreshes, and uses a bitmap_label and the BDF font."""
+
+    def __init__(self, rgb_background):
+        super().__init__(rgb_background, font_path=FONT_PATH, value_cache=False, packed_font=False)
+
+    def set_text(self, text):
+        self._text_area.text = text
+
+    def set_text_color(self, rgb_color):
+        self._text_area.color = rgb_color
+
+    def set_status_text(self, text):
+        self._text_area_status.text = text
+
+    def set_detail_text(self, text):
+        self._text_area_detail.text = text
+
+    def refresh(self):
+        self._display.refresh()
+        self.frames += 1
+        return True
+
+
+def showing(tft):
+    """What's on the screen - but not the status line with the frame counts, which differ."""
+    status = tft._text_area_status.text
+    return (tft._text_area.text, tft._text_area.color, tft._text_area_detail.text,
+            None if " frames (" in status else status)
+
+
+def draw(tft, state, show_temperature):
+    """What display_task() does to show a page."""
+    if show_temperature:
+        piwx_rx.update_display(tft, piwx_rx.temperature_text(state.data_dict), True, state.missed_packets)
+    else:
+        piwx_rx.update_display(tft, piwx_rx.wind_text(state.data_dict, state.wind_avg), False, state.missed_packets,
+                               piwx_rx.gust_text(state.data_dict))
+
+
+def arrival(sequence):
+    return PACKET_PHASE + sequence * PACKET_SECONDS
+
+
+def simulate(tfts, hours):
+    """Drive the displays; returns (ok, redraws, frames of just the little lines, the highest row one pushed)."""
+
+    seconds = hours * 3600
+    radio = adafruit_rfm69.RFM69(None, None, None, 915.0)
+    state = piwx_rx.ReceiverState()
+    encoder = piwx_packet.DeltaEncoder(10)
+    readings = weather_series.readings(int(seconds / PACKET_SECONDS) + 2, PACKET_SECONDS)
+    for reading in readings:
+        wind = reading[piwx_constants.DICT_KEY_WIND]
+        reading[piwx_constants.DICT_KEY_GUST] = round(wind * 1.4) if wind > 12 else None
+
+    ok = True
+    redraws = 0
+    status_frames = 0
+    lowest_status_y = tft_22.DISPLAY_HEIGHT
+    new = tfts[-1]
+    new_display = new._display
+
+    # Note what's dirty as each frame goes out.
+    refresh = new.refresh
+    dirty_at_refresh = []
+    def noting_refresh():
+        dirty_at_refresh.append(new.dirty())
+        return refresh()
+    new.refresh = noting_refresh
+
+    def deliver(until):
+        nonlocal sequence
+        while arrival(sequence) <= until:
+            reading = {k: v for k, v in readings[sequence].items() if v is not None}
+            state.packet_received(encoder.encode(reading, sequence=sequence), arrival(sequence))
+            sequence += 1
+
+    def redraw(now, page_end):
+        nonlocal ok, redraws, status_frames, lowest_status_y
+        redraws += 1
+        dirty_at_refresh.clear()
+        for tft in tfts:
+            draw(tft, state, show_temperature)
+            if page_end - now > piwx_rx.WARM_UP_MIN_SECONDS:
+                tft.warm_up()
+        if len(dirty_at_refresh) == 1 and dirty_at_refresh[0] in LINES_ONLY:
+            status_frames += 1
+            lowest_status_y = min(lowest_status_y, min(area[1] for area in new_display.last_areas))
+        ok = ok and all(showing(tft) == showing(new) for tft in tfts)
+
+    sequence = 0
+    which_status = 0
+    show_temperature = True
+    t = 0
+    while t < seconds:
+        deliver(t)
+        for tft in tfts:
+            next_status = piwx_rx.show_status_info(radio, tft, state.missed_packets, which_status, state.brightness,
+                                                   state.data_dict.get(piwx_constants.DICT_KEY_UPTIME, -1),
+                                                   state.link, state.stats, state.history, t)
+        which_status = next_status
+        page_end = t + piwx_rx.DISPLAY_WAIT
+        redraw(t, page_end)
+        while arrival(sequence) < page_end: # a packet wakes the page up
+            now = arrival(sequence)
+            deliver(now)
+            redraw(now, page_end)
+        t = page_end
+        show_temperature = not show_temperature
+
+    return ok, redraws, status_frames, lowest_status_y
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+    old = OldTft(0x000000)
+    new = tft_22.tft_22(0x000000, font_path=FONT_PATH)
+    for tft in (old, new): # not counting the first, full-screen, frame
+        tft.refresh()
+        tft._display.pixels_pushed = tft._display.bytes_pushed = tft._display.refreshes = 0
+        tft.frames = tft.frames_skipped = 0
+
+    with contextlib.redirect_stdout(io.StringIO()): # the receiver's chatter
+        ok, redraws, status_frames, lowest_status_y = simulate((old, new), hours)
+
+    print(f"{hours:g} hours of the receiver's display on a virtual clock: a packet every {PACKET_SECONDS} s, "
+          f"{piwx_rx.DISPLAY_WAIT} s pages; {redraws / hours:.0f} redraws/h")
+    print(f"  {'':10} {'frames/h':>9} {'skipped/h':>10} {'kpixels/h':>10} {'KB/h':>8} {'pixels/frame':>13}"
+          f" {'SPI s/h':>8} {'SPI busy':>9}")
+    for name, tft in (("old", old), ("tft_22", new)):
+        display = tft._display
+        spi_seconds = display.bytes_pushed * 8 / display.bus.baudrate
+        print(f"  {name:10} {tft.frames / hours:9.0f} {tft.frames_skipped / hours:10.0f}"
+              f" {display.pixels_pushed / hours / 1000:10.0f} {display.bytes_pushed / hours / 1024:8.0f}"
+              f" {display.pixels_pushed / max(1, tft.frames):13.0f}"
+              f" {spi_seconds / hours:8.1f} {spi_seconds / hours / 3600:9.2%}")
+        ok = ok and display.refreshes == tft.frames
+
+    print(f"  tft_22 skipped {new.sets_skipped / hours:.0f} no-op sets/h; "
+          f"{status_frames / hours:.0f} frames/h were just the status or gust line, pushed from row {lowest_status_y} down")
+    ok = ok and new._display.pixels_pushed < old._display.pixels_pushed
+    ok = ok and status_frames > 0 and lowest_status_y >= tft_22.DISPLAY_HEIGHT - LINES_STRIP
+
+    print("OK" if ok else "WRONG")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
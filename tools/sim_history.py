@@ -0,0 +1,99 @@
+"""
+    Host-side simulation: wind-average error on a lossy link, with and without history in the packets.
+
+    Sends synthetic wind readings through piwx_packet (delta packets plus WindHistory),
+    drops packets at random, and has the receiver average over WIND_MOVING_AVG_SAMPLES
+    the way piwx_rx does - backfilling from history when it can.
+    Reports the mean error of the receiver's average against the true average.
+
+        python tools/sim_history.py [packets]
+"""
+import collections
+import contextlib
+import io
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import piwx_constants
+import piwx_packet
+import weather_series
+
+
+# piwx_rx and piwx_tx defaults; we can't import them on a PC.
+WIND_MOVING_AVG_SAMPLES = 5
+KEYFRAME_INTERVAL = 10
+
+LOSS_RATES = (0.0, 0.05, 0.1, 0.2, 0.3, 0.5)
+HISTORY_DEPTHS = (0, 2, 4, 8)
+
+
+def simulate(winds, loss_rate, depth, seed=1):
+    """Return (mean abs error in MPH, fraction of readings the receiver got or recovered, avg bytes/packet)."""
+
+    rng = random.Random(seed)
+    encoder = piwx_packet.DeltaEncoder(KEYFRAME_INTERVAL)
+    decoder = piwx_packet.DeltaDecoder()
+    wind_history = piwx_packet.WindHistory(depth) if depth > 0 else None
+
+    truth = collections.deque(maxlen=WIND_MOVING_AVG_SAMPLES)
+    received = collections.deque(maxlen=WIND_MOVING_AVG_SAMPLES)
+    last_sequence = None
+
+    total_error = 0.0
+    n_compared = 0
+    n_readings = 0
+    total_bytes = 0
+    for sequence, wind in enumerate(winds):
+        truth.append(wind)
+        data = {piwx_constants.DICT_KEY_WIND: wind}
+        packet = encoder.encode(data, wind_history, sequence)
+        total_bytes += len(packet)
+        if wind_history is not None:
+            wind_history.add(wind)
+
+        if rng.random() < loss_rate:
+            continue
+
+        frame = decoder.decode(packet)
+        values = {}
+        decoder.merge(frame, values)
+        if wind_history is not None:
+            n_missed = frame.missed_winds(last_sequence)
+            for i in range(frame.n_history - n_missed, frame.n_history):
+                received.append(frame.history_wind(i))
+            n_readings += n_missed
+            last_sequence = frame.sequence
+        # Missed the keyframe and the wind hadn't changed from it? Then piwx_rx has nothing to average either.
+        if piwx_constants.DICT_KEY_WIND not in values:
+            continue
+        received.append(values[piwx_constants.DICT_KEY_WIND])
+        n_readings += 1
+
+        total_error += abs(sum(received) / len(received) - sum(truth) / len(truth))
+        n_compared += 1
+
+    return total_error / n_compared, n_readings / len(winds), total_bytes / len(winds)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    winds = weather_series.wind_series(n)
+
+    print(f"{n} wind readings, {WIND_MOVING_AVG_SAMPLES}-sample average at the receiver")
+    print(f"  mean abs error of the average, MPH (readings recovered); bytes/packet in the header row")
+    header = "  loss   " + "".join(f"  history {d}: {simulate(winds[:100], 0, d)[2]:4.1f}B" for d in HISTORY_DEPTHS)
+    print(header)
+    for loss_rate in LOSS_RATES:
+        row = f"  {loss_rate:4.0%}   "
+        for depth in HISTORY_DEPTHS:
+            with contextlib.redirect_stdout(io.StringIO()): # the decoder's missed-keyframe chatter
+                error, recovered, _ = simulate(winds, loss_rate, depth)
+            row += f"  {error:6.3f} ({recovered:4.0%}) "
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
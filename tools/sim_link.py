@@ -0,0 +1,146 @@
+"""
+    Host-side simulation: does link_stats.LinkStats count what really happened on the link?
+
+    Sends numbered packets through piwx_packet over a simulated channel that loses, duplicates,
+    reorders and delays them, feeds what comes out the other end to LinkStats the way piwx_rx does,
+    and checks its counters against what the channel actually did. Also restarts the transmitter
+    partway through, and runs the sequence number past its 65536 wrap. And checks the status line
+    fits on the display, even with months' worth of counts.
+
+        python tools/sim_link.py [packets]
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import link_stats
+import piwx_constants
+import piwx_packet
+
+
+SEND_PERIOD = 3.0 # seconds; piwx_tx's COLLECTION_TIME + SEND_DELAY
+
+# What fits on tft_22's status line: terminalio's 6-pixel characters, from x=10 on a 320-pixel display.
+STATUS_CHARS = 51
+
+# (loss, duplicate, reorder, jitter in seconds)
+CHANNELS = (
+    (0.0,  0.0,  0.0,  0.0),
+    (0.05, 0.0,  0.0,  0.05),
+    (0.2,  0.0,  0.0,  0.2),
+    (0.1,  0.02, 0.02, 0.1),
+    (0.3,  0.05, 0.05, 0.5),
+    )
+
+
+def channel(n, loss, duplicate, reorder, jitter, rng, first_sequence=0, restart_at=None):
+    """Return the (sequence, arrival time) the receiver gets, and the true counts
+    {received, lost, duplicates, out_of_order} by the same rules LinkStats uses."""
+
+    sent = []
+    sequence = first_sequence
+    for i in range(n):
+        if i == restart_at:
+            sequence = 0 # the transmitter rebooted
+        sent.append((sequence % piwx_packet.SEQUENCE_MODULUS, i * SEND_PERIOD + rng.uniform(0, jitter)))
+        sequence += 1
+
+    arrivals = []
+    for packet in sent:
+        if rng.random() < loss:
+            continue
+        arrivals.append(packet)
+        if rng.random() < duplicate:
+            arrivals.append(packet)
+    for i in range(len(arrivals) - 1):
+        if rng.random() < reorder:
+            arrivals[i], arrivals[i + 1] = arrivals[i + 1], arrivals[i]
+
+    # The truth. LinkStats can only count a packet lost once something after it arrives,
+    # and knows nothing of what came before the first packet it got - from each run, if the transmitter restarted.
+    truth = {"received": 0, "lost": 0, "duplicates": 0, "out_of_order": 0}
+    run_of = {}
+    for i, packet in enumerate(sent):
+        run_of[id(packet)] = (0 if restart_at is None or i < restart_at else 1, i)
+    seen = set()
+    first = {}
+    highest = {}
+    for packet in arrivals:
+        run, index = run_of[id(packet)]
+        if index in seen:
+            truth["duplicates"] += 1
+            continue
+        seen.add(index)
+        truth["received"] += 1
+        if run not in first:
+            first[run] = highest[run] = index
+        elif index < highest[run]:
+            truth["out_of_order"] += 1
+        else:
+            highest[run] = index
+    for run in first:
+        truth["lost"] += sum(1 for i in range(first[run], highest[run] + 1) if i not in seen)
+
+    return arrivals, truth
+
+
+def check(n, loss, duplicate, reorder, jitter, seed, **kwargs):
+    """Run one channel; return (LinkStats, truth)."""
+    rng = random.Random(seed)
+    arrivals, truth = channel(n, loss, duplicate, reorder, jitter, rng, **kwargs)
+
+    # Through the real packet code, so the sequence numbers go over the air the way piwx_tx sends them.
+    decoder = piwx_packet.PacketDecoder()
+    stats = link_stats.LinkStats()
+    data = {piwx_constants.DICT_KEY_WIND: 5.0}
+    for sequence, arrival_time in arrivals:
+        frame = decoder.decode(piwx_packet.encode(data, sequence=sequence))
+        stats.packet_received(frame.sequence, arrival_time)
+    return stats, truth
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    failures = 0
+
+    print(f"{n} packets every {SEND_PERIOD}s; LinkStats counts vs. the truth")
+    print(f"  {'loss':>5} {'dup':>5} {'reord':>5} {'jitter':>6}   {'received':>15} {'lost':>13} "
+          f"{'dups':>11} {'late':>11}   PER 16/1024   interval +/-")
+    for loss, duplicate, reorder, jitter in CHANNELS:
+        stats, truth = check(n, loss, duplicate, reorder, jitter, seed=1)
+        row = f"  {loss:5.0%} {duplicate:5.0%} {reorder:5.0%} {jitter:6.2f}  "
+        for name, width in (("received", 15), ("lost", 13), ("duplicates", 11), ("out_of_order", 11)):
+            got = getattr(stats, name)
+            mark = " " if got == truth[name] else "*"
+            failures += got != truth[name]
+            row += f" {f'{got}/{truth[name]}{mark}':>{width}}"
+        row += (f"   {stats.packet_error_rate(0):5.1%} {stats.packet_error_rate(2):5.1%}"
+                f"   {stats.mean_interval:5.2f} {stats.jitter:5.3f}")
+        print(row)
+
+    # The sequence number wraps, and the transmitter reboots in the middle.
+    # LinkStats only spots the reboot after RESTART_AFTER old-looking packets, and miscounts the ones before that.
+    for label, slack, kwargs in (("wrap at 65536", 0, {"first_sequence": 65536 - n // 2}),
+                                 ("tx restart", link_stats.RESTART_AFTER - 1,
+                                  {"first_sequence": 5000, "restart_at": n // 2})):
+        stats, truth = check(n, 0.1, 0.01, 0.01, 0.1, seed=2, **kwargs)
+        wrong = [name for name in truth if abs(getattr(stats, name) - truth[name]) > slack]
+        failures += len(wrong)
+        print(f"  {label}: {stats.status_text()}; restarts {stats.restarts}"
+              f"{'; WRONG ' + ', '.join(wrong) if wrong else ''}")
+
+    # A month or two of packets, and a bad link: the counts get long.
+    stats.received, stats.lost, stats.duplicates, stats.out_of_order = 999999, 99999, 999, 999
+    text = stats.status_text()
+    fits = len(text) <= STATUS_CHARS
+    failures += not fits
+    print(f"  status line, big counts: '{text}', {len(text)} characters; fits in {STATUS_CHARS}: {fits}")
+
+    print(f"{failures} counters wrong")
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if main() else 0)
@@ -0,0 +1,113 @@
+"""
+    Host-side simulation: receiver listen windows vs. clock drift and jitter.
+
+    The transmitter sends on piwx_tx.AdaptiveCadence's schedule (committed, as with TIME_SYNC),
+    driven by a day of wind from tools/weather_series.py, announcing each next send time.
+    Its clock runs fast or slow against the receiver's by DRIFTS_PPM, each send is late by a random
+    jitter, and some packets are lost. The receiver opens listen_schedule.ListenSchedule's windows,
+    notices packets RADIO_POLL_SECONDS late, and catches a packet only if it's on the air while the window's open.
+
+    Reports, for each window width: the fraction of the packets that made it through the air that
+    we caught, and the fraction of the time the receiver radio was on.
+
+        python tools/sim_listen.py [hours]
+"""
+import random
+import sys
+
+import host
+host.use_standins()
+
+import listen_schedule
+import piwx_tx
+import weather_series
+
+
+# piwx_rx's; it needs the display to import.
+RADIO_POLL_SECONDS = 0.01
+
+WINDOW_WIDTHS = (0.02, 0.05, 0.1, 0.2, 0.5)
+DRIFTS_PPM = (0, 100, 1000)
+JITTERS = (0.002, 0.01, 0.03) # standard deviation of the send time, seconds
+LOSS = 0.05
+RX_OFFSET = 1234.5 # the receiver booted a while before the transmitter
+
+
+def send_schedule(hours, seed):
+    """[(transmitter time, next_send_ms)] for each packet, from the adaptive cadence."""
+
+    winds, _ = weather_series.wind_regimes(int(hours * 3600), seed)
+    cadence = piwx_tx.AdaptiveCadence(committed=True)
+    sends = []
+    for t, wind in enumerate(winds):
+        if cadence.should_send(t, wind, None):
+            cadence.sent(t, wind, None)
+            sends.append((t, int(cadence.interval * 1000)))
+    return sends
+
+
+def simulate(sends, width, drift_ppm, jitter, seed=1):
+    """Return (fraction of delivered packets caught, fraction of the time listening)."""
+
+    rng = random.Random(seed)
+    rate = 1 + drift_ppm / 1e6
+    schedule = listen_schedule.ListenSchedule(window_s=width)
+
+    delivered = 0
+    caught = 0
+    listening = 0.0
+    listen_from = RX_OFFSET # listening all the time, from here, when there's no window
+    for tx_time, next_send_ms in sends:
+        on_air = RX_OFFSET + (tx_time + abs(rng.gauss(0, jitter))) * rate
+        if rng.random() < LOSS:
+            continue
+        delivered += 1
+
+        # Go through the windows until one's still open when this packet goes by, or is after it.
+        while True:
+            window = schedule.window()
+            if window is None:
+                # Listening all along.
+                got_it = True
+                listening += on_air - listen_from
+                break
+            opens, closes = window
+            if closes < on_air:
+                listening += closes - opens
+                schedule.missed()
+                if schedule.window() is None:
+                    listen_from = closes
+                continue
+            got_it = opens <= on_air
+            if got_it:
+                listening += on_air - opens
+            break
+
+        if got_it:
+            caught += 1
+            noticed = on_air + rng.uniform(0, RADIO_POLL_SECONDS)
+            ticks = int(tx_time * 1000) % listen_schedule.TICKS_PERIOD
+            schedule.packet_received(noticed, ticks, next_send_ms)
+            listen_from = noticed
+
+    total = (sends[-1][0] - sends[0][0]) * rate
+    return caught / delivered, listening / total
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 24
+    sends = send_schedule(hours, seed=1)
+    print(f"{hours} hours, {len(sends)} packets ({len(sends) / hours:.0f}/h), {LOSS:.0%} lost on the air")
+    print(f"  caught / radio on, by window width")
+    print(f"  {'drift':>6} {'jitter':>7}  " + "".join(f"{w * 1000:>10.0f} ms   " for w in WINDOW_WIDTHS))
+    for drift in DRIFTS_PPM:
+        for jitter in JITTERS:
+            row = f"  {drift:4}ppm {jitter * 1000:4.0f}ms  "
+            for width in WINDOW_WIDTHS:
+                caught, duty = simulate(sends, width, drift, jitter)
+                row += f"  {caught:5.1%} {duty:5.1%}"
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
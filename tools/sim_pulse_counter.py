@@ -0,0 +1,156 @@
+"""
+    Host-side simulation: do anemom's pulse counters count every pulse, into the right window?
+
+    Feeds pulse trains - a steady rate, each period +/-PERIOD_JITTER - to an anemom.Anemom with each
+    counter backend, on a virtual millisecond clock that starts just before supervisor.ticks_ms() wraps:
+      countio  - the stand-in counter counts every falling edge, like the hardware does;
+      keypad   - the stand-in scanner looks at the pin every KEYPAD_SCAN_INTERVAL, queues an event
+                 (timestamped with the scan) when it changes, and overflows like the real queue.
+    The counting task polls every POLL_SECONDS, but now and then stalls - a send, a sensor read, gc -
+    for up to STALL_MS.
+
+    Reports, for each rate: pulses, how many got counted, and how many landed in the wrong window
+    (they're still counted, just in the next one).
+
+        python tools/sim_pulse_counter.py [seconds per rate]
+"""
+import random
+import sys
+
+import host
+host.use_standins()
+
+import anemom
+import board
+import countio
+import keypad
+import supervisor
+
+RATES_HZ = (1, 10, 50, 100, 200, 300, 400, 600)
+PERIOD_JITTER = 0.1
+DUTY = 0.5 # fraction of each period the switch is closed (the pin low)
+WINDOW_SECONDS = 1
+STALL_CHANCE = 0.02 # per poll
+STALL_MS = (20, 100)
+
+START_TICKS = anemom.TICKS_PERIOD - 3000 # wrap around 3 s in
+
+
+class RecordingWindows(anemom.PulseWindows):
+    """Keeps every window put, since nobody takes them here."""
+    def __init__(self):
+        super().__init__()
+        self.record = []
+
+    def put(self, end_ticks, count, rate):
+        super().put(end_ticks, count, rate)
+        self.record.append((end_ticks, count))
+
+
+def pulse_train(rate, seconds, rng):
+    """[(fall, rise)] times in ms from the start, ending a second before 'seconds' so the last windows close
+    (and a few ms more, so keypad's scan can't put the last one in the window after)."""
+    pulses = []
+    t = rng.uniform(0, 1000 / rate)
+    while t < (seconds - 1) * 1000 - 5:
+        period = 1000 / rate * (1 + rng.uniform(-PERIOD_JITTER, PERIOD_JITTER))
+        pulses.append((t, t + period * DUTY))
+        t += period
+    return pulses
+
+
+def simulate(backend, rate, seconds, seed=1):
+    """Return (pulses, counted, misplaced, keypad overflows)."""
+
+    rng = random.Random(seed)
+    pulses = pulse_train(rate, seconds, rng)
+
+    supervisor.set_ticks(START_TICKS)
+    if backend == "countio":
+        counter = anemom.CountioCounter(board.D12)
+        hardware = countio.counters[-1]
+    else:
+        counter = anemom.KeypadCounter(board.D12)
+        hardware = keypad.scanners[-1]
+    scan_ms = max(1, round(getattr(hardware, "interval", 0) * 1000))
+    anemometer = anemom.Anemom(board.D12, 0, counter=counter)
+    windows = RecordingWindows()
+    anemometer.start_windows(WINDOW_SECONDS, windows)
+
+    pin_low = False
+    next_edge = 0  # index into pulses, of the next fall (or rise, if pin_low)
+    next_poll = 0
+    poll_ms = round(anemom.POLL_SECONDS * 1000)
+    for t in range(seconds * 1000 + 1):
+        supervisor.set_ticks(START_TICKS + t)
+        if backend == "countio":
+            # The hardware sees every edge.
+            while next_edge < len(pulses) and pulses[next_edge][0] <= t:
+                hardware.count += 1
+                next_edge += 1
+        elif t % scan_ms == 0:
+            # keypad sees the pin as it is at each scan - whatever happened in between.
+            while next_edge < len(pulses) and pulses[next_edge][1] <= t:
+                next_edge += 1
+            low = next_edge < len(pulses) and pulses[next_edge][0] <= t
+            if low != pin_low:
+                pin_low = low
+                hardware.events.put(keypad.Event(0, low, supervisor.ticks_ms()))
+
+        if t >= next_poll:
+            anemometer.poll_windows(supervisor.ticks_ms())
+            next_poll = t + poll_ms
+            if rng.random() < STALL_CHANCE:
+                next_poll += rng.randint(*STALL_MS)
+
+    # What each window should have had.
+    window_ms = WINDOW_SECONDS * 1000
+    n_windows = len(windows.record)
+    truth = [0] * n_windows
+    for fall, _ in pulses:
+        i = int(fall // window_ms)
+        if i < n_windows:
+            truth[i] += 1
+
+    counted = 0
+    misplaced = 0
+    for i, (end_ticks, count) in enumerate(windows.record):
+        assert end_ticks == (START_TICKS + (i + 1) * window_ms) % anemom.TICKS_PERIOD
+        counted += count
+        misplaced += max(0, truth[i] - count)
+
+    overflows = getattr(counter, "overflows", 0)
+    counter.deinit()
+    supervisor.set_ticks(None)
+    return len(pulses), counted, misplaced, overflows
+
+
+def main():
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print(f"{seconds}s per rate, {WINDOW_SECONDS}s windows, periods +/-{PERIOD_JITTER:.0%}, duty {DUTY:.0%}; "
+          f"polls every {anemom.POLL_SECONDS * 1000:.0f} ms, {STALL_CHANCE:.0%} stall {STALL_MS[0]}-{STALL_MS[1]} ms")
+    print(f"  keypad scans every {anemom.KEYPAD_SCAN_INTERVAL * 1000:g} ms, queue {anemom.KEYPAD_MAX_EVENTS} events")
+    print(f"  {'rate':>6}   {'countio: pulses':>15} {'lost':>5} {'misplaced':>9}   "
+          f"{'keypad: pulses':>14} {'lost':>5} {'misplaced':>9} {'overflows':>9}")
+
+    ok = True
+    for rate in RATES_HZ:
+        row = f"  {rate:4}Hz"
+        for backend in ("countio", "keypad"):
+            pulses, counted, misplaced, overflows = simulate(backend, rate, max(seconds, 3))
+            lost = pulses - counted
+            row += f"   {pulses:15} {lost:5} {misplaced / max(pulses, 1):9.2%}"
+            if backend == "keypad":
+                row += f" {overflows:9}"
+            # countio must never lose one; keypad, not while each half-period spans a scan.
+            half_period = 1000 / rate * (1 - PERIOD_JITTER) * min(DUTY, 1 - DUTY)
+            if lost and (backend == "countio" or half_period >= anemom.KEYPAD_SCAN_INTERVAL * 1000):
+                ok = False
+        print(row)
+
+    print("OK" if ok else "PULSES LOST")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
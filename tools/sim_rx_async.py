@@ -0,0 +1,164 @@
+"""
+    Host-side simulation: how many packets does the receiver catch, and how soon are they on the display?
+
+    Runs piwx_rx.run_tasks() under CPython with the stand-in radio, which - like the real one - only
+    catches a packet if it's listening and its one-packet FIFO is empty. A simulated transmitter puts
+    packets on the air at a few cadences, with some jitter. Reports the fraction caught and the time
+    from a packet going out to the display showing it, next to the same for the old blocking run() loop,
+    which listens only between display pages (worked out from its timing, not run).
+
+    The display is a stand-in here - it just takes a while to refresh, like the real one -
+    so tft_22 isn't imported. Time is sped up by TIME_SCALE; it still takes real seconds to run.
+
+        python tools/sim_rx_async.py [packets per cadence]
+"""
+import asyncio
+import contextlib
+import io
+import random
+import sys
+import time
+import types
+
+import host
+host.use_standins()
+
+# piwx_rx only uses tft_22 to make the display, in init_hardware(), which we don't call.
+sys.modules["tft_22"] = types.ModuleType("tft_22")
+
+import adafruit_rfm69
+import adafruit_vcnl4020
+import piwx_constants
+import piwx_packet
+import piwx_rx
+
+TIME_SCALE = 0.1 # real seconds per simulated second
+
+CADENCES = (1, 2, 3, 5, 10) # transmitter send interval, simulated seconds
+JITTER = 0.05 # of the interval
+REFRESH_SECONDS = 0.15 # a full-screen refresh of the big digits
+
+# The old loop's timing, before we scale it.
+DISPLAY_WAIT = piwx_rx.DISPLAY_WAIT
+LISTEN_TIMEOUT = piwx_rx.LISTEN_TIMEOUT
+
+piwx_rx.DISPLAY_WAIT *= TIME_SCALE
+piwx_rx.LISTEN_TIMEOUT *= TIME_SCALE
+piwx_rx.RADIO_POLL_SECONDS *= TIME_SCALE
+piwx_rx.gc = types.SimpleNamespace(mem_free=lambda: 0) # CPython's gc doesn't have this
+
+
+class SimDisplay():
+    """Enough of tft_22 for piwx_rx. Notes how long each packet took to show up."""
+
+    def __init__(self, radio, air_times):
+        self._radio = radio
+        self._air_times = air_times
+        self._last_shown = None
+        self.latencies = []
+
+    def set_text(self, text):
+        pass
+
+    def set_text_color(self, color):
+        pass
+
+    def set_status_text(self, text):
+        self.status = text
+
+    def set_detail_text(self, text):
+        self.detail = text
+
+    def set_backlight(self, percent):
+        pass
+
+    def frame_stats_text(self):
+        return ""
+
+    def warm_up(self):
+        return False
+
+    def refresh(self):
+        time.sleep(REFRESH_SECONDS * TIME_SCALE)
+        read_time = self._radio.last_read_time
+        if read_time is not None and read_time != self._last_shown:
+            # The radio holds one packet, so the one read is the last one it caught.
+            self._last_shown = read_time
+            self.latencies.append((time.monotonic() - self._air_times[-1]) / TIME_SCALE)
+
+
+async def transmitter(radio, cadence, n, rng, air_times):
+    encoder = piwx_packet.DeltaEncoder(10)
+    for sequence in range(n):
+        await asyncio.sleep(cadence * TIME_SCALE * (1 + rng.uniform(-JITTER, JITTER)))
+        packet = encoder.encode({piwx_constants.DICT_KEY_TEMPERATURE: 60 + sequence % 10,
+                                 piwx_constants.DICT_KEY_WIND: sequence % 20}, sequence=sequence)
+        caught = radio.caught
+        radio.on_air(packet)
+        if radio.caught != caught:
+            air_times.append(time.monotonic())
+
+
+async def simulate(cadence, n, seed=1):
+    """Return (fraction caught, display latencies in simulated seconds) for the asyncio receiver."""
+
+    rng = random.Random(seed)
+    radio = adafruit_rfm69.RFM69(None, None, None, 915.0)
+    air_times = []
+    display = SimDisplay(radio, air_times)
+    receiver = asyncio.create_task(piwx_rx.run_tasks(radio, display, adafruit_vcnl4020.Adafruit_VCNL4020(None)))
+    await transmitter(radio, cadence, n, rng, air_times)
+    await asyncio.sleep(REFRESH_SECONDS * 2 * TIME_SCALE)
+    receiver.cancel()
+    return radio.caught / n, display.latencies
+
+
+def blocking_loop(cadence, n, seed=1):
+    """Return (fraction caught, mean display latency) for the old run(): listen for up to LISTEN_TIMEOUT,
+    and once a packet's in, show temperature and then wind for DISPLAY_WAIT each - not listening."""
+
+    rng = random.Random(seed)
+    air_times = []
+    t = 0.0
+    for _ in range(n):
+        t += cadence * (1 + rng.uniform(-JITTER, JITTER))
+        air_times.append(t)
+
+    caught = 0
+    listen_from = 0.0
+    i = 0
+    while i < n:
+        t = air_times[i]
+        if t < listen_from: # busy with the display
+            i += 1
+        elif t < listen_from + LISTEN_TIMEOUT:
+            caught += 1
+            listen_from = t + 2 * (DISPLAY_WAIT + REFRESH_SECONDS)
+            i += 1
+        else: # timed out; shows the old data anyway
+            listen_from += LISTEN_TIMEOUT + 2 * (DISPLAY_WAIT + REFRESH_SECONDS)
+
+    # Temperature shows right away; wind a page later.
+    return caught / n, REFRESH_SECONDS + DISPLAY_WAIT / 2
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+
+    print(f"{n} packets per cadence, +/-{JITTER:.0%} jitter; display page {DISPLAY_WAIT}s, "
+          f"refresh {REFRESH_SECONDS}s")
+    print(f"  {'send every':>10}   {'caught':>7} {'latency mean/max':>17}   {'old loop caught':>15} {'latency':>8}")
+    worst = 1.0
+    for cadence in CADENCES:
+        with contextlib.redirect_stdout(io.StringIO()): # the receiver's chatter
+            caught, latencies = asyncio.run(simulate(cadence, n))
+        old_caught, old_latency = blocking_loop(cadence, n)
+        worst = min(worst, caught)
+        print(f"  {cadence:9}s   {caught:7.0%} {sum(latencies) / len(latencies):8.2f}s {max(latencies):6.2f}s"
+              f"   {old_caught:15.0%} {old_latency:7.2f}s")
+
+    return worst
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() >= 0.99 else 1)
@@ -0,0 +1,196 @@
+"""
+    Host-side check: the transmitter's multi-rate sampling schedule (sample_schedule.py).
+
+    Builds piwx_tx's schedule - the real sensors.Sensor driving the simulated BME280 on the stand-in
+    I2C bus, the stand-in radio and CPU temperatures - and runs it for a day on a virtual clock, with
+    a packet (and a pushed wind value) every 3 seconds. Checks that every source is read exactly
+    every period, that sensor fields due together share one measurement, and that no packet ever
+    carries a value older than its staleness budget - including through a half-hour sensor outage,
+    when the sensor's values have to drop out, and come back afterwards. In the outage the BME280
+    fails its reads, then drops off the I2C bus altogether, and the radio's temperature fails too -
+    all raising OSError, as busio does - and the schedule has to carry on through it.
+    Reports reads per hour for each source, and sensor measurements per hour against the old
+    fixed-interval sensor task and the blocking loop, which read everything every pass.
+
+        python tools/sim_sample_schedule.py [hours]
+"""
+import contextlib
+import io
+import math
+import sys
+
+import host
+host.use_standins()
+
+import adafruit_rfm69
+import board
+import microcontroller
+import piwx_constants
+import piwx_tx
+import sensors
+
+PACKET_SECONDS = 3
+OUTAGE = (2 * 3600, 2.5 * 3600) # the sensor stops answering: reads fail, then it's off the bus
+SENSOR_ADDRESS = 0x77
+OLD_SENSOR_INTERVAL = 10 # what the old sensor task used
+OLD_PASS_SECONDS = 4     # about how long a pass of the blocking loop takes
+
+clock = [0.0] # the virtual time
+
+
+class CountingCPU():
+    def __init__(self):
+        self.reads = 0
+
+    @property
+    def temperature(self):
+        self.reads += 1
+        return 30.0 + math.sin(clock[0] / 3600)
+
+
+class CountingRadio(adafruit_rfm69.RFM69):
+    def __init__(self):
+        super().__init__(None, None, None, 915.0)
+        self.reads = 0
+
+    @property
+    def temperature(self):
+        self.reads += 1
+        if OUTAGE[0] <= clock[0] < OUTAGE[1]:
+            raise OSError(5, "Input/output error")
+        return 25.0
+
+    @temperature.setter
+    def temperature(self, value):
+        pass
+
+
+class FailingDevice():
+    """A device on the I2C bus that takes writes, but whose reads fail."""
+    def __init__(self, device):
+        self.device = device
+
+    def write(self, data):
+        self.device.write(data)
+
+    def read(self, n):
+        raise OSError(5, "Input/output error")
+
+
+class FlakySensor():
+    """A sensors.Sensor whose BME280, during OUTAGE, fails its reads and then drops off the bus;
+    the real driver gets the OSErrors, from the stand-in busio. Counts its measurements."""
+    def __init__(self, sensor):
+        self._sensor = sensor
+        self._device = board.I2C().devices[SENSOR_ADDRESS]
+        self.measurement_times = []
+
+    def _on_bus(self):
+        devices = board.I2C().devices
+        if OUTAGE[0] <= clock[0] < (OUTAGE[0] + OUTAGE[1]) / 2:
+            devices[SENSOR_ADDRESS] = FailingDevice(self._device)
+        elif OUTAGE[0] <= clock[0] < OUTAGE[1]:
+            devices.pop(SENSOR_ADDRESS, None)
+        else:
+            devices[SENSOR_ADDRESS] = self._device
+
+    def is_ok(self):
+        return self._sensor.is_ok()
+
+    def has_pressure(self):
+        return self._sensor.has_pressure()
+
+    def has_humidity(self):
+        return self._sensor.has_humidity()
+
+    def start_reading(self):
+        self._on_bus()
+        self.measurement_times.append(clock[0])
+        return self._sensor.start_reading()
+
+    def finish_reading(self):
+        self._on_bus()
+        return self._sensor.finish_reading()
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 24
+    seconds = hours * 3600
+    microcontroller.cpu = CountingCPU()
+    radio = CountingRadio()
+    sensor = FlakySensor(sensors.Sensor())
+    data_dict = {}
+    schedule = piwx_tx.make_sample_schedule(data_dict, sensor, radio)
+
+    read_times = {source.key: [] for source in schedule.sources if source.read is not None}
+
+    ok = True
+    too_old = 0
+    back_after = None
+    gone_after = None
+    next_packet = 0.0
+    chatter = io.StringIO() # what the schedule says about the failures
+    while clock[0] <= seconds:
+        now = clock[0]
+        for source in schedule.due(now): # what sample() will read - or try to
+            read_times[source.key].append(now)
+        with contextlib.redirect_stdout(chatter):
+            schedule.sample(now, wait=lambda s: None)
+        if now >= next_packet:
+            data_dict[piwx_constants.DICT_KEY_WIND] = 10.0
+            schedule.updated(piwx_constants.DICT_KEY_WIND, now)
+            for source in schedule.sources:
+                if source.key in data_dict and schedule.age(source.key, now) > source.max_age:
+                    too_old += 1
+            has_temperature = piwx_constants.DICT_KEY_TEMPERATURE in data_dict
+            if gone_after is None and now >= OUTAGE[0] and not has_temperature:
+                gone_after = now - OUTAGE[0]
+            if back_after is None and now >= OUTAGE[1] and has_temperature:
+                back_after = now - OUTAGE[1]
+            next_packet += PACKET_SECONDS
+        clock[0] = min(schedule.next_due(now), next_packet)
+
+    print(f"{hours:g} hours on a virtual clock, a packet every {PACKET_SECONDS} s; "
+          f"the sensor out from {OUTAGE[0] / 3600:g} h to {OUTAGE[1] / 3600:g} h")
+    print(f"  {'source':>6} {'period':>7} {'budget':>7} {'reads/h':>8} {'failed':>7} {'expired':>8}  on time")
+    for source in schedule.sources:
+        if source.read is None:
+            print(f"  {source.key:>6} {source.period:6}s {source.max_age:6}s {source.reads / hours:8.0f}"
+                  f" {'':>7} {source.expired:8}  (pushed)")
+            continue
+        times = read_times[source.key]
+        on_time = all(abs(b - a - source.period) < 1e-6 for a, b in zip(times, times[1:]))
+        expected = math.floor(seconds / source.period) + 1
+        ok = ok and on_time and len(times) == expected
+        print(f"  {source.key:>6} {source.period:6}s {source.max_age:6}s {len(times) / hours:8.0f}"
+              f" {source.failures:7} {source.expired:8}  {on_time and len(times) == expected}")
+
+    # Sensor fields due together share a measurement: one per distinct time any of them was read.
+    sensor_keys = [s.key for s in schedule.sources if s.group is sensor]
+    read_at = sorted(set(t for key in sensor_keys for t in read_times[key]))
+    shared = read_at == sensor.measurement_times
+    ok = ok and shared
+    per_hour = len(sensor.measurement_times) / hours
+    print(f"  sensor measurements: {per_hour:.0f}/h, shared by the fields due together: {shared}; "
+          f"the old sensor task: {3600 / OLD_SENSOR_INTERVAL:.0f}/h, the blocking loop: ~{3600 / OLD_PASS_SECONDS:.0f}/h")
+    print(f"  CPU temperature reads: {microcontroller.cpu.reads / hours:.0f}/h; radio: {radio.reads / hours:.0f}/h")
+
+    temperature_source = schedule.source(piwx_constants.DICT_KEY_TEMPERATURE)
+    gone_ok = gone_after is not None and gone_after <= temperature_source.max_age + temperature_source.period
+    back_ok = back_after is not None and back_after <= temperature_source.period
+    print(f"  values older than their budget in packets: {too_old}; the temperature dropped out "
+          f"{gone_after}s into the outage, and was back {back_after}s after it")
+    in_outage = OUTAGE[1] <= seconds
+    ok = ok and too_old == 0 and ((gone_ok and back_ok) or not in_outage)
+
+    radio_source = schedule.source(piwx_constants.DICT_KEY_RADIO_TEMPERATURE)
+    print(f"  OSErrors survived: {schedule.group_failures} sensor measurements, "
+          f"{radio_source.failures} radio temperature reads")
+    ok = ok and (not in_outage or (schedule.group_failures > 0 and radio_source.failures > 0))
+
+    print("OK" if ok else "WRONG")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
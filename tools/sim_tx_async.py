@@ -0,0 +1,142 @@
+"""
+    Host-side simulation: does the asyncio transmitter count every anemometer pulse?
+
+    Runs piwx_tx.run_tasks() under CPython with the stand-in hardware, and a synthetic pulse generator
+    feeding keypad events - at a wind that ramps up to a few hundred Hz - into the anemometer's scanner.
+    The stand-in radio and sensor take a while, like the real ones, to show that sending and
+    sensor reads don't cost any pulses. Checks that every pulse made it into a counting window,
+    and that every window made it into a packet.
+
+    Time is sped up by shrinking COLLECTION_TIME; it still takes real seconds to run.
+
+        python tools/sim_tx_async.py [seconds]
+"""
+import asyncio
+import sys
+import time
+
+import host
+host.use_standins()
+
+import adafruit_rfm69
+import anemom
+import board
+import keypad
+import neopixel
+import piwx_packet
+import piwx_tx
+import sensors
+import supervisor
+
+
+# How much of the time the old loop counts for: COLLECTION_TIME out of every pass.
+OLD_DUTY_CYCLE = piwx_tx.COLLECTION_TIME / (piwx_tx.COLLECTION_TIME + piwx_tx.LED_PRE_SEND_BLINK
+                                            + piwx_tx.LED_POST_SEND_BLINK + piwx_tx.SEND_DELAY)
+
+# Shrink time 4x.
+piwx_tx.COLLECTION_TIME = 0.25
+piwx_tx.SAMPLE_PERIODS = {key: (period / 4, max_age / 4) for key, (period, max_age) in piwx_tx.SAMPLE_PERIODS.items()}
+piwx_tx.LED_POST_SEND_BLINK = 0.125
+piwx_tx.USE_RANDOM_WIND = False
+piwx_tx.ADAPTIVE_CADENCE = False # a packet every WINDOWS_PER_SEND windows, so there are plenty to check
+
+SEND_SECONDS = 0.04   # how long radio.send() holds everything up
+SENSOR_SECONDS = 0.02 # and a sensor read
+MAX_PULSE_HZ = 400
+GENERATOR_STEP = 0.003 # seconds
+
+
+class SlowRadio(adafruit_rfm69.RFM69):
+    def send(self, data, **kwargs):
+        time.sleep(SEND_SECONDS)
+        return super().send(data, **kwargs)
+
+
+class SlowSensor():
+    """Like sensors.Sensor, with a BME280 that takes a while to measure."""
+    def __init__(self):
+        self.reading = sensors.Reading()
+        self.reading.temperature = 20.0
+    def is_ok(self):
+        return True
+    def has_pressure(self):
+        return False
+    def has_humidity(self):
+        return False
+    def start_reading(self):
+        return SENSOR_SECONDS
+    def finish_reading(self):
+        return self.reading
+    def read(self):
+        time.sleep(SENSOR_SECONDS)
+        return self.reading
+
+
+async def pulse_generator(seconds, pulse_times):
+    """Pulses at a rate that ramps from 0 to MAX_PULSE_HZ and back, timestamped like keypad does."""
+
+    while not keypad.scanners:
+        await asyncio.sleep(0)
+    events = keypad.scanners[0].events
+
+    start = time.monotonic()
+    phase = 0.0
+    while True:
+        now = time.monotonic()
+        elapsed = now - start
+        if elapsed > seconds:
+            return
+        rate = MAX_PULSE_HZ * (1 - abs(2 * elapsed / seconds - 1))
+        phase += rate * GENERATOR_STEP
+        while phase >= 1:
+            phase -= 1
+            ticks = supervisor.ticks_ms()
+            events.put(keypad.Event(0, True, ticks))
+            events.put(keypad.Event(0, False, ticks))
+            pulse_times.append(ticks)
+        await asyncio.sleep(GENERATOR_STEP)
+
+
+async def simulate(seconds, radio):
+    counter = anemom.KeypadCounter(board.D12) # the pulse generator feeds keypad events
+    anemometer = anemom.Anemom(board.D12, piwx_tx.LED_DATA_SEND_COLOR, counter=counter)
+    pulse_times = []
+    transmitter = asyncio.create_task(piwx_tx.run_tasks(radio, neopixel.NeoPixel(None, 1), SlowSensor(), anemometer))
+    await pulse_generator(seconds, pulse_times)
+    await asyncio.sleep(piwx_tx.WINDOWS_PER_SEND * piwx_tx.COLLECTION_TIME + 0.2) # let the last windows close
+    transmitter.cancel()
+    return anemometer.windows, pulse_times
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    radio = SlowRadio(None, None, None, 915.0)
+    windows, pulse_times = asyncio.run(simulate(seconds, radio))
+
+    # Pulses after the last window that closed haven't been counted yet; that's fine.
+    last_end = windows.last_end_ticks
+    pulses_due = sum(1 for t in pulse_times if anemom.ticks_diff(t, last_end) < 0)
+    queued = windows.put_total - windows.taken_total
+
+    decoder = piwx_packet.PacketDecoder()
+    sequences_ok = True
+    for i, packet in enumerate(radio.sent):
+        frame = decoder.decode(packet)
+        sequences_ok = sequences_ok and frame is not None and frame.sequence == i
+
+    print(f"{seconds}s, pulses up to {MAX_PULSE_HZ} Hz; send blocks {SEND_SECONDS * 1000:.0f} ms, "
+          f"sensor {SENSOR_SECONDS * 1000:.0f} ms")
+    print(f"  pulses generated before the last window closed: {pulses_due}")
+    print(f"  pulses counted into windows:                    {windows.put_total}")
+    print(f"  pulses taken into packets (+ still queued):     {windows.taken_total} (+{queued})")
+    print(f"  windows dropped: {windows.dropped}; packets sent: {len(radio.sent)}, sequence numbers "
+          f"{'in order' if sequences_ok else 'WRONG'}")
+    print(f"  (run_blocking() only counts for about {OLD_DUTY_CYCLE:.0%} of the time)")
+
+    ok = pulses_due == windows.put_total and windows.dropped == 0 and sequences_ok
+    print("OK" if ok else "PULSES LOST")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
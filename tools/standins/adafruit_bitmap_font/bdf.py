@@ -0,0 +1,90 @@
+"""Stand-in for adafruit_bitmap_font.bdf. Like the real one, it reads the header when the font is
+loaded, and scans the whole file for glyphs - parsing their hex into bitmaps - the first time each
+is asked for. That's what makes a new digit slow to show the first time."""
+import fontio
+
+
+class BDF():
+    def __init__(self, f, bitmap_class):
+        self.file = f
+        self.bitmap_class = bitmap_class
+        self._glyphs = {}
+        self._boundingbox = None
+        self._ascent = None
+        self._descent = None
+        self.scans = 0      # passes through the file, looking for glyphs
+        self.bytes_read = 0 # in those passes
+
+        for line in f:
+            line = line.decode().strip()
+            if line.startswith("FONTBOUNDINGBOX "):
+                self._boundingbox = tuple(int(v) for v in line.split()[1:5])
+            elif line.startswith("FONT_ASCENT "):
+                self._ascent = int(line.split()[1])
+            elif line.startswith("FONT_DESCENT "):
+                self._descent = int(line.split()[1])
+            elif line.startswith("CHARS "):
+                break
+
+    @property
+    def ascent(self):
+        return self._ascent
+
+    @property
+    def descent(self):
+        return self._descent
+
+    def get_bounding_box(self):
+        return self._boundingbox
+
+    def get_glyph(self, code_point):
+        if code_point not in self._glyphs:
+            self.load_glyphs(code_point)
+        return self._glyphs.get(code_point)
+
+    def load_glyphs(self, code_points):
+        if isinstance(code_points, int):
+            remaining = {code_points}
+        elif isinstance(code_points, str):
+            remaining = {ord(c) for c in code_points}
+        else:
+            remaining = set(code_points)
+        remaining -= set(self._glyphs)
+        if not remaining:
+            return
+
+        self.scans += 1
+        self.file.seek(0)
+        code_point = None
+        rows = None
+        for line in self.file:
+            self.bytes_read += len(line)
+            line = line.decode().strip()
+            if line.startswith("ENCODING "):
+                code_point = int(line.split()[1])
+            elif code_point not in remaining:
+                continue
+            elif line.startswith("DWIDTH "):
+                shift_x, shift_y = (int(v) for v in line.split()[1:3])
+            elif line.startswith("BBX "):
+                width, height, dx, dy = (int(v) for v in line.split()[1:5])
+            elif line == "BITMAP":
+                bitmap = self.bitmap_class(width, height, 2)
+                rows = 0
+            elif line == "ENDCHAR":
+                self._glyphs[code_point] = fontio.Glyph(bitmap, 0, width, height, dx, dy, shift_x, shift_y)
+                remaining.discard(code_point)
+                code_point = None
+                rows = None
+                if not remaining:
+                    break
+            elif rows is not None:
+                bits = int(line, 16)
+                n_bits = len(line) * 4
+                for x in range(width):
+                    if bits & (1 << (n_bits - 1 - x)):
+                        bitmap[x, rows] = 1
+                rows += 1
+
+        for code_point in remaining: # not in the font
+            self._glyphs[code_point] = None
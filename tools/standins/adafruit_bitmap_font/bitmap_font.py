@@ -0,0 +1,15 @@
+"""Stand-in for adafruit_bitmap_font.bitmap_font: loads BDF fonts, like the real one."""
+from adafruit_bitmap_font import bdf
+
+
+def load_font(filename, bitmap=None):
+    """A font object for a BDF file. Glyphs are loaded lazily, as they're asked for."""
+    if bitmap is None:
+        import displayio
+        bitmap = displayio.Bitmap
+    font_file = open(filename, "rb")
+    first = font_file.readline()
+    font_file.seek(0)
+    if first.startswith(b"STARTFONT"):
+        return bdf.BDF(font_file, bitmap)
+    raise ValueError("Unknown magic number %r" % first[:8])
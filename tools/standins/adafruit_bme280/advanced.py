@@ -0,0 +1,39 @@
+"""Stand-in for adafruit_bme280.advanced: a sensor with plausible, slowly wandering readings.
+
+It does the I2C reads the real library does - in its default normal mode, one for temperature,
+and two each for pressure and humidity, which read the temperature again first - so a host tool
+can count them on the stand-in busio.I2C. (sensors.py doesn't use this any more.)"""
+import random
+
+_REG_TEMPERATURE = 0xFA
+_REG_PRESSURE = 0xF7
+_REG_HUMIDITY = 0xFD
+
+
+class Adafruit_BME280_I2C():
+    def __init__(self, i2c, address=0x77):
+        self._i2c = i2c
+        self._address = address
+        self._rng = random.Random(address)
+        self.sea_level_pressure = 1013.25
+
+    def _read(self, register, n):
+        if hasattr(self._i2c, "writeto_then_readfrom"):
+            self._i2c.writeto_then_readfrom(self._address, bytes((register,)), bytearray(n))
+
+    @property
+    def temperature(self):
+        self._read(_REG_TEMPERATURE, 3)
+        return 21.0 + self._rng.gauss(0, 0.05)
+
+    @property
+    def pressure(self):
+        self._read(_REG_TEMPERATURE, 3)
+        self._read(_REG_PRESSURE, 3)
+        return 1013.0 + self._rng.gauss(0, 0.1)
+
+    @property
+    def humidity(self):
+        self._read(_REG_TEMPERATURE, 3)
+        self._read(_REG_HUMIDITY, 2)
+        return 55.0 + self._rng.gauss(0, 0.5)
@@ -0,0 +1,86 @@
+"""Stand-in for adafruit_display_text.bitmap_label. Like the real one, setting the text - even to what
+it already is - makes a new Bitmap with the glyphs blitted into it, and a new TileGrid to show it,
+so the whole label is dirty on the next refresh."""
+import displayio
+
+
+class Label(displayio.Group):
+    def __init__(self, font, *, text="", color=0xFFFFFF, x=0, y=0, scale=1, **kwargs):
+        super().__init__(x=x, y=y, scale=scale)
+        self._font = font
+        self._palette = displayio.Palette(2)
+        self._palette.make_transparent(0)
+        self._palette[1] = color
+        self._ascent, self._descent = self._get_ascent_descent()
+        self._text = None
+        self.bitmap = None
+        self.text = text
+
+    def _get_ascent_descent(self):
+        ascent = 0
+        descent = 0
+        if hasattr(self._font, "load_glyphs"):
+            self._font.load_glyphs("M j'")
+        for c in "M j'":
+            glyph = self._font.get_glyph(ord(c))
+            if glyph is not None:
+                ascent = max(ascent, glyph.height + glyph.dy)
+                descent = max(descent, -glyph.dy)
+        return ascent, descent
+
+    @property
+    def font(self):
+        return self._font
+
+    @property
+    def color(self):
+        return self._palette[1]
+
+    @color.setter
+    def color(self, new_color):
+        self._palette[1] = new_color
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, new_text):
+        self._text = new_text
+        self._reset_text(new_text)
+
+    def _reset_text(self, text):
+        if hasattr(self._font, "load_glyphs"):
+            self._font.load_glyphs(text)
+        glyphs = []
+        width = 0
+        for c in text:
+            glyph = self._font.get_glyph(ord(c))
+            if glyph is not None:
+                glyphs.append((width, glyph))
+                width = max(width + glyph.shift_x, width + glyph.dx + glyph.width)
+        height = self._ascent + self._descent
+        self.bitmap = displayio.Bitmap(max(1, width), max(1, height), 2)
+        for x, glyph in glyphs:
+            self._blit(x + glyph.dx, self._ascent - glyph.dy - glyph.height, glyph)
+
+        # The label's y is the middle of its ascent, like the real one.
+        tile_grid = displayio.TileGrid(self.bitmap, pixel_shader=self._palette,
+                                       y=self._ascent // 2 - self._ascent)
+        if len(self) > 0:
+            self[0] = tile_grid
+        else:
+            self.append(tile_grid)
+
+    def _blit(self, x, y, glyph):
+        """Copy the glyph in, a row at a time. (Glyphs here don't overlap, so this can just overwrite.)"""
+        source = glyph.bitmap
+        x1 = max(0, -x)
+        x2 = min(glyph.width, self.bitmap.width - x)
+        if x1 >= x2:
+            return
+        start = glyph.tile_index * glyph.width
+        for row in range(max(0, -y), min(glyph.height, self.bitmap.height - y)):
+            src = (row * source.width) + start
+            dst = (y + row) * self.bitmap.width + x
+            self.bitmap._data[dst + x1:dst + x2] = source._data[src + x1:src + x2]
@@ -0,0 +1,7 @@
+"""Stand-in for the adafruit_ili9341 library: a displayio.Display, with its pixel counting."""
+import displayio
+
+
+class ILI9341(displayio.Display):
+    def __init__(self, bus, *, width=240, height=320, rotation=0, **kwargs):
+        super().__init__(bus, width=width, height=height, rotation=rotation, **kwargs)
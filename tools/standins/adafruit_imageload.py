@@ -0,0 +1,5 @@
+"""Stand-in for the adafruit_imageload library. Nothing loads images on the host yet."""
+
+
+def load(file_or_filename, *, bitmap=None, palette=None):
+    raise NotImplementedError("adafruit_imageload stand-in can't load images")
@@ -0,0 +1,64 @@
+"""Stand-in for the adafruit_rfm69 library. Sent packets are kept in 'sent'; receive() pops 'inbox'.
+
+For receiver simulations, on_air() is a packet going by: like the real radio, it's only caught
+if we're listening and the one-packet FIFO is empty, and it sits there until receive() reads it."""
+import time
+
+
+class RFM69():
+    def __init__(self, spi, cs, reset, frequency, *, encryption_key=None, high_power=True, **kwargs):
+        self.frequency_mhz = frequency
+        self.encryption_key = encryption_key
+        self.high_power = high_power
+        self.tx_power = 13
+        self.bitrate = 250000
+        self.frequency_deviation = 250000
+        self.temperature = 25.0
+        self.ack_delay = None
+        self.rssi = -90.0
+        self.last_rssi = 0.0
+        self.sent = []
+        self.inbox = []
+
+        self.listening = False
+        self._fifo = None
+        self.caught = 0  # packets on the air we got into the FIFO
+        self.missed = 0  # ... and didn't: not listening, or the FIFO was full
+        self.last_read_time = None # time.monotonic() when receive() last returned a packet
+
+    def send(self, data, **kwargs):
+        """Keep a copy, since the caller may reuse its buffer."""
+        self.sent.append(bytes(data))
+        return True
+
+    def on_air(self, packet):
+        if self.listening and self._fifo is None:
+            self._fifo = bytes(packet)
+            self.caught += 1
+        else:
+            self.missed += 1
+
+    def payload_ready(self):
+        return self._fifo is not None
+
+    def receive(self, *, keep_listening=True, with_header=False, timeout=None):
+        packet = None
+        if self._fifo is not None:
+            packet, self._fifo = self._fifo, None
+        elif self.inbox:
+            packet = self.inbox.pop(0)
+        self.listening = keep_listening
+        if packet is None:
+            return None
+        self.last_rssi = -70.0
+        self.last_read_time = time.monotonic()
+        return bytearray(packet)
+
+    def listen(self):
+        self.listening = True
+
+    def idle(self):
+        self.listening = False
+
+    def sleep(self):
+        self.listening = False
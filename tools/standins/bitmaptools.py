@@ -0,0 +1,53 @@
+"""Stand-in for CircuitPython's bitmaptools module: blit() and readinto()."""
+import array
+
+
+def blit(dest_bitmap, source_bitmap, x, y, *, x1=0, y1=0, x2=None, y2=None,
+         skip_source_index=None, skip_dest_index=None):
+    """Copy source_bitmap's (x1, y1)-(x2, y2) to (x, y) in dest_bitmap; off its edges is clipped."""
+    if x2 is None:
+        x2 = source_bitmap.width
+    if y2 is None:
+        y2 = source_bitmap.height
+    if x < 0 or y < 0 or x > dest_bitmap.width or y > dest_bitmap.height:
+        raise ValueError("out of range of target")
+    x2 = min(x2, x1 + dest_bitmap.width - x)
+    y2 = min(y2, y1 + dest_bitmap.height - y)
+    if x1 >= x2 or y1 >= y2:
+        return
+
+    dest = dest_bitmap._data
+    source = source_bitmap._data
+    n = x2 - x1
+    for row in range(y2 - y1):
+        s = (y1 + row) * source_bitmap.width + x1
+        d = (y + row) * dest_bitmap.width + x
+        if skip_dest_index is None and (skip_source_index is None or not any(dest[d:d + n])):
+            dest[d:d + n] = source[s:s + n] # nothing there to keep
+        else:
+            for i in range(n):
+                value = source[s + i]
+                if value != skip_source_index and dest[d + i] != skip_dest_index:
+                    dest[d + i] = value
+    dest_bitmap.dirty(x, y, x + n, y + y2 - y1)
+
+
+_BITS = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def readinto(bitmap, file, bits_per_pixel, element_size=1, reverse_pixels_in_element=False,
+             swap_bytes_in_element=False, reverse_rows=False):
+    """Read rows of pixels from the file into the bitmap; each row's padded to a whole element.
+    (Only 1-bit pixels, most significant first, here.)"""
+    if bits_per_pixel != 1 or element_size != 1 or reverse_pixels_in_element or swap_bytes_in_element:
+        raise NotImplementedError("the stand-in only reads 1-bit pixels, a byte at a time")
+    width = bitmap.width
+    row_bytes = (width + 7) // 8
+    rows = range(bitmap.height - 1, -1, -1) if reverse_rows else range(bitmap.height)
+    for y in rows:
+        row = file.read(row_bytes)
+        if len(row) != row_bytes:
+            raise EOFError()
+        bits = format(int.from_bytes(row, "big"), f"0{row_bytes * 8}b")[:width]
+        bitmap._data[y * width:(y + 1) * width] = array.array(bitmap._data.typecode, bits.encode().translate(_BITS))
+    bitmap.dirty()
@@ -0,0 +1,39 @@
+"""Stand-in for CircuitPython's board module: pins are just names.
+The I2C bus is a stand-in busio.I2C, with a simulated BME280 on it at 0x77."""
+import busio
+import sim_bme280
+
+NEOPIXEL = "NEOPIXEL"
+RFM_CS = "RFM_CS"
+RFM_RST = "RFM_RST"
+D5 = "D5"
+D6 = "D6"
+D9 = "D9"
+D10 = "D10"
+D11 = "D11"
+D12 = "D12"
+D13 = "D13"
+SCL = "SCL"
+SDA = "SDA"
+
+
+class _Bus():
+    """Buses do nothing; the devices on them are stand-ins too."""
+    def try_lock(self):
+        return True
+
+    def unlock(self):
+        pass
+
+
+_spi = _Bus()
+_i2c = busio.I2C(SCL, SDA)
+_i2c.attach(0x77, sim_bme280.BME280())
+
+
+def SPI():
+    return _spi
+
+
+def I2C():
+    return _i2c
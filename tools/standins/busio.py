@@ -0,0 +1,57 @@
+"""Stand-in for CircuitPython's busio module: an I2C bus with simulated devices on it, that counts what goes over it.
+
+attach() a device - something with write(data) and read(n), like sim_bme280.BME280 - at an address.
+Every transaction (a write, a read, or a write then a read with a repeated start) adds one to 'transactions'."""
+
+
+class I2C():
+    def __init__(self, scl=None, sda=None, *, frequency=100000):
+        self.devices = {}
+        self.transactions = 0
+        self.bytes_written = 0
+        self.bytes_read = 0
+        self._locked = False
+
+    def attach(self, address, device):
+        self.devices[address] = device
+
+    def try_lock(self):
+        if self._locked:
+            return False
+        self._locked = True
+        return True
+
+    def unlock(self):
+        self._locked = False
+
+    def scan(self):
+        return sorted(self.devices)
+
+    def _device(self, address):
+        self.transactions += 1
+        if address not in self.devices:
+            raise OSError(19, f"No I2C device at {address:#x}") # ENODEV, like the real thing
+        return self.devices[address]
+
+    def writeto(self, address, buffer, *, start=0, end=None):
+        data = bytes(buffer[start:end])
+        self._device(address).write(data)
+        self.bytes_written += len(data)
+
+    def readfrom_into(self, address, buffer, *, start=0, end=None):
+        end = len(buffer) if end is None else end
+        buffer[start:end] = self._device(address).read(end - start)
+        self.bytes_read += end - start
+
+    def writeto_then_readfrom(self, address, out_buffer, in_buffer, *,
+                              out_start=0, out_end=None, in_start=0, in_end=None):
+        device = self._device(address)
+        data = bytes(out_buffer[out_start:out_end])
+        device.write(data)
+        in_end = len(in_buffer) if in_end is None else in_end
+        in_buffer[in_start:in_end] = device.read(in_end - in_start)
+        self.bytes_written += len(data)
+        self.bytes_read += in_end - in_start
+
+    def deinit(self):
+        pass
@@ -0,0 +1,32 @@
+"""Stand-in for CircuitPython's countio module. Nothing ever gets counted unless you add to 'count'.
+Every Counter made is kept in 'counters', so a host tool can find the one the code under test made."""
+
+counters = []
+
+
+class Edge():
+    RISE = "RISE"
+    FALL = "FALL"
+    RISE_AND_FALL = "RISE_AND_FALL"
+
+
+class Counter():
+    def __init__(self, pin, *, edge=Edge.FALL, pull=None):
+        self.pin = pin
+        self.edge = edge
+        self.pull = pull
+        self.count = 0
+        counters.append(self)
+
+    def reset(self):
+        self.count = 0
+
+    def deinit(self):
+        if self in counters:
+            counters.remove(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.deinit()
@@ -0,0 +1,30 @@
+"""Stand-in for CircuitPython's digitalio module."""
+
+
+class Direction():
+    INPUT = "INPUT"
+    OUTPUT = "OUTPUT"
+
+
+class Pull():
+    UP = "UP"
+    DOWN = "DOWN"
+
+
+class DigitalInOut():
+    def __init__(self, pin):
+        self.pin = pin
+        self.direction = Direction.INPUT
+        self.pull = None
+        self.value = True
+
+    def switch_to_output(self, value=False, **kwargs):
+        self.direction = Direction.OUTPUT
+        self.value = value
+
+    def switch_to_input(self, pull=None):
+        self.direction = Direction.INPUT
+        self.pull = pull
+
+    def deinit(self):
+        pass
@@ -0,0 +1,397 @@
+"""Stand-in for CircuitPython's displayio: Bitmaps, Palettes, TileGrids, Groups, and a Display.
+
+Like the real thing, a refresh() only pushes what changed: each TileGrid says which of its areas are dirty -
+all of it (and where it was before) if it moved, or its bitmap or palette was replaced or changed colour,
+or just the changed part of its bitmap - and a Group says where any children it lost used to be. The Display
+counts the pixels it would push, and the bytes that would take over its bus, for each refresh.
+With DRAW set before it's made, it also draws what it pushes into its framebuffer - RGB565, like the ILI9341's -
+just those areas, so a frame with stale pixels left in it looks wrong there too; save_png() writes it out.
+(Every Display made is kept in 'displays', so a host tool can find the one the code under test made.)"""
+import array
+import struct
+import zlib
+
+displays = []
+
+# Draw into the Displays' framebuffers? Off, it's just counting - drawing's slow in Python.
+DRAW = False
+
+
+def release_displays():
+    displays.clear()
+
+
+def _union(a, b):
+    if a is None:
+        return b
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def rgb565(color):
+    """A 24-bit RGB colour as the display has it."""
+    return ((color >> 8) & 0xF800) | ((color >> 5) & 0x07E0) | ((color >> 3) & 0x001F)
+
+
+def rgb888(pixel):
+    """An RGB565 pixel back as 24-bit RGB, the low bits filled in so white's still white."""
+    r = (pixel >> 11) & 0x1F
+    g = (pixel >> 5) & 0x3F
+    b = pixel & 0x1F
+    return ((r << 3 | r >> 2) << 16) | ((g << 2 | g >> 4) << 8) | (b << 3 | b >> 2)
+
+
+class Bitmap():
+    def __init__(self, width, height, value_count):
+        self.width = width
+        self.height = height
+        self.value_count = value_count
+        self._data = array.array('B' if value_count <= 256 else 'H', [0]) * (width * height)
+        self._dirty = None # (x1, y1, x2, y2), or None
+
+    def _index(self, index):
+        if isinstance(index, tuple):
+            return index[0], index[1]
+        return index % self.width, index // self.width
+
+    def __getitem__(self, index):
+        x, y = self._index(index)
+        return self._data[y * self.width + x]
+
+    def __setitem__(self, index, value):
+        x, y = self._index(index)
+        if self._data[y * self.width + x] != value:
+            self._data[y * self.width + x] = value
+            self._dirty = _union(self._dirty, (x, y, x + 1, y + 1))
+
+    def fill(self, value):
+        self._data[:] = array.array(self._data.typecode, [value]) * len(self._data)
+        self._dirty = (0, 0, self.width, self.height)
+
+    def dirty(self, x1=0, y1=0, x2=None, y2=None):
+        """Mark an area changed - after writing into the bitmap some other way (a memoryview, say)."""
+        self._dirty = _union(self._dirty, (x1, y1, self.width if x2 is None else x2, self.height if y2 is None else y2))
+
+
+class Palette():
+    def __init__(self, color_count, *, dither=False):
+        self._colors = [0] * color_count
+        self._transparent = [False] * color_count
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._colors)
+
+    def __getitem__(self, index):
+        return self._colors[index]
+
+    def __setitem__(self, index, color):
+        if isinstance(color, (tuple, list)):
+            color = (color[0] << 16) | (color[1] << 8) | color[2]
+        if self._colors[index] != color: # the real one doesn't count a colour it already has as a change, either
+            self._colors[index] = color
+            self._dirty = True
+
+    def make_transparent(self, index):
+        if not self._transparent[index]:
+            self._transparent[index] = True
+            self._dirty = True
+
+    def make_opaque(self, index):
+        if self._transparent[index]:
+            self._transparent[index] = False
+            self._dirty = True
+
+    def is_transparent(self, index):
+        return self._transparent[index]
+
+    def _rgb565(self):
+        """The colours as the display has them; None for transparent."""
+        return [None if transparent else rgb565(color) for color, transparent in zip(self._colors, self._transparent)]
+
+
+class TileGrid():
+    def __init__(self, bitmap, *, pixel_shader, width=1, height=1, tile_width=None, tile_height=None,
+                 default_tile=0, x=0, y=0):
+        self._bitmap = bitmap
+        self._pixel_shader = pixel_shader
+        self.width = width
+        self.height = height
+        self.tile_width = bitmap.width if tile_width is None else tile_width
+        self.tile_height = bitmap.height if tile_height is None else tile_height
+        self._tiles = [default_tile] * (width * height)
+        self._x = x
+        self._y = y
+        self._hidden = False
+        self._changed = True
+        self._drawn = None # where it was on the screen at the last refresh
+
+    def _set(name):
+        def setter(self, value):
+            if getattr(self, name) != value:
+                setattr(self, name, value)
+                self._changed = True
+        return setter
+
+    x = property(lambda self: self._x, _set("_x"))
+    y = property(lambda self: self._y, _set("_y"))
+    hidden = property(lambda self: self._hidden, _set("_hidden"))
+    bitmap = property(lambda self: self._bitmap, _set("_bitmap"))
+    pixel_shader = property(lambda self: self._pixel_shader, _set("_pixel_shader"))
+    del _set
+
+    def __getitem__(self, index):
+        x, y = index if isinstance(index, tuple) else (index % self.width, index // self.width)
+        return self._tiles[y * self.width + x]
+
+    def __setitem__(self, index, tile):
+        x, y = index if isinstance(index, tuple) else (index % self.width, index // self.width)
+        if self._tiles[y * self.width + x] != tile:
+            self._tiles[y * self.width + x] = tile
+            self._changed = True
+
+    def _area(self, ox, oy):
+        x = ox + self._x
+        y = oy + self._y
+        return (x, y, x + self.width * self.tile_width, y + self.height * self.tile_height)
+
+    def _refresh_areas(self, ox, oy, hidden, areas, touched):
+        current = None if hidden or self._hidden else self._area(ox, oy)
+        touched.append(self)
+        if self._changed or current != self._drawn or self._pixel_shader._dirty:
+            if self._drawn is not None and self._drawn != current:
+                areas.append(self._drawn)
+            if current is not None:
+                areas.append(current)
+        elif current is not None and self._bitmap._dirty is not None:
+            if self.width == 1 and self.height == 1 and self.tile_width == self._bitmap.width:
+                x1, y1, x2, y2 = self._bitmap._dirty
+                areas.append((current[0] + x1, current[1] + y1, current[0] + x2, current[1] + y2))
+            else:
+                areas.append(current)
+        self._next_drawn = current
+
+    def _draw(self, ox, oy, hidden, area, framebuffer, stride):
+        """Draw our part of 'area' over what's in the framebuffer already."""
+        if hidden or self._hidden:
+            return
+        gx, gy, gx2, gy2 = self._area(ox, oy)
+        x1, y1, x2, y2 = max(gx, area[0]), max(gy, area[1]), min(gx2, area[2]), min(gy2, area[3])
+        if x1 >= x2 or y1 >= y2:
+            return
+        colors = self._pixel_shader._rgb565()
+        opaque = None not in colors
+        bitmap = self._bitmap
+        data = bitmap._data
+        tiles_across = bitmap.width // self.tile_width
+        for y in range(y1, y2):
+            tile_y, row = divmod(y - gy, self.tile_height)
+            x = x1
+            while x < x2:
+                tile_x, column = divmod(x - gx, self.tile_width)
+                n = min(x2 - x, self.tile_width - column)
+                tile = self._tiles[tile_y * self.width + tile_x]
+                s = (((tile // tiles_across) * self.tile_height + row) * bitmap.width
+                     + (tile % tiles_across) * self.tile_width + column)
+                d = y * stride + x
+                if opaque:
+                    framebuffer[d:d + n] = array.array("H", [colors[v] for v in data[s:s + n]])
+                else:
+                    below = framebuffer[d:d + n]
+                    framebuffer[d:d + n] = array.array("H", [b if colors[v] is None else colors[v]
+                                                             for v, b in zip(data[s:s + n], below)])
+                x += n
+
+    def _finish_refresh(self):
+        self._drawn = self._next_drawn
+        self._changed = False
+        self._bitmap._dirty = None
+        self._pixel_shader._dirty = False
+
+
+class Group():
+    def __init__(self, *, scale=1, x=0, y=0):
+        self._children = []
+        self.x = x
+        self.y = y
+        self.hidden = False
+        self.scale = scale
+        self._vacated = [] # where children we've lost were
+
+    def _lose(self, child):
+        for tile_grid in _tile_grids(child):
+            if tile_grid._drawn is not None:
+                self._vacated.append(tile_grid._drawn)
+                tile_grid._drawn = None
+                tile_grid._changed = True
+
+    def append(self, child):
+        self._children.append(child)
+
+    def insert(self, index, child):
+        self._children.insert(index, child)
+
+    def remove(self, child):
+        self._children.remove(child)
+        self._lose(child)
+
+    def pop(self, index=-1):
+        child = self._children.pop(index)
+        self._lose(child)
+        return child
+
+    def index(self, child):
+        return self._children.index(child)
+
+    def __len__(self):
+        return len(self._children)
+
+    def __getitem__(self, index):
+        return self._children[index]
+
+    def __setitem__(self, index, child):
+        if self._children[index] is not child:
+            self._lose(self._children[index])
+            self._children[index] = child
+
+    def __delitem__(self, index):
+        self.pop(index)
+
+    def __contains__(self, child):
+        return child in self._children
+
+    def __iter__(self):
+        return iter(self._children)
+
+    def _refresh_areas(self, ox, oy, hidden, areas, touched):
+        areas.extend(self._vacated)
+        self._vacated.clear()
+        for child in self._children:
+            child._refresh_areas(ox + self.x, oy + self.y, hidden or self.hidden, areas, touched)
+
+
+    def _draw(self, ox, oy, hidden, area, framebuffer, stride):
+        for child in self._children:
+            child._draw(ox + self.x, oy + self.y, hidden or self.hidden, area, framebuffer, stride)
+
+
+def _tile_grids(item):
+    if isinstance(item, TileGrid):
+        yield item
+    else:
+        for child in item:
+            yield from _tile_grids(child)
+
+
+class Display():
+    """What the real ones have in common. (On CircuitPython 9 it's busdisplay.BusDisplay.)"""
+
+    # Per area pushed: ILI9341-style column and row address commands, and a memory write.
+    WINDOW_BYTES = 11
+
+    def __init__(self, display_bus, *, width, height, rotation=0, color_depth=16, auto_refresh=True, **kwargs):
+        self.bus = display_bus
+        self.width = width
+        self.height = height
+        self.rotation = rotation
+        self.color_depth = color_depth
+        self.auto_refresh = auto_refresh
+        self._root_group = None
+        self._whole_screen = True
+
+        self.refreshes = 0    # refresh() calls
+        self.pixels_pushed = 0
+        self.bytes_pushed = 0
+        self.last_areas = []  # what the last refresh() pushed: (x1, y1, x2, y2), clipped to the screen
+        self.last_pixels = 0
+        self.refresh_log = [] # (pixels, bytes) for each refresh()
+        self.drawing = DRAW
+        self.framebuffer = array.array("H", [0]) * (width * height) # RGB565, a row at a time
+        displays.append(self)
+
+    @property
+    def root_group(self):
+        return self._root_group
+
+    @root_group.setter
+    def root_group(self, group):
+        self._root_group = group
+        self._whole_screen = True
+
+    def refresh(self, *, target_frames_per_second=None, minimum_frames_per_second=0):
+        """Work out what changed, and count what it takes to push it."""
+        areas = []
+        touched = []
+        if self._root_group is not None:
+            self._root_group._refresh_areas(0, 0, False, areas, touched)
+        if self._whole_screen:
+            areas = [(0, 0, self.width, self.height)]
+            self._whole_screen = False
+
+        self.last_areas = []
+        pixels = 0
+        for x1, y1, x2, y2 in areas:
+            x1, y1, x2, y2 = max(0, x1), max(0, y1), min(self.width, x2), min(self.height, y2)
+            if x1 < x2 and y1 < y2:
+                self.last_areas.append((x1, y1, x2, y2))
+                pixels += (x2 - x1) * (y2 - y1)
+        self._push(self.last_areas)
+        for tile_grid in touched:
+            tile_grid._finish_refresh()
+
+        self.refreshes += 1
+        self.last_pixels = pixels
+        self.pixels_pushed += pixels
+        n_bytes = pixels * self.color_depth // 8 + len(self.last_areas) * self.WINDOW_BYTES
+        self.bytes_pushed += n_bytes
+        self.refresh_log.append((pixels, n_bytes))
+        if hasattr(self.bus, "bytes_sent"):
+            self.bus.bytes_sent += n_bytes
+        return True
+
+    def _push(self, areas):
+        """Send these areas to the screen - if we're drawing, into the framebuffer."""
+        if self.drawing:
+            for area in areas:
+                self._draw(area, self.framebuffer)
+
+    def _draw(self, area, framebuffer):
+        x1, y1, x2, y2 = area
+        black = array.array("H", [0]) * (x2 - x1) # where there's nothing, the real one's black too
+        for y in range(y1, y2):
+            framebuffer[y * self.width + x1:y * self.width + x2] = black
+        if self._root_group is not None:
+            self._root_group._draw(0, 0, False, area, framebuffer, self.width)
+
+    def render(self):
+        """What the whole screen should look like now, drawn from scratch: a new framebuffer.
+        If the framebuffer's been drawing, and refreshed, it should be the same."""
+        framebuffer = array.array("H", [0]) * (self.width * self.height)
+        self._draw((0, 0, self.width, self.height), framebuffer)
+        return framebuffer
+
+    def pixel(self, x, y, framebuffer=None):
+        """The RGB565 pixel at (x, y)."""
+        return (self.framebuffer if framebuffer is None else framebuffer)[y * self.width + x]
+
+    def frame(self):
+        """The framebuffer as a height x width numpy array of uint16 RGB565 - a view, not a copy. Needs numpy."""
+        import numpy
+        return numpy.frombuffer(self.framebuffer, dtype=numpy.uint16).reshape(self.height, self.width)
+
+    def save_png(self, path, framebuffer=None):
+        """Write the framebuffer (or another, from render()) out as a 24-bit PNG."""
+        framebuffer = self.framebuffer if framebuffer is None else framebuffer
+        rows = bytearray()
+        for y in range(self.height):
+            rows.append(0) # no filter
+            for pixel in framebuffer[y * self.width:(y + 1) * self.width]:
+                rows += rgb888(pixel).to_bytes(3, "big")
+
+        def chunk(kind, data):
+            return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+        with open(path, "wb") as f:
+            f.write(b"\x89PNG\r\n\x1a\n")
+            f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)))
+            f.write(chunk(b"IDAT", zlib.compress(bytes(rows))))
+            f.write(chunk(b"IEND", b""))
@@ -0,0 +1,8 @@
+"""Stand-in for CircuitPython's fontio module."""
+from collections import namedtuple
+
+Glyph = namedtuple("Glyph", ["bitmap", "tile_index", "width", "height", "dx", "dy", "shift_x", "shift_y"])
+
+
+class FontProtocol():
+    """What fonts have: get_bounding_box() and get_glyph()."""
@@ -0,0 +1,14 @@
+"""Stand-in for CircuitPython's fourwire module: a display bus that counts the bytes a display sends it."""
+
+
+class FourWire():
+    def __init__(self, spi_bus, *, command, chip_select, reset=None, baudrate=24000000, polarity=0, phase=0):
+        self.spi_bus = spi_bus
+        self.baudrate = baudrate
+        self.bytes_sent = 0
+
+    def reset(self):
+        pass
+
+    def send(self, command, data):
+        self.bytes_sent += 1 + len(data)
@@ -0,0 +1,64 @@
+"""Stand-in for CircuitPython's keypad module. Nothing ever gets pressed unless you put events in the queue.
+Every Keys made is kept in 'scanners', so a host tool can find the one the code under test made."""
+
+scanners = []
+
+
+class Event():
+    def __init__(self, key_number=0, pressed=True, timestamp=0):
+        self.key_number = key_number
+        self.pressed = pressed
+        self.released = not pressed
+        self.timestamp = timestamp
+
+
+class _EventQueue():
+    def __init__(self, max_events=64):
+        self.queued = []
+        self.max_events = max_events
+        self.overflowed = False
+
+    def put(self, event):
+        """For host tools: what the background scanning does on the real thing."""
+        if len(self.queued) >= self.max_events:
+            self.overflowed = True
+            return
+        self.queued.append(event)
+
+    def get(self):
+        return self.queued.pop(0) if self.queued else None
+
+    def get_into(self, event):
+        if not self.queued:
+            return False
+        queued = self.queued.pop(0)
+        event.key_number = queued.key_number
+        event.pressed = queued.pressed
+        event.released = queued.released
+        event.timestamp = queued.timestamp
+        return True
+
+    def __len__(self):
+        return len(self.queued)
+
+    def clear(self):
+        self.queued.clear()
+
+
+class Keys():
+    def __init__(self, pins, *, value_when_pressed, pull=True, interval=0.02, max_events=64, **kwargs):
+        self.pins = pins
+        self.interval = interval
+        self.max_events = max_events
+        self.events = _EventQueue(max_events)
+        scanners.append(self)
+
+    def deinit(self):
+        if self in scanners:
+            scanners.remove(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.deinit()
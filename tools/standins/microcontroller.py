@@ -0,0 +1,9 @@
+"""Stand-in for CircuitPython's microcontroller module."""
+
+
+class _Processor():
+    temperature = 30.0
+    frequency = 125_000_000
+
+
+cpu = _Processor()
@@ -0,0 +1,18 @@
+"""Stand-in for the Adafruit neopixel library."""
+
+
+class NeoPixel():
+    def __init__(self, pin, n, **kwargs):
+        self._pixels = [0] * n
+        self.fills = 0
+
+    def fill(self, color):
+        self.fills += 1
+        for i in range(len(self._pixels)):
+            self._pixels[i] = color
+
+    def __setitem__(self, index, color):
+        self._pixels[index] = color
+
+    def __getitem__(self, index):
+        return self._pixels[index]
@@ -0,0 +1,28 @@
+"""Stand-in for CircuitPython's pwmio module. Counts writes to duty_cycle.
+Every PWMOut made is kept in 'outputs', so a host tool can find the one the code under test made."""
+
+outputs = []
+
+
+class PWMOut():
+    def __init__(self, pin, *, duty_cycle=0, frequency=500, variable_frequency=False):
+        self.pin = pin
+        self.frequency = frequency
+        self._duty_cycle = duty_cycle
+        self.writes = 0
+        outputs.append(self)
+
+    @property
+    def duty_cycle(self):
+        return self._duty_cycle
+
+    @duty_cycle.setter
+    def duty_cycle(self, value):
+        if not 0 <= value <= 0xFFFF:
+            raise ValueError("duty_cycle must be 0-65535")
+        self._duty_cycle = value
+        self.writes += 1
+
+    def deinit(self):
+        if self in outputs:
+            outputs.remove(self)
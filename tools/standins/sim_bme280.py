@@ -0,0 +1,151 @@
+"""A simulated BME280, at the register level, for the stand-in busio.I2C - not a real module.
+
+Set 'temperature' (C), 'pressure' (hPa) and 'humidity' (%) to what the air's doing. A forced
+measurement turns them into raw ADC values - with noise, less for more oversampling, and the
+IIR filter if it's on - by running Bosch's compensation backwards with the calibration below,
+so a driver has to get the compensation right to get them back. Normal mode measures once, then
+just keeps what it has. 'measurements' counts them."""
+import random
+import struct
+
+# Calibration from Bosch's datasheet example, and typical humidity ones.
+T1, T2, T3 = 27504, 26435, -1000
+P = (36477, -10685, 3024, 2855, 140, -7, 15500, -14600, 6000)
+H1, H2, H3, H4, H5, H6 = 75, 362, 0, 313, 50, 30
+
+# RMS noise at 1x oversampling: C, hPa, %.
+NOISE = (0.02, 0.033, 0.07)
+
+
+def compensate_t(adc_t):
+    """(C, t_fine) - like the datasheet."""
+    var1 = (adc_t / 16384.0 - T1 / 1024.0) * T2
+    var2 = (adc_t / 131072.0 - T1 / 8192.0) ** 2 * T3
+    return (var1 + var2) / 5120.0, var1 + var2
+
+
+def compensate_p(adc_p, t_fine):
+    var1 = t_fine / 2.0 - 64000.0
+    var2 = var1 * var1 * P[5] / 32768.0
+    var2 = var2 + var1 * P[4] * 2.0
+    var2 = var2 / 4.0 + P[3] * 65536.0
+    var1 = (P[2] * var1 * var1 / 524288.0 + P[1] * var1) / 524288.0
+    var1 = (1.0 + var1 / 32768.0) * P[0]
+    p = 1048576.0 - adc_p
+    p = (p - var2 / 4096.0) * 6250.0 / var1
+    var1 = P[8] * p * p / 2147483648.0
+    var2 = p * P[7] / 32768.0
+    return (p + (var1 + var2 + P[6]) / 16.0) / 100
+
+
+def compensate_h(adc_h, t_fine):
+    h = t_fine - 76800.0
+    h = (adc_h - (H4 * 64.0 + H5 / 16384.0 * h)) * (H2 / 65536.0 * (1.0 + H6 / 67108864.0 * h * (1.0 + H3 / 67108864.0 * h)))
+    return h * (1.0 - H1 * h / 524288.0)
+
+
+def invert(f, target, low, high, rising=True):
+    """The int in [low, high) that f() takes closest to target; f is monotonic."""
+    while high - low > 1:
+        mid = (low + high) // 2
+        if (f(mid) <= target) == rising:
+            low = mid
+        else:
+            high = mid
+    return low if abs(f(low) - target) <= abs(f(high) - target) else high
+
+
+def _oversampling(code):
+    return 0 if code == 0 else 1 << (code - 1)
+
+
+class BME280():
+    def __init__(self, noise=True, seed=1):
+        self.temperature = 21.0
+        self.pressure = 1013.0
+        self.humidity = 55.0
+        self.noise = noise
+        self._rng = random.Random(seed)
+        self.measurements = 0
+        self._registers = bytearray(256)
+        self._pointer = 0
+        self._registers[0xD0] = 0x60
+        cal = struct.pack("<HhhHhhhhhhhh", T1, T2, T3, *P)
+        self._registers[0x88:0x88 + 24] = cal
+        self._registers[0xA1] = H1
+        e4, e5, e6 = (H4 >> 4) & 0xFF, (H4 & 0x0F) | ((H5 & 0x0F) << 4), (H5 >> 4) & 0xFF
+        self._registers[0xE1:0xE8] = struct.pack("<hBBBBb", H2, H3, e4, e5, e6, H6)
+        self._reset()
+
+    def _reset(self):
+        for register in (0xF2, 0xF3, 0xF4, 0xF5):
+            self._registers[register] = 0
+        self._ctrl_hum = 0
+        self._filtered = None
+        self._registers[0xF7:0xFF] = bytes((0x80, 0, 0, 0x80, 0, 0, 0x80, 0))
+
+    def write(self, data):
+        if len(data) == 1: # just setting the register to read from
+            self._pointer = data[0]
+        for i in range(0, len(data) - 1, 2): # register, value pairs
+            self._write_register(data[i], data[i + 1])
+
+    def _write_register(self, register, value):
+        if register == 0xE0:
+            if value == 0xB6:
+                self._reset()
+            return
+        if register == 0xF2:
+            self._registers[0xF2] = value
+            return
+        self._registers[register] = value
+        if register == 0xF4:
+            self._ctrl_hum = self._registers[0xF2] & 0x07 # only takes effect now
+            mode = value & 0x03
+            if mode in (1, 2):
+                self._measure()
+                self._registers[0xF4] = value & 0xFC # back to sleep
+            elif mode == 3:
+                self._measure()
+
+    def read(self, n):
+        data = bytes(self._registers[self._pointer:self._pointer + n])
+        self._pointer += n
+        return data
+
+    def _measure(self):
+        self.measurements += 1
+        osrs_t = _oversampling(self._registers[0xF4] >> 5)
+        osrs_p = _oversampling((self._registers[0xF4] >> 2) & 0x07)
+        osrs_h = _oversampling(self._ctrl_hum)
+        coefficient = (0, 2, 4, 8, 16, 16, 16, 16)[(self._registers[0xF5] >> 2) & 0x07]
+
+        def noisy(value, i, oversampling):
+            if not self.noise:
+                return value
+            return value + self._rng.gauss(0, NOISE[i] / oversampling ** 0.5)
+
+        adc_t = adc_p = 0x80000
+        adc_h = 0x8000
+        if osrs_t:
+            adc_t = invert(lambda a: compensate_t(a)[0], noisy(self.temperature, 0, osrs_t), 0, 1 << 20)
+            if osrs_p:
+                t_fine = compensate_t(adc_t)[1]
+                adc_p = invert(lambda a: compensate_p(a, t_fine), noisy(self.pressure, 1, osrs_p), 0, 1 << 20,
+                               rising=False)
+            if coefficient:
+                if self._filtered is None:
+                    self._filtered = [adc_t, adc_p]
+                else:
+                    self._filtered[0] += (adc_t - self._filtered[0]) / coefficient
+                    if osrs_p:
+                        self._filtered[1] += (adc_p - self._filtered[1]) / coefficient
+                adc_t = round(self._filtered[0])
+                if osrs_p:
+                    adc_p = round(self._filtered[1])
+            if osrs_h:
+                t_fine = compensate_t(adc_t)[1]
+                adc_h = invert(lambda a: compensate_h(a, t_fine), noisy(self.humidity, 2, osrs_h), 0, 1 << 16)
+        self._registers[0xF7:0xFF] = bytes((adc_p >> 12, (adc_p >> 4) & 0xFF, (adc_p << 4) & 0xF0,
+                                            adc_t >> 12, (adc_t >> 4) & 0xFF, (adc_t << 4) & 0xF0,
+                                            adc_h >> 8, adc_h & 0xFF))
@@ -0,0 +1,29 @@
+"""Stand-in for CircuitPython's supervisor module.
+
+ticks_ms() follows time.monotonic(), unless a host tool calls set_ticks() to drive it by hand."""
+import time
+
+
+class _Runtime():
+    usb_connected = True
+    autoreload = False
+
+
+runtime = _Runtime()
+
+_TICKS_PERIOD = 1 << 29
+
+_virtual_ticks = None
+
+
+def ticks_ms():
+    """Like the real one, this wraps around at 2**29."""
+    if _virtual_ticks is not None:
+        return _virtual_ticks % _TICKS_PERIOD
+    return int(time.monotonic() * 1000) % _TICKS_PERIOD
+
+
+def set_ticks(ms):
+    """For host tools: from now on ticks_ms() is 'ms' (mod 2**29) until the next call; None goes back to real time."""
+    global _virtual_ticks
+    _virtual_ticks = ms
@@ -0,0 +1,30 @@
+"""Stand-in for CircuitPython's terminalio module: FONT is a 6x12 built-in font.
+Its glyphs are just blocks - enough to take up the space real ones would."""
+import displayio
+import fontio
+
+_WIDTH = 6
+_HEIGHT = 12
+_DESCENT = 2
+
+
+class _BuiltinFont():
+    def __init__(self):
+        self.bitmap = displayio.Bitmap(_WIDTH, _HEIGHT, 2)
+        for x in range(1, _WIDTH - 1):
+            for y in range(2, _HEIGHT - 1):
+                self.bitmap[x, y] = 1
+        self._blank = displayio.Bitmap(_WIDTH, _HEIGHT, 2)
+        self._glyphs = {}
+
+    def get_bounding_box(self):
+        return (_WIDTH, _HEIGHT)
+
+    def get_glyph(self, codepoint):
+        if codepoint not in self._glyphs:
+            bitmap = self._blank if chr(codepoint).isspace() else self.bitmap
+            self._glyphs[codepoint] = fontio.Glyph(bitmap, 0, _WIDTH, _HEIGHT, 0, -_DESCENT, _WIDTH, 0)
+        return self._glyphs[codepoint]
+
+
+FONT = _BuiltinFont()
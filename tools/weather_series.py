@@ -0,0 +1,81 @@
+"""
+    Synthetic but realistic-ish weather readings, for the host-side simulations.
+
+    Temperature follows a daily sine with a little sensor noise, pressure drifts slowly,
+    and the wind is a mean-reverting random walk with the odd gust.
+    Everything is seeded, so runs are repeatable.
+"""
+import math
+import random
+
+import piwx_constants
+
+
+def wind_series(n, seed=1, mean_mph=10.0):
+    """n wind readings, in MPH, one per sample."""
+
+    rng = random.Random(seed)
+    mph = mean_mph
+    result = []
+    for _ in range(n):
+        mph += 0.1 * (mean_mph - mph) + rng.gauss(0, 1.5)
+        if rng.random() < 0.01:
+            mph += rng.uniform(5, 15) # gust
+        mph = max(mph, 0.0)
+
+        # What piwx_tx actually reports: counts per second, times 0.2.
+        result.append(round(mph / 0.2) * 0.2)
+    return result
+
+
+# (name, mean MPH, gust noise, minutes) - wind_regimes() strings these together at random.
+WIND_REGIMES = (
+    ("calm",    0.0,  0.0, (30, 240)),
+    ("light",   3.0,  0.3, (20, 120)),
+    ("breeze", 10.0,  0.4, (20, 120)),
+    ("gusty",  15.0,  4.0, (5, 40)),
+    )
+
+
+def wind_regimes(n, seed=1):
+    """n wind readings, one a second: spells of calm, light air, steady breeze, and gusts.
+    Returns (winds, list of (start index, regime name))."""
+
+    rng = random.Random(seed)
+    mph = 0.0
+    winds = []
+    spells = []
+    while len(winds) < n:
+        name, mean_mph, noise, (lo, hi) = rng.choice(WIND_REGIMES)
+        spells.append((len(winds), name))
+        for _ in range(rng.randint(lo, hi) * 60):
+            mph += 0.05 * (mean_mph - mph) + rng.gauss(0, noise)
+            if name == "gusty" and rng.random() < 0.02:
+                mph += rng.uniform(5, 15)
+            mph = max(mph, 0.0)
+            winds.append(round(mph / 0.2) * 0.2)
+    return winds[:n], spells
+
+
+def readings(n, interval_s=3.0, seed=1, start_uptime=0):
+    """n data dicts like piwx_tx.update_data_dict() makes, interval_s seconds apart."""
+
+    rng = random.Random(seed)
+    winds = wind_series(n, seed)
+    pressure = 1013.0
+    result = []
+    for i in range(n):
+        t = i * interval_s
+        day_fraction = t / 86400
+        temp_c = 15 + 6 * math.sin(2 * math.pi * (day_fraction - 0.3)) + rng.gauss(0, 0.02)
+        pressure += rng.gauss(0, 0.005)
+        humidity = 70 - 15 * math.sin(2 * math.pi * (day_fraction - 0.3)) + rng.gauss(0, 0.1)
+
+        result.append({
+            piwx_constants.DICT_KEY_TEMPERATURE: temp_c * 9 / 5 + 32,
+            piwx_constants.DICT_KEY_WIND:        winds[i],
+            piwx_constants.DICT_KEY_PRESSURE:    pressure + rng.gauss(0, 0.02),
+            piwx_constants.DICT_KEY_HUMIDITY:    humidity,
+            piwx_constants.DICT_KEY_UPTIME:      start_uptime + int(t),
+            })
+    return result